@@ -0,0 +1,227 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from esquema import COLUMNA_VERSION
+
+# ==========================================
+# 📇 ALMACÉN INDEXADO DE REGISTROS (AÑO, MES)
+# ==========================================
+# Se construye UNA vez por versión de datos y reemplaza los filtros booleanos
+# sobre el DataFrame completo:
+# - registro de un mes:   O(1) por la llave (año, mes)
+# - rebanada de un año:   O(1) por la llave año
+# - metas de un año:      O(1) por la llave año
+# El guardado de un mes/metas actualiza el almacén en sitio (upsert).
+# El almacén mantiene además un cubo de agregados (CuboAgregados) que se
+# actualiza de forma incremental en cada upsert.
+
+
+def llave_anio(anio):
+    return int(float(anio))
+
+
+def llave_mes(anio, mes):
+    return (llave_anio(anio), str(mes))
+
+
+# ==========================================
+# 🧊 CUBO DE AGREGADOS POR AÑO / MES
+# ==========================================
+class _BloqueAnio:
+    def __init__(self, n_columnas):
+        self.mensual = np.zeros((12, n_columnas))      # valor de cada mes
+        self.acumulado = np.zeros((12, n_columnas))    # suma corrida enero..mes
+        self.totales = np.zeros(n_columnas)            # total del año (YTD)
+        self.presentes = np.zeros(12, dtype=bool)      # meses que tienen registro
+
+
+class CuboAgregados:
+    """Totales anuales, valores mensuales y acumulados de cada columna numérica."""
+
+    def __init__(self, meses, columnas):
+        self.meses = list(meses)
+        self.columnas = list(columnas)
+        self._i_mes = {m: i for i, m in enumerate(self.meses)}
+        self._i_col = {c: j for j, c in enumerate(self.columnas)}
+        self._anios = {}
+
+    def _vector(self, registro):
+        return np.array([float(registro.get(c, 0) or 0) for c in self.columnas])
+
+    def construir(self, registros_por_anio):
+        for anio, registros in registros_por_anio.items():
+            bloque = self._anios[anio] = _BloqueAnio(len(self.columnas))
+            for mes, registro in registros.items():
+                i = self._i_mes.get(mes)
+                if i is None:
+                    continue
+                bloque.mensual[i] = self._vector(registro)
+                bloque.presentes[i] = True
+            bloque.acumulado = np.cumsum(bloque.mensual, axis=0)
+            bloque.totales = bloque.acumulado[-1].copy()
+        return self
+
+    def actualizar_mes(self, anio, mes, registro):
+        """Aplica solo la diferencia del mes guardado (sin recalcular el año completo)."""
+        i = self._i_mes.get(mes)
+        if i is None:
+            return
+        bloque = self._anios.get(anio)
+        if bloque is None:
+            bloque = self._anios[anio] = _BloqueAnio(len(self.columnas))
+        nuevo = self._vector(registro)
+        delta = nuevo - bloque.mensual[i]
+        bloque.mensual[i] = nuevo
+        bloque.presentes[i] = True
+        bloque.totales += delta
+        bloque.acumulado[i:] += delta
+
+    # --- CONSULTAS O(1) ---
+    def totales(self, anio):
+        bloque = self._anios.get(anio)
+        if bloque is None:
+            return {c: 0.0 for c in self.columnas}
+        return dict(zip(self.columnas, bloque.totales.tolist()))
+
+    def totales_por_anio(self, columnas):
+        """(años en orden, matriz n_años x len(columnas)) con los totales de TODOS los años a la vez."""
+        anios = sorted(self._anios)
+        idx = [self._i_col[c] for c in columnas]
+        if not anios:
+            return [], np.zeros((0, len(idx)))
+        return anios, np.stack([self._anios[a].totales for a in anios])[:, idx]
+
+    def meses_con_datos(self, anio):
+        bloque = self._anios.get(anio)
+        if bloque is None:
+            return []
+        return [m for m, hay in zip(self.meses, bloque.presentes) if hay]
+
+    def mensual(self, anio, columna, solo_presentes=True):
+        bloque = self._anios.get(anio)
+        if bloque is None:
+            return np.zeros(0 if solo_presentes else 12)
+        serie = bloque.mensual[:, self._i_col[columna]]
+        return serie[bloque.presentes] if solo_presentes else serie.copy()
+
+    def acumulado(self, anio, columna, solo_presentes=True):
+        bloque = self._anios.get(anio)
+        if bloque is None:
+            return np.zeros(0 if solo_presentes else 12)
+        serie = bloque.acumulado[:, self._i_col[columna]]
+        return serie[bloque.presentes] if solo_presentes else serie.copy()
+
+
+# ==========================================
+# 📇 ALMACÉN
+# ==========================================
+class AlmacenRegistros:
+    def __init__(self, df_datos, df_metas, columnas_datos, columnas_metas, meses=None):
+        self.columnas_datos = list(columnas_datos)
+        self.columnas_metas = list(columnas_metas)
+        self._lock = threading.RLock()
+        self._meses = {}       # (año, mes) -> registro
+        self._por_anio = {}    # año -> {mes: registro}
+        self._filas = {}       # (año, mes) -> posición de la fila en la hoja (0 = primera fila de datos)
+        self._metas = {}       # año -> registro de metas
+        self._filas_metas = {}
+        self._df_anio = {}     # año -> DataFrame ya recortado (se descarta al editar ese año)
+        self._total_filas = 0
+        self._total_filas_metas = 0
+
+        if df_datos is not None and not df_datos.empty and 'Año' in df_datos.columns:
+            self._total_filas = len(df_datos)
+            for pos, registro in enumerate(df_datos.to_dict('records')):
+                llave = llave_mes(registro['Año'], registro['Mes'])
+                if llave in self._meses:
+                    continue  # Igual que antes: se respeta la primera fila de cada (año, mes)
+                self._meses[llave] = registro
+                self._filas[llave] = pos
+                self._por_anio.setdefault(llave[0], {})[llave[1]] = registro
+
+        if df_metas is not None and not df_metas.empty and 'Año' in df_metas.columns:
+            self._total_filas_metas = len(df_metas)
+            for pos, registro in enumerate(df_metas.to_dict('records')):
+                anio = llave_anio(registro['Año'])
+                if anio not in self._metas:
+                    self._metas[anio] = registro
+                    self._filas_metas[anio] = pos
+
+        self.cubo = None
+        if meses is not None:
+            columnas_numericas = [c for c in self.columnas_datos if c not in ('Año', 'Mes', COLUMNA_VERSION)]
+            self.cubo = CuboAgregados(meses, columnas_numericas).construir(self._por_anio)
+
+    # --- CONSULTAS ---
+    def mes(self, anio, mes):
+        return self._meses.get(llave_mes(anio, mes))
+
+    def meses_del_anio(self, anio):
+        return self._por_anio.get(llave_anio(anio), {})
+
+    def anio_df(self, anio):
+        anio = llave_anio(anio)
+        with self._lock:
+            if anio not in self._df_anio:
+                registros = list(self._por_anio.get(anio, {}).values())
+                self._df_anio[anio] = pd.DataFrame(registros, columns=self.columnas_datos)
+            return self._df_anio[anio]
+
+    def metas(self, anio):
+        return self._metas.get(llave_anio(anio))
+
+    def totales(self, anio):
+        return self.cubo.totales(llave_anio(anio))
+
+    def anios(self):
+        return sorted(self._por_anio)
+
+    def fila(self, anio, mes):
+        return self._filas.get(llave_mes(anio, mes))
+
+    def fila_metas(self, anio):
+        return self._filas_metas.get(llave_anio(anio))
+
+    # --- ACTUALIZACIÓN EN SITIO ---
+    def upsert_mes(self, registro):
+        llave = llave_mes(registro['Año'], registro['Mes'])
+        with self._lock:
+            existente = self._meses.get(llave)
+            if existente is not None:
+                existente.update(registro)
+            else:
+                existente = dict(registro)
+                self._meses[llave] = existente
+                self._filas[llave] = self._total_filas
+                self._total_filas += 1
+                self._por_anio.setdefault(llave[0], {})[llave[1]] = existente
+            self._df_anio.pop(llave[0], None)
+            if self.cubo is not None:
+                self.cubo.actualizar_mes(llave[0], llave[1], existente)
+        return existente
+
+    def upsert_metas(self, registro):
+        anio = llave_anio(registro['Año'])
+        with self._lock:
+            existente = self._metas.get(anio)
+            if existente is not None:
+                existente.update(registro)
+            else:
+                existente = dict(registro)
+                self._metas[anio] = existente
+                self._filas_metas[anio] = self._total_filas_metas
+                self._total_filas_metas += 1
+        return existente
+
+    # --- EXPORTACIÓN (para escribir la hoja completa) ---
+    def datos_df(self):
+        with self._lock:
+            orden = sorted(self._filas, key=self._filas.get)
+            return pd.DataFrame([self._meses[k] for k in orden], columns=self.columnas_datos)
+
+    def metas_df(self):
+        with self._lock:
+            orden = sorted(self._filas_metas, key=self._filas_metas.get)
+            return pd.DataFrame([self._metas[a] for a in orden], columns=self.columnas_metas)
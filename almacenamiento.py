@@ -0,0 +1,472 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from cache_hojas import firma_dataframe
+from esquema import COLUMNA_VERSION
+from metricas import tramo
+
+# ==========================================
+# 🧩 BACKENDS DE ALMACENAMIENTO (DATOS + METAS)
+# ==========================================
+# Todos exponen lo mismo: leer ambas hojas, leer o escribir UNA fila (la lectura de una
+# fila es el compare-and-set de concurrencia.py) o un lote de filas (importación masiva)
+# en una sola operación.
+# - BackendGSheets:  Google Sheets (producción).
+# - BackendMemoria:  hoja en memoria, para pruebas y uso sin credenciales.
+#   Estos dos "leen la hoja completa" y pasan por la caché compartida + índice.
+# - BackendSQL:      motor local SQLite (o DuckDB) para archivos históricos grandes.
+#   Aquí los filtros por año/mes y las sumas YTD son consultas dentro del motor
+#   (ver AlmacenConsultas), sin cargar la tabla completa a pandas.
+
+
+class BackendAlmacenamiento:
+    nombre = ""
+    lee_hojas_completas = True
+    rechazos = {}   # hoja -> DataFrame de celdas rechazadas por el esquema en la última lectura
+
+    def leer_hojas(self):
+        """(df_datos, df_metas) completos y ya limpios."""
+        raise NotImplementedError
+
+    def leer_fila(self, hoja, fila):
+        """Registro tipado de la fila en la posición `fila` (0-based) tal como está ahora; None si no se puede saber."""
+        return None
+
+    def escribir_fila(self, hoja, fila, valores, nueva):
+        """Escribe una fila: se agrega si es nueva o se sobreescribe en su posición (0-based)."""
+        raise NotImplementedError
+
+    def escribir_lote(self, hoja, cambios):
+        """Varias filas [(fila, valores, nueva)] de una vez; las nuevas se agregan al final en ese orden."""
+        for fila, valores, nueva in cambios:
+            self.escribir_fila(hoja, fila, valores, nueva)
+
+
+class BackendGSheets(BackendAlmacenamiento):
+    nombre = "gsheets"
+
+    def __init__(self, conn, esquema_datos, esquema_metas):
+        self.conn = conn
+        self._esquemas = {"Datos": esquema_datos, "Metas": esquema_metas}
+        self._tipadas = {}   # hoja -> (firma de la hoja cruda, DataFrame tipado)
+        self._con_version = set()   # hojas que ya tienen el encabezado "Versión"
+        self.rechazos = {}
+
+    def _ingerir(self, hoja, crudo):
+        # Si la hoja llegó idéntica a la lectura anterior se reutiliza el DataFrame ya tipado
+        firma = firma_dataframe(crudo)
+        previa = self._tipadas.get(hoja)
+        if previa is not None and previa[0] == firma:
+            return previa[1]
+        with tramo(f"ingesta.{hoja.lower()}"):
+            df, rechazos = self._esquemas[hoja].ingerir(crudo)
+        self._tipadas[hoja] = (firma, df)
+        self.rechazos = {**self.rechazos, hoja: rechazos}
+        return df
+
+    def _asegurar_version(self, hoja, crudo):
+        # Hojas creadas antes de la columna "Versión": se agrega el encabezado una vez, en su posición del
+        # esquema, para que las versiones que se escriben en esa columna se vuelvan a leer. Mientras tanto
+        # el esquema la llena con 0. Si esa celda ya tiene otro encabezado no se toca nada.
+        if hoja in self._con_version or crudo is None or crudo.empty:
+            return
+        if COLUMNA_VERSION not in crudo.columns:
+            posicion = self._esquemas[hoja].columnas.index(COLUMNA_VERSION)
+            if posicion < len(crudo.columns) and not str(crudo.columns[posicion]).startswith("Unnamed"):
+                return
+            try:
+                self._hoja(hoja).update_cell(1, posicion + 1, COLUMNA_VERSION)
+            except Exception:
+                return  # Sin permiso de escritura o sin red: se lee igual y se reintenta en la siguiente lectura
+        self._con_version.add(hoja)
+
+    def leer_hojas(self):
+        # Sin usecols: la hoja puede tener menos columnas que el esquema (p. ej. sin "Versión") y el
+        # parser rechaza índices fuera de rango. Las columnas se toman por nombre en el esquema.
+        # 1. Leer Datos Operativos
+        with tramo("sheets.leer_datos"):
+            crudo = self.conn.read(worksheet="Datos", ttl=0)
+        self._asegurar_version("Datos", crudo)
+        df_datos = self._ingerir("Datos", crudo)
+        # 2. Leer Metas
+        try:
+            with tramo("sheets.leer_metas"):
+                crudo = self.conn.read(worksheet="Metas", ttl=0)
+            self._asegurar_version("Metas", crudo)
+            df_metas = self._ingerir("Metas", crudo)
+        except Exception:
+            df_metas = self._esquemas["Metas"].vacio()
+        return df_datos, df_metas
+
+    def _fila_tipada(self, hoja, celdas):
+        esquema = self._esquemas[hoja]
+        celdas = list(celdas)[:len(esquema.columnas)]
+        crudo = pd.DataFrame([celdas + [None] * (len(esquema.columnas) - len(celdas))], columns=esquema.columnas)
+        return esquema.ingerir(crudo)[0].iloc[0].to_dict()
+
+    def _hoja(self, hoja):
+        # st-gsheets-connection no expone la hoja de gspread: se usa su método interno (versión fijada en
+        # requirements.txt). Si una actualización lo quita, se avisa claro en vez de un AttributeError suelto.
+        seleccionar = getattr(getattr(self.conn, "client", None), "_select_worksheet", None)
+        if seleccionar is None:
+            raise RuntimeError("Esta versión de st-gsheets-connection no expone conn.client._select_worksheet; "
+                               "instala la versión fijada en requirements.txt (st-gsheets-connection==0.1.0).")
+        return seleccionar(worksheet=hoja)
+
+    def leer_fila(self, hoja, fila):
+        with tramo("sheets.leer_fila"):
+            ws = self._hoja(hoja)
+            celdas = ws.row_values(fila + 2, value_render_option="UNFORMATTED_VALUE")
+        return self._fila_tipada(hoja, celdas) if celdas else None
+
+    def escribir_fila(self, hoja, fila, valores, nueva):
+        with tramo("sheets.escribir_fila"):
+            ws = self._hoja(hoja)
+            if nueva:
+                ws.append_row(valores, value_input_option="USER_ENTERED")
+            else:
+                # +2: la fila 1 es el encabezado y las filas de Sheets empiezan en 1
+                ws.update(range_name=f"A{fila + 2}", values=[valores], value_input_option="USER_ENTERED")
+
+    def escribir_lote(self, hoja, cambios):
+        # Una sola llamada para todas las filas existentes y otra para todas las nuevas
+        actualizaciones = [{"range": f"A{fila + 2}", "values": [valores]} for fila, valores, nueva in cambios if not nueva]
+        nuevas = [valores for _, valores, nueva in cambios if nueva]
+        with tramo("sheets.escribir_lote"):
+            ws = self._hoja(hoja)
+            if actualizaciones:
+                ws.batch_update(actualizaciones, value_input_option="USER_ENTERED")
+            if nuevas:
+                ws.append_rows(nuevas, value_input_option="USER_ENTERED")
+
+
+class BackendMemoria(BackendAlmacenamiento):
+    nombre = "memoria"
+
+    def __init__(self, esquema_datos, esquema_metas, df_datos=None, df_metas=None):
+        self._lock = threading.Lock()
+        self._esquemas = {"Datos": esquema_datos, "Metas": esquema_metas}
+        self._hojas = {
+            "Datos": df_datos.copy() if df_datos is not None else pd.DataFrame(columns=esquema_datos.columnas),
+            "Metas": df_metas.copy() if df_metas is not None else pd.DataFrame(columns=esquema_metas.columnas),
+        }
+        self._tipadas = {}   # hoja -> DataFrame tipado; se rehace solo después de escribir en esa hoja
+        self.rechazos = {}
+
+    def leer_hojas(self):
+        with self._lock:
+            for hoja, esquema in self._esquemas.items():
+                if hoja not in self._tipadas:
+                    self._tipadas[hoja], rechazos = esquema.ingerir(self._hojas[hoja])
+                    self.rechazos = {**self.rechazos, hoja: rechazos}
+            return self._tipadas["Datos"], self._tipadas["Metas"]
+
+    def leer_fila(self, hoja, fila):
+        with self._lock:
+            df = self._hojas[hoja]
+            if fila >= len(df):
+                return None
+            return self._esquemas[hoja].ingerir(df.iloc[[fila]])[0].iloc[0].to_dict()
+
+    def escribir_fila(self, hoja, fila, valores, nueva):
+        with self._lock:
+            self._tipadas.pop(hoja, None)
+            df = self._hojas[hoja]
+            nueva_fila = pd.DataFrame([valores], columns=df.columns)
+            if nueva or fila >= len(df):
+                self._hojas[hoja] = nueva_fila if df.empty else pd.concat([df, nueva_fila], ignore_index=True)
+            else:
+                df = df.astype(object)
+                df.iloc[fila] = valores
+                self._hojas[hoja] = df.infer_objects()
+
+    def escribir_lote(self, hoja, cambios):
+        with self._lock:
+            self._tipadas.pop(hoja, None)
+            df = self._hojas[hoja].astype(object)
+            existentes = [(fila, valores) for fila, valores, nueva in cambios if not nueva and fila < len(df)]
+            nuevas = [valores for fila, valores, nueva in cambios if nueva or fila >= len(df)]
+            if existentes:
+                filas, valores = zip(*existentes)
+                df.iloc[list(filas)] = list(valores)
+            if nuevas:
+                nuevas = pd.DataFrame(nuevas, columns=df.columns)
+                df = nuevas if df.empty else pd.concat([df, nuevas], ignore_index=True)
+            self._hojas[hoja] = df.infer_objects()
+
+
+class BackendSQL(BackendAlmacenamiento):
+    lee_hojas_completas = False
+
+    def __init__(self, ruta, tipos_datos, tipos_metas, meses, motor="sqlite"):
+        # tipos_*: {columna: "INTEGER" | "REAL" | "TEXT"} en el orden de la hoja
+        if motor == "duckdb":
+            try:
+                import duckdb  # Opcional (y lento de importar): solo se carga con backend = "duckdb"
+            except ImportError:
+                raise ImportError("El backend 'duckdb' requiere el paquete duckdb (pip install duckdb).") from None
+        self.nombre = motor
+        self.ruta = ruta
+        self.tipos_datos = dict(tipos_datos)
+        self.tipos_metas = dict(tipos_metas)
+        self.columnas_datos = list(self.tipos_datos)
+        self.columnas_metas = list(self.tipos_metas)
+        self.meses = list(meses)
+        self._lock = threading.Lock()
+        self._duck = duckdb.connect(ruta) if motor == "duckdb" else None
+        with self._transaccion() as cur:
+            cur.execute(f'CREATE TABLE IF NOT EXISTS datos ({self._definicion(self.tipos_datos)}, UNIQUE ("Año", "Mes"))')
+            cur.execute(f'CREATE TABLE IF NOT EXISTS metas ({self._definicion(self.tipos_metas)}, UNIQUE ("Año"))')
+            for tabla, tipos in (("datos", self.tipos_datos), ("metas", self.tipos_metas)):
+                # Tablas de una versión anterior (p. ej. sin "Versión"): se agregan las columnas que falten
+                cur.execute(f"SELECT * FROM {tabla} LIMIT 0")
+                existentes = {d[0] for d in cur.description}
+                for c, t in tipos.items():
+                    if c not in existentes:
+                        defecto = "''" if t == "TEXT" else "0"
+                        cur.execute(f'ALTER TABLE {tabla} ADD COLUMN "{c}" {t} DEFAULT {defecto}')
+            for tabla, llave in (("datos", '"Año", "Mes"'), ("metas", '"Año"')):
+                # Tablas sin llave única (versión anterior): se conserva la primera fila de cada periodo, igual
+                # que el índice en memoria, y el índice único hace O(log n) las búsquedas y el upsert por llave
+                cur.execute(f"DELETE FROM {tabla} WHERE rowid NOT IN (SELECT MIN(rowid) FROM {tabla} GROUP BY {llave})")
+                cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {tabla}_llave ON {tabla} ({llave})")
+            cur.execute("CREATE TABLE IF NOT EXISTS meses (nombre TEXT, idx INTEGER)")
+            cur.execute("CREATE TABLE IF NOT EXISTS version_datos (id INTEGER PRIMARY KEY, valor INTEGER)")
+            cur.execute("DELETE FROM meses")
+            cur.executemany("INSERT INTO meses VALUES (?, ?)", [(m, i) for i, m in enumerate(self.meses)])
+            if not cur.execute("SELECT valor FROM version_datos WHERE id = 1").fetchall():
+                cur.execute("INSERT INTO version_datos VALUES (1, 1)")
+
+    @staticmethod
+    def _definicion(tipos):
+        return ", ".join(f'"{c}" {t}' for c, t in tipos.items())
+
+    @contextmanager
+    def _cursor(self):
+        if self._duck is not None:
+            cur = self._duck.cursor()
+        else:
+            con = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+            cur = con.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+            if self._duck is None:
+                con.close()
+
+    @contextmanager
+    def _transaccion(self):
+        with self._lock, self._cursor() as cur:
+            cur.execute("BEGIN TRANSACTION")
+            try:
+                yield cur
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+
+    def consultar(self, sql, params=()):
+        with tramo(f"{self.nombre}.consulta"), self._cursor() as cur:
+            cur.execute(sql, list(params))
+            columnas = [d[0] for d in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=columnas)
+
+    def version(self):
+        return int(self.consultar("SELECT valor FROM version_datos WHERE id = 1").iloc[0, 0])
+
+    # --- LECTURA / ESCRITURA COMPLETA ---
+    def leer_hojas(self):
+        return (self.consultar(f"SELECT {self._lista(self.columnas_datos)} FROM datos"),
+                self.consultar(f"SELECT {self._lista(self.columnas_metas)} FROM metas"))
+
+    @staticmethod
+    def _lista(columnas):
+        return ", ".join(f'"{c}"' for c in columnas)
+
+    def reemplazar_todo(self, df_datos, df_metas):
+        """Carga inicial / migración: reemplaza ambas tablas."""
+        with self._transaccion() as cur:
+            cur.execute("DELETE FROM datos")
+            cur.execute("DELETE FROM metas")
+            # Un periodo repetido en la hoja: se queda la primera fila (como en el índice en memoria)
+            if not df_datos.empty:
+                cur.executemany(f"INSERT INTO datos ({self._lista(self.columnas_datos)}) VALUES ({', '.join('?' * len(self.columnas_datos))}) ON CONFLICT DO NOTHING",
+                                self._filas(df_datos, self.columnas_datos))
+            if not df_metas.empty:
+                cur.executemany(f"INSERT INTO metas ({self._lista(self.columnas_metas)}) VALUES ({', '.join('?' * len(self.columnas_metas))}) ON CONFLICT DO NOTHING",
+                                self._filas(df_metas, self.columnas_metas))
+            cur.execute("UPDATE version_datos SET valor = valor + 1 WHERE id = 1")
+
+    @staticmethod
+    def _filas(df, columnas):
+        return [[v.item() if hasattr(v, "item") else v for v in fila] for fila in df[columnas].itertuples(index=False)]
+
+    def escribir_fila(self, hoja, fila, valores, nueva):
+        # En SQL la posición no importa: se reemplaza por llave.
+        columnas = self.columnas_datos if hoja == "Datos" else self.columnas_metas
+        self.upsert(hoja, dict(zip(columnas, valores)))
+
+    def escribir_lote(self, hoja, cambios):
+        columnas = self.columnas_datos if hoja == "Datos" else self.columnas_metas
+        self.upsert_lote(hoja, [dict(zip(columnas, valores)) for _, valores, _ in cambios])
+
+    def upsert(self, hoja, registro):
+        self.upsert_lote(hoja, [registro])
+
+    def _tabla(self, hoja):
+        return (("datos", self.columnas_datos, ["Año", "Mes"]) if hoja == "Datos"
+                else ("metas", self.columnas_metas, ["Año"]))
+
+    def upsert_lote(self, hoja, registros):
+        """Reemplaza por llave todos los registros en una sola transacción (una sola versión nueva)."""
+        tabla, columnas, llave = self._tabla(hoja)
+        filas = [[v.item() if hasattr(v, "item") else v for v in (r.get(c) for c in columnas)] for r in registros]
+        with self._transaccion() as cur:
+            self._reemplazar(cur, tabla, columnas, llave, filas)
+
+    def upsert_si_version(self, hoja, registro, version):
+        """Compare-and-set: reemplaza la fila solo si su "Versión" sigue siendo `version` (None = la fila aún no existe)."""
+        return self.upsert_lote_si_version(hoja, [registro], [version])
+
+    def upsert_lote_si_version(self, hoja, registros, versiones):
+        """Compare-and-set de varias filas en una sola transacción: se escriben todas solo si ninguna cambió de versión."""
+        tabla, columnas, llave = self._tabla(hoja)
+        filas = [[v.item() if hasattr(v, "item") else v for v in (r.get(c) for c in columnas)] for r in registros]
+        consulta = f'SELECT "{COLUMNA_VERSION}" FROM {tabla} WHERE ' + " AND ".join(f'"{c}" = ?' for c in llave) + " LIMIT 1"
+        with self._transaccion() as cur:
+            for fila, version in zip(filas, versiones):
+                actual = cur.execute(consulta, [fila[columnas.index(c)] for c in llave]).fetchall()
+                if (int(actual[0][0] or 0) if actual else None) != version:
+                    return False
+            if filas:
+                self._reemplazar(cur, tabla, columnas, llave, filas)
+        return True
+
+    @classmethod
+    def _reemplazar(cls, cur, tabla, columnas, llave, filas):
+        # Upsert sobre la llave única (Año, Mes) / (Año): una sola sentencia por fila, sin borrar e insertar
+        resto = ", ".join(f'"{c}" = excluded."{c}"' for c in columnas if c not in llave)
+        cur.executemany(f"INSERT INTO {tabla} ({cls._lista(columnas)}) VALUES ({', '.join('?' * len(columnas))}) "
+                        f"ON CONFLICT ({cls._lista(llave)}) DO UPDATE SET {resto}", filas)
+        cur.execute("UPDATE version_datos SET valor = valor + 1 WHERE id = 1")
+
+
+# ==========================================
+# 🔎 CONSULTAS DENTRO DEL MOTOR SQL
+# ==========================================
+class _CuboSQL:
+    """Misma interfaz que CuboAgregados, resuelta con una consulta por año (con ventana para el acumulado)."""
+
+    def __init__(self, almacen):
+        self._almacen = almacen
+
+    def meses_con_datos(self, anio):
+        return self._almacen._serie_anio(anio)["Mes"].tolist()
+
+    def mensual(self, anio, columna, solo_presentes=True):
+        return self._completar(anio, self._almacen._serie_anio(anio)[columna], solo_presentes)
+
+    def acumulado(self, anio, columna, solo_presentes=True):
+        return self._completar(anio, self._almacen._serie_anio(anio)["acum_" + columna], solo_presentes)
+
+    def totales(self, anio):
+        return self._almacen.totales(anio)
+
+    def totales_por_anio(self, columnas):
+        sumas = ", ".join(f'COALESCE(SUM(d."{c}"), 0) AS "{c}"' for c in columnas)
+        df = self._almacen.backend.consultar(
+            f'SELECT d."Año", {sumas} FROM datos d JOIN meses m ON d."Mes" = m.nombre GROUP BY d."Año" ORDER BY d."Año"')
+        return [int(a) for a in df["Año"]], df[list(columnas)].to_numpy(dtype=float).reshape(len(df), len(columnas))
+
+    def _completar(self, anio, serie, solo_presentes):
+        if solo_presentes:
+            return serie.to_numpy(dtype=float)
+        completa = pd.Series(serie.to_numpy(dtype=float), index=self._almacen._serie_anio(anio)["Mes"])
+        completa = completa.reindex(self._almacen.backend.meses)
+        return completa.ffill().fillna(0).to_numpy() if serie.name.startswith("acum_") else completa.fillna(0).to_numpy()
+
+
+class AlmacenConsultas:
+    """Interfaz de AlmacenRegistros sobre un BackendSQL: cada lectura es una consulta al motor."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.columnas_datos = backend.columnas_datos
+        self.columnas_metas = backend.columnas_metas
+        self.numericas = [c for c in self.columnas_datos if c not in ("Año", "Mes", COLUMNA_VERSION)]
+        self.cubo = _CuboSQL(self)
+        self._lock = threading.Lock()
+        self._version = None
+        self._series = {}   # año -> DataFrame mensual con acumulados (vigente para self._version)
+
+    @property
+    def version(self):
+        return self.backend.version()
+
+    def _vigente(self):
+        version = self.backend.version()
+        if version != self._version:
+            self._series = {}
+            self._version = version
+
+    # --- CONSULTAS ---
+    def mes(self, anio, mes):
+        df = self.backend.consultar('SELECT * FROM datos WHERE "Año" = ? AND "Mes" = ? LIMIT 1', (int(anio), str(mes)))
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    def meses_del_anio(self, anio):
+        df = self._serie_anio(anio)
+        return {r["Mes"]: r for r in df[self.columnas_datos].to_dict("records")}
+
+    def metas(self, anio):
+        df = self.backend.consultar('SELECT * FROM metas WHERE "Año" = ? LIMIT 1', (int(anio),))
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    def totales(self, anio):
+        sumas = ", ".join(f'COALESCE(SUM(d."{c}"), 0) AS "{c}"' for c in self.numericas)
+        df = self.backend.consultar(f'SELECT {sumas} FROM datos d JOIN meses m ON d."Mes" = m.nombre WHERE d."Año" = ?', (int(anio),))
+        return {c: float(df.iloc[0][c]) for c in self.numericas}
+
+    def _serie_anio(self, anio):
+        with self._lock:
+            self._vigente()
+            anio = int(anio)
+            if anio not in self._series:
+                acumulados = ", ".join(f'SUM(d."{c}") OVER (ORDER BY m.idx) AS "acum_{c}"' for c in self.numericas)
+                self._series[anio] = self.backend.consultar(
+                    f'SELECT d.*, {acumulados} FROM datos d JOIN meses m ON d."Mes" = m.nombre WHERE d."Año" = ? ORDER BY m.idx', (anio,))
+            return self._series[anio]
+
+    def anio_df(self, anio):
+        return self._serie_anio(anio)[self.columnas_datos]
+
+    def fila(self, anio, mes):
+        return None
+
+    def fila_metas(self, anio):
+        return None
+
+    # --- ESCRITURA DIRECTA AL MOTOR ---
+    def upsert_mes(self, registro):
+        self.backend.upsert("Datos", registro)
+        return dict(registro)
+
+    def upsert_metas(self, registro):
+        self.backend.upsert("Metas", registro)
+        return dict(registro)
+
+    def upsert_lote(self, registros):
+        self.backend.upsert_lote("Datos", registros)
+
+    def anios(self):
+        return [int(a) for a in self.backend.consultar('SELECT DISTINCT "Año" FROM datos ORDER BY "Año"')["Año"]]
+
+    def datos_df(self):
+        return self.backend.leer_hojas()[0]
+
+    def metas_df(self):
+        return self.backend.leer_hojas()[1]
@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from streamlit.connections import BaseConnection
+
+# ==========================================
+# 🧪 CONEXIÓN FALSA A GOOGLE SHEETS + DATOS SINTÉTICOS
+# ==========================================
+# Sustituye a GSheetsConnection en los benchmarks: las hojas viven en memoria
+# y la lectura de una fila (row_values) y las escrituras por fila o por lote
+# (append_row(s) / update / batch_update) se aplican sobre ellas, igual que
+# BackendGSheets las envía a la hoja real. Con `ConexionFalsa.caida = True`
+# toda lectura falla, para medir el modo sin conexión.
+
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+# Mismo orden que las hojas reales (ver REGISTRO_KPIS en config.py)
+COLUMNAS_DATOS = ['Año', 'Mes', 'm_ventas', 'm_clientes', 'm_ventas_nuevos', 'm_contenido', 'd_monto_det', 'd_crono_dev', 'd_sat', 'd_seg', 'd_eval', 'd_obra', 'h_ventas', 'h_citas', 'h_mail', 'h_fb', 'h_art', 'Versión']
+COLUMNAS_METAS = ['Año', 'meta_mario', 'meta_david', 'meta_hellen', 'premio_mario', 'bono_david', 'bono_hellen', 'Versión']
+COLUMNAS_DINERO = ['m_ventas', 'm_ventas_nuevos', 'd_monto_det', 'h_ventas']
+COLUMNAS_PORCENTAJE = ['d_crono_dev', 'd_sat', 'd_eval']
+
+HOJAS = {}
+_lock = threading.Lock()
+
+
+def datos_sinteticos(filas, anio_final=2026, semilla=0):
+    """Hoja "Datos" con `filas` meses consecutivos que terminan en diciembre de anio_final, y sus metas.
+
+    Con más años de los que caben antes de anio_final, la serie empieza en el año 1 y sigue después de anio_final.
+    """
+    rng = np.random.default_rng(semilla)
+    n_anios = -(-filas // 12)
+    primero = max(1, anio_final - n_anios + 1)
+    anios = np.repeat(np.arange(primero, primero + n_anios), 12)[-filas:]
+    meses = np.tile(MESES, n_anios)[-filas:]
+    df = pd.DataFrame({'Año': anios, 'Mes': meses})
+    for col in COLUMNAS_DATOS[2:-1]:
+        if col in COLUMNAS_DINERO:
+            df[col] = rng.uniform(0, 1_500_000, filas).round(2)
+        elif col in COLUMNAS_PORCENTAJE:
+            df[col] = rng.uniform(0, 10 if col != 'd_eval' else 100, filas).round(1)
+        else:
+            df[col] = rng.integers(0, 8, filas)
+    df['Versión'] = 1
+    unicos = np.unique(anios)
+    metas = pd.DataFrame({
+        'Año': unicos, 'meta_mario': 10623610.66, 'meta_david': 1000000.0, 'meta_hellen': 1000000.0,
+        'premio_mario': 'Viaje Los Cabos', 'bono_david': 15000.0, 'bono_hellen': 25000.0, 'Versión': 1,
+    })
+    return df, metas
+
+
+def sembrar(filas, anio_final=2026, semilla=0):
+    df_datos, df_metas = datos_sinteticos(filas, anio_final, semilla)
+    with _lock:
+        HOJAS['Datos'] = df_datos
+        HOJAS['Metas'] = df_metas
+    ConexionFalsa.lecturas = 0
+    ConexionFalsa.escrituras = 0
+
+
+class _HojaFalsa:
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def row_values(self, fila, **kwargs):
+        with _lock:
+            df = HOJAS[self.nombre]
+            if fila - 2 >= len(df):
+                return []
+            return [None if pd.isna(v) else v for v in df.iloc[fila - 2].tolist()]
+
+    def append_row(self, valores, **kwargs):
+        with _lock:
+            df = HOJAS[self.nombre]
+            HOJAS[self.nombre] = pd.concat([df, pd.DataFrame([valores], columns=df.columns)], ignore_index=True)
+        ConexionFalsa.escrituras += 1
+
+    def append_rows(self, valores, **kwargs):
+        with _lock:
+            df = HOJAS[self.nombre]
+            HOJAS[self.nombre] = pd.concat([df, pd.DataFrame(valores, columns=df.columns)], ignore_index=True)
+        ConexionFalsa.escrituras += 1
+
+    def update(self, range_name=None, values=None, **kwargs):
+        fila = int(range_name[1:]) - 2  # "A{fila + 2}", igual que BackendGSheets
+        with _lock:
+            HOJAS[self.nombre].iloc[fila] = values[0]
+        ConexionFalsa.escrituras += 1
+
+    def update_cell(self, fila, columna, valor):
+        # Solo encabezados (fila 1): renombra o agrega la columna
+        with _lock:
+            df = HOJAS[self.nombre]
+            if columna > len(df.columns):
+                df[valor] = np.nan
+            else:
+                HOJAS[self.nombre] = df.rename(columns={df.columns[columna - 1]: valor})
+        ConexionFalsa.escrituras += 1
+
+    def batch_update(self, datos, **kwargs):
+        with _lock:
+            df = HOJAS[self.nombre]
+            for d in datos:
+                df.iloc[int(d["range"][1:]) - 2] = d["values"][0]
+        ConexionFalsa.escrituras += 1
+
+
+class _ClienteFalso:
+    def _select_worksheet(self, worksheet=None, **kwargs):
+        return _HojaFalsa(worksheet)
+
+
+class ConexionFalsa(BaseConnection):
+    caida = False
+    lecturas = 0
+    escrituras = 0
+
+    def _connect(self, **kwargs):
+        if ConexionFalsa.caida:
+            raise ConnectionError("Google Sheets no disponible (simulado)")
+        return _ClienteFalso()
+
+    @property
+    def client(self):
+        return self._instance
+
+    def read(self, worksheet=None, usecols=None, ttl=None, **kwargs):
+        if ConexionFalsa.caida:
+            raise ConnectionError("Google Sheets no disponible (simulado)")
+        with _lock:
+            df = HOJAS.get(worksheet, pd.DataFrame()).copy()
+        if usecols is not None:
+            # Igual que el TextParser de pandas que usa gspread_dataframe
+            if max(usecols, default=-1) >= len(df.columns):
+                raise pd.errors.ParserError("Defining usecols with out-of-bounds indices is not allowed.")
+            df = df.iloc[:, list(usecols)]
+        ConexionFalsa.lecturas += 1
+        return df
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        with _lock:
+            HOJAS[worksheet] = data.copy()
+        ConexionFalsa.escrituras += 1
@@ -0,0 +1,222 @@
+"""Benchmark de reruns de app.py con AppTest y una conexión falsa a Google Sheets.
+
+Mide, para cada tamaño de la hoja "Datos", la latencia de rerun (p50 / p90 / p99 / máx)
+y la memoria pico (tracemalloc) de:
+- el arranque en frío (lectura de las hojas + índice),
+- cada panel de OPCIONES_MENU,
+- los dos formularios del ADMIN (captura mensual y metas),
+- los paneles en modo sin conexión (respaldo local).
+
+Uso (desde la raíz del repo):
+    python benchmarks/rerun_app.py
+    python benchmarks/rerun_app.py --filas 12 1200 36000 --repeticiones 30 --json resultados.json
+    python benchmarks/rerun_app.py --comparar base.json --tolerancia 0.25   # sale con 1 si algo empeora
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import streamlit as st
+import streamlit_gsheets
+from streamlit.testing.v1 import AppTest
+
+import gsheets_falso
+from gsheets_falso import ConexionFalsa
+
+APP = os.path.join(RAIZ, "app.py")
+ETIQUETA_PANEL = "Panel de Control:"
+ADMIN = "🔐 ADMIN (Config & Captura)"
+BOTON_CAPTURA = "💾 GUARDAR REGISTROS MENSUALES"
+BOTON_METAS = "🎯 GUARDAR METAS Y PREMIOS"
+PESTANA_ADMIN = "pestana_admin"  # key de st.tabs en paginas/admin.py (solo se ejecuta la pestaña abierta)
+PESTANA_METAS = "🎯 Configurar Metas y Premios"
+FILAS_POR_DEFECTO = [12, 120, 1200, 12000, 36000]
+
+
+# ==========================================
+# 🔧 AUXILIARES DE APPTEST
+# ==========================================
+def nueva_sesion(timeout):
+    # Como un arranque en frío del proceso: sin cachés compartidas de una medición anterior
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    revisar(at, "arranque")
+    return at
+
+
+def revisar(at, escenario):
+    if at.exception:
+        raise RuntimeError(f"{escenario}: la app lanzó una excepción: {at.exception[0].message}")
+
+
+def selector_panel(at):
+    return next(s for s in at.sidebar.selectbox if s.label == ETIQUETA_PANEL)
+
+
+def boton(at, etiqueta):
+    return next(b for b in at.button if b.label == etiqueta)
+
+
+def medir(accion, repeticiones):
+    """Latencias (ms) de `repeticiones` llamadas a accion() y la memoria pico (MB) de una llamada extra."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        accion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    # La memoria se mide aparte: tracemalloc hace más lento cada rerun y distorsionaría la latencia
+    tracemalloc.start()
+    try:
+        accion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    tiempos = np.array(tiempos)
+    return {
+        "p50_ms": float(np.percentile(tiempos, 50)), "p90_ms": float(np.percentile(tiempos, 90)),
+        "p99_ms": float(np.percentile(tiempos, 99)), "max_ms": float(tiempos.max()),
+        "memoria_pico_mb": pico / 2**20,
+    }
+
+
+# ==========================================
+# 🎬 ESCENARIOS
+# ==========================================
+def escenarios_en_linea(filas, repeticiones, timeout):
+    # Arranque en frío: lectura completa de las hojas + construcción del índice y del cubo
+    resultados = {"arranque en frío": medir(lambda: nueva_sesion(timeout), repeticiones)}
+    at = nueva_sesion(timeout)
+    opciones = selector_panel(at).options
+    for panel in opciones:
+        selector_panel(at).set_value(panel)
+        at.run()  # primer render del panel: no se cuenta
+        revisar(at, panel)
+        resultados[panel] = medir(lambda: (at.run(), revisar(at, panel)), repeticiones)
+
+    selector_panel(at).set_value(ADMIN)
+    at.run()
+    contador = iter(range(10**9))
+
+    def enviar_captura():
+        # Cada envío cambia el valor para que no sea un guardado idéntico
+        next(c for c in at.number_input if c.label.startswith("Facturación Mensual")).set_value(float(next(contador)))
+        boton(at, BOTON_CAPTURA).click()
+        at.run()
+        revisar(at, "captura")
+
+    def enviar_metas():
+        next(c for c in at.number_input if c.label.startswith("Meta Anual")).set_value(1_000_000.0 + next(contador))
+        # AppTest no conserva la pestaña elegida entre reruns: se vuelve a indicar en cada envío
+        at.session_state[PESTANA_ADMIN] = PESTANA_METAS
+        boton(at, BOTON_METAS).click()
+        at.run()
+        revisar(at, "metas")
+
+    resultados["ADMIN · guardar captura"] = medir(enviar_captura, repeticiones)
+    at.session_state[PESTANA_ADMIN] = PESTANA_METAS
+    at.run()
+    resultados["ADMIN · guardar metas"] = medir(enviar_metas, repeticiones)
+    return resultados, opciones
+
+
+def escenarios_sin_conexion(opciones, repeticiones, timeout):
+    # El espejo local ya quedó escrito en la parte en línea; aquí el proceso "reinicia" sin red
+    ConexionFalsa.caida = True
+    try:
+        at = nueva_sesion(timeout)
+        if not at.sidebar.error:
+            raise RuntimeError("sin conexión: la app no entró al modo de respaldo local")
+        resultados = {}
+        for panel in opciones:
+            selector_panel(at).set_value(panel)
+            at.run()
+            revisar(at, panel)
+            resultados[f"sin conexión · {panel}"] = medir(lambda: (at.run(), revisar(at, panel)), repeticiones)
+        return resultados
+    finally:
+        ConexionFalsa.caida = False
+
+
+def correr(filas_lista, repeticiones, timeout):
+    streamlit_gsheets.GSheetsConnection = ConexionFalsa  # estado.py lo importa al crear el backend
+    resultados = {}
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_codesa_") as carpeta:
+        # El respaldo local (SQLite) se crea en el directorio de trabajo: se aísla en una carpeta temporal
+        os.chdir(carpeta)
+        try:
+            for filas in filas_lista:
+                if os.path.exists("respaldo_codesa.sqlite3"):
+                    os.remove("respaldo_codesa.sqlite3")
+                gsheets_falso.sembrar(filas)
+                print(f"· {filas} filas...", file=sys.stderr, flush=True)
+                en_linea, opciones = escenarios_en_linea(filas, repeticiones, timeout)
+                resultados[str(filas)] = {**en_linea, **escenarios_sin_conexion(opciones, repeticiones, timeout)}
+        finally:
+            os.chdir(directorio_original)
+    return resultados
+
+
+# ==========================================
+# 📄 REPORTE Y COMPARACIÓN
+# ==========================================
+def imprimir(resultados):
+    for filas, escenarios in resultados.items():
+        print(f"\n=== Hoja 'Datos' con {filas} filas ===")
+        print(f"{'escenario':<48}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'máx ms':>10}{'pico MB':>10}")
+        for nombre, r in escenarios.items():
+            print(f"{nombre:<48}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}{r['memoria_pico_mb']:>10.2f}")
+
+
+def regresiones(resultados, base, tolerancia):
+    """Escenarios cuyo p50 o memoria pico empeoró más que `tolerancia` (fracción) contra la base."""
+    encontradas = []
+    for filas, escenarios in resultados.items():
+        for nombre, r in escenarios.items():
+            previo = base.get(filas, {}).get(nombre)
+            if previo is None:
+                continue
+            for metrica in ("p50_ms", "memoria_pico_mb"):
+                if previo[metrica] > 0 and r[metrica] > previo[metrica] * (1 + tolerancia):
+                    encontradas.append(f"{filas} filas · {nombre} · {metrica}: {previo[metrica]:.2f} -> {r[metrica]:.2f}")
+    return encontradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reruns de app.py")
+    parser.add_argument("--filas", type=int, nargs="+", default=FILAS_POR_DEFECTO, help="Tamaños de la hoja Datos")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Reruns medidos por escenario")
+    parser.add_argument("--timeout", type=float, default=120, help="Segundos máximos por rerun")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="Resultados base (JSON) contra los que buscar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento permitido contra la base (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultados = correr(args.filas, args.repeticiones, args.timeout)
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            encontradas = regresiones(resultados, json.load(f), args.tolerancia)
+        if encontradas:
+            print("\n❌ Regresiones de rendimiento:\n  " + "\n  ".join(encontradas))
+            sys.exit(1)
+        print("\n✅ Sin regresiones contra la base.")
+
+
+if __name__ == "__main__":
+    main()
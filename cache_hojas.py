@@ -0,0 +1,166 @@
+import hashlib
+import threading
+import time
+
+import pandas as pd
+
+# ==========================================
+# 🗄️ CACHÉ COMPARTIDA DE HOJAS (DATOS + METAS)
+# ==========================================
+# Un solo objeto por proceso (se crea con st.cache_resource en estado.py) que
+# guarda la última lectura de ambas hojas para TODAS las sesiones abiertas.
+# - Ventana de frescura configurable (ttl_segundos).
+# - Hilo de fondo que refresca antes de que la lectura caduque.
+# - "Single-flight": si varias sesiones piden refrescar a la vez, solo una
+#   consulta Google Sheets y las demás esperan ese mismo resultado.
+# - Los guardados del ADMIN se aplican en sitio (registrar_edicion) sin releer;
+#   invalidación explícita solo cuando la hoja quedó distinta a la copia local.
+
+
+def firma_dataframe(df):
+    """Huella estable del contenido de un DataFrame (para saber si cambió)."""
+    if df is None or df.empty:
+        return "vacio"
+    try:
+        valores = pd.util.hash_pandas_object(df, index=False).values
+    except TypeError:  # Celdas con tipos no hasheables (listas, etc.)
+        valores = pd.util.hash_pandas_object(df.astype(str), index=False).values
+    columnas = "|".join(map(str, df.columns)).encode()
+    return hashlib.sha1(columnas + valores.tobytes()).hexdigest()
+
+
+class InstantaneaHojas:
+    """Lectura inmutable de ambas hojas con su número de versión."""
+
+    def __init__(self, df_datos, df_metas, version, firma, leido_en):
+        self.df_datos = df_datos
+        self.df_metas = df_metas
+        self.version = version
+        self.firma = firma
+        self.leido_en = leido_en
+        self._derivados = {}
+        self._lock = threading.Lock()
+
+    def edad(self):
+        return time.monotonic() - self.leido_en
+
+    def derivado(self, nombre, constructor):
+        """Estructura calculada una sola vez por versión (índices, agregados, etc.)."""
+        with self._lock:
+            if nombre not in self._derivados:
+                self._derivados[nombre] = constructor(self)
+            return self._derivados[nombre]
+
+
+class CacheHojas:
+    def __init__(self, lector, ttl_segundos=60, intervalo_refresco=0, al_publicar=None):
+        # lector() -> (df_datos, df_metas) ya limpios; lanza excepción si no hay conexión.
+        # al_publicar(instantanea) se llama una vez por cada versión nueva (p. ej. para el respaldo local).
+        self._lector = lector
+        self._al_publicar = al_publicar
+        self.ttl_segundos = ttl_segundos
+        self.intervalo_refresco = intervalo_refresco
+        self._lock = threading.Lock()
+        self._en_vuelo = None
+        self._instantanea = None
+        self._invalidada = False
+        self._ultimo_error = None
+        self._hilo = None
+        self._ultima_version = 0
+        self.lecturas = 0
+
+    # --- LECTURA ---
+    def obtener(self):
+        """Devuelve la instantánea vigente; solo lee Sheets si caducó o fue invalidada."""
+        self._iniciar_refresco_fondo()
+        inst = self._instantanea
+        if inst is not None and not self._invalidada and inst.edad() < self.ttl_segundos:
+            return inst
+        return self.refrescar()
+
+    def refrescar(self):
+        """Lee ambas hojas una sola vez aunque lo pidan muchas sesiones al mismo tiempo."""
+        with self._lock:
+            evento = self._en_vuelo
+            lider = evento is None
+            if lider:
+                evento = self._en_vuelo = threading.Event()
+
+        if not lider:
+            evento.wait()
+            if self._ultimo_error is not None:
+                raise self._ultimo_error
+            return self._instantanea
+
+        try:
+            self._invalidada = False
+            df_datos, df_metas = self._lector()
+            self.lecturas += 1
+            self._publicar(df_datos, df_metas)
+            self._ultimo_error = None
+            return self._instantanea
+        except Exception as e:
+            self._ultimo_error = e
+            raise
+        finally:
+            with self._lock:
+                self._en_vuelo = None
+            evento.set()
+
+    def _publicar(self, df_datos, df_metas):
+        anterior = self._instantanea
+        if (anterior is not None and anterior.firma is not None
+                and anterior.df_datos is df_datos and anterior.df_metas is df_metas):
+            firma = anterior.firma  # El lector devolvió los mismos DataFrames ya tipados: nada que volver a firmar
+        else:
+            firma = firma_dataframe(df_datos) + ":" + firma_dataframe(df_metas)
+        if anterior is not None and anterior.firma == firma:
+            # Mismo contenido: se conserva la MISMA instantánea (versión, índice, cubo y todo lo derivado
+            # de ella); solo se renueva la hora de lectura para el TTL.
+            anterior.leido_en = time.monotonic()
+            return
+        self._ultima_version += 1
+        self._instantanea = InstantaneaHojas(df_datos, df_metas, self._ultima_version, firma, time.monotonic())
+        if self._al_publicar is not None:
+            try:
+                self._al_publicar(self._instantanea)
+            except Exception:
+                pass
+
+    # --- INVALIDACIÓN ---
+    def invalidar(self):
+        """Marca la lectura como vencida; la siguiente sesión que lea refresca (una sola vez)."""
+        self._invalidada = True
+
+    def registrar_edicion(self):
+        """La instantánea vigente se editó en sitio (upsert local): nueva versión sin releer Sheets."""
+        with self._lock:
+            if self._instantanea is not None:
+                self._ultima_version += 1
+                self._instantanea.version = self._ultima_version
+                # Ya no coincide con ninguna lectura de Sheets: la próxima relectura publica versión nueva
+                # (si no, una hoja aún sin el cambio "igualaría" la firma previa y se quedaría el dato local).
+                self._instantanea.firma = None
+
+    @property
+    def version(self):
+        return self._instantanea.version if self._instantanea is not None else 0
+
+    # --- REFRESCO EN SEGUNDO PLANO ---
+    def _iniciar_refresco_fondo(self):
+        if self.intervalo_refresco <= 0 or self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._bucle_refresco, name="refresco-hojas", daemon=True)
+            self._hilo.start()
+
+    def _bucle_refresco(self):
+        while True:
+            time.sleep(self.intervalo_refresco)
+            try:
+                self.refrescar()
+            except Exception:
+                # Sin conexión: se reintenta en el siguiente ciclo; las sesiones usan su respaldo.
+                pass
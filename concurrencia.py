@@ -0,0 +1,97 @@
+import math
+
+from almacen import llave_anio, llave_mes
+from esquema import COLUMNA_VERSION
+
+# ==========================================
+# 🔀 CONCURRENCIA OPTIMISTA POR FILA (VERSIÓN + FUSIÓN DE 3 VÍAS)
+# ==========================================
+# Cada fila de "Datos" (Año, Mes) y de "Metas" (Año) lleva en la columna "Versión" cuántas
+# veces se ha guardado. El formulario recuerda la fila tal como la mostró (la "base") y al
+# guardar se compara SOLO esa fila contra la vigente (compare-and-set, sin releer la hoja):
+# - misma versión: nadie más la tocó -> se escribe con versión + 1
+# - otra versión:  fusión de 3 vías campo por campo (base / mío / vigente):
+#     solo yo lo cambié -> el mío;  solo el otro -> el suyo;  los dos al mismo valor -> ese;
+#     los dos a valores distintos -> conflicto: no se escribe nada y se muestra qué chocó.
+# Se verifica dos veces: al guardar, contra el índice compartido (todas las sesiones del
+# proceso), y en la cola, contra la fila remota recién leída justo antes de enviarla (otro
+# proceso o alguien editando la hoja a mano). La fila remota se lee sola, por su posición.
+
+
+class ConflictoEdicion(Exception):
+    """Otra persona cambió los mismos campos de la fila a valores distintos mientras se editaba."""
+
+    def __init__(self, hoja, llave, conflictos, vigente):
+        self.hoja = hoja
+        self.llave = llave
+        self.conflictos = conflictos   # {columna: (mi valor, valor vigente)}
+        self.vigente = vigente
+        super().__init__(f"{hoja} {llave}: otra persona cambió {', '.join(conflictos)} mientras se editaba")
+
+
+def version(registro):
+    """Versión de una fila (0 si no existe o aún no tiene)."""
+    return int(registro.get(COLUMNA_VERSION, 0) or 0) if registro else 0
+
+
+def llave_de(hoja, registro):
+    return llave_mes(registro['Año'], registro['Mes']) if hoja == "Datos" else llave_anio(registro['Año'])
+
+
+def iguales(a, b):
+    a, b = (v.item() if hasattr(v, "item") else v for v in (a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def fusionar(base, mio, vigente, columnas):
+    """(registro fusionado, columnas tomadas de la versión vigente, {columna: (mío, vigente)} en conflicto).
+
+    base: la fila como la vio quien edita (None = sin base: gana lo mío, como antes);
+    mio: lo que se guarda; vigente: la fila actual (None si todavía no existe).
+    """
+    if vigente is None:
+        return dict(mio), [], {}
+    fusionado = {**vigente, **mio}
+    if base is None or version(base) == version(vigente):
+        return fusionado, [], {}
+    ajenas, conflictos = [], {}
+    for c in columnas:
+        if c == COLUMNA_VERSION or c not in mio:
+            continue
+        suyo = vigente.get(c)
+        if iguales(mio[c], suyo):
+            continue
+        if iguales(mio[c], base.get(c)):     # No lo toqué: se queda lo que guardó la otra persona
+            fusionado[c] = suyo
+            ajenas.append(c)
+        elif not iguales(suyo, base.get(c)):  # Los dos lo cambiamos, a valores distintos
+            conflictos[c] = (mio[c], suyo)
+    return fusionado, ajenas, conflictos
+
+
+def resolver(hoja, llave, base, mio, vigente, columnas, forzar=False):
+    """(registro a escribir con la versión siguiente a la vigente, columnas tomadas de la vigente).
+
+    ConflictoEdicion si se pisan, salvo con forzar=True (quien edita ya vio el conflicto: en esos campos gana lo suyo).
+    """
+    fusionado, ajenas, conflictos = fusionar(base, mio, vigente, columnas)
+    if conflictos and not forzar:
+        raise ConflictoEdicion(hoja, llave, conflictos, vigente)
+    fusionado[COLUMNA_VERSION] = version(vigente) + 1
+    return fusionado, ajenas
+
+
+def verificar_remota(hoja, llave, registro, esperado, remoto, columnas):
+    """Registro a enviar sobre la fila remota: el mismo si sigue en la versión `esperado`, o fusionado con lo que cambió.
+
+    remoto: la fila leída de la hoja en la posición a escribir (None = no se pudo leer; se escribe como antes).
+    """
+    if remoto is None:
+        return registro
+    if llave_de(hoja, remoto) != llave_de(hoja, registro):
+        raise RuntimeError(f"La fila de {hoja} {llave} ya no está en la posición esperada (¿se borraron o movieron filas en la hoja?).")
+    if version(remoto) == version(esperado):
+        return registro
+    return resolver(hoja, llave, esperado, registro, remoto, columnas)[0]
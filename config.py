@@ -0,0 +1,152 @@
+from datetime import datetime
+
+import esquema
+import pagos
+from kpis import Campo, CampoMeta, Condicion, Kpi, Persona, RegistroKpis, SeccionTv, ACUMULADA, DINERO, ENTERO, PORCENTAJE, TEXTO
+
+# ==========================================
+# ⚙️ CONFIGURACIÓN DE LOS TABLEROS (EDITAR AQUÍ)
+# ==========================================
+# Todo lo que se ajusta a mano vive en este archivo: personal, KPIs, metas por
+# defecto, almacenamiento y tiempos. app.py solo arma la navegación y cada
+# página (carpeta paginas/) importa de aquí lo que usa.
+
+# ==========================================
+# 👥 NOMBRES DEL PERSONAL (EDITAR AQUÍ CUANDO ALGUIEN CAMBIE)
+# ==========================================
+# Si alguien sale de la empresa, solo cambia el nombre entre las comillas.
+NOMBRE_1 = "Ing. Mario Corral"  # Rol: Ventas de Servicios
+NOMBRE_2 = "Arq. David Puga"    # Rol: Obras / Calidad
+NOMBRE_3 = "México Office"      # Rol: Ventas de Productos
+
+# ==========================================
+# 📋 PERSONAS E INDICADORES (AGREGAR AQUÍ NUEVOS VENDEDORES / KPIs)
+# ==========================================
+# Las columnas de cada persona se agregan a la hoja "Datos" en este orden y su meta/recompensa a "Metas".
+# Umbrales: fijos (umbral=2) o la meta anual / 12 (meta_anual='meta_mario'); inversa=True = "menor es mejor".
+# tv=SeccionTv(...): sección de la persona en la Vista General (TV), en el orden del registro; sin tv no aparece ahí.
+REGISTRO_KPIS = RegistroKpis([
+    Persona('mario', NOMBRE_1, "👨‍💼",
+        campos=[
+            Campo('m_ventas', "Facturación Mensual de Servicios ($)", DINERO),
+            Campo('m_clientes', "Nuevos Clientes Captados (Cantidad)", ENTERO),
+            Campo('m_ventas_nuevos', "Monto Facturado a Nuevos Clientes ($)", DINERO),
+            Campo('m_contenido', "Artículos de Contenido Técnico Publicados", ENTERO),
+        ],
+        captura=[('m_ventas', 'm_clientes', 'm_ventas_nuevos'), ('m_contenido',)],
+        meta=CampoMeta('meta_mario', "Servicios $", 10623610.66, paso=100000.0),
+        recompensa=CampoMeta('premio_mario', "Premio / Destino del Viaje", 'Viaje Los Cabos', TEXTO),
+        tv=SeccionTv("Crecimiento de Ventas de Servicios", 'm_ventas', "Ventas de Servicios (YTD)", 'Venta Real', "Evolución Mensual vs Meta"),
+        kpis=[
+            Kpi('ventas', "Ventas de Servicios", Condicion('m_ventas', meta_anual='meta_mario'), "Meta Mensual: ${meta:,.0f}", "Aporta al {recompensa}", DINERO),
+            Kpi('clientes', "Nuevos Clientes Captados", Condicion('m_clientes', 1), "Meta: Al menos 1 cliente nuevo", "Genera Comisión del 5%"),
+            Kpi('contenido', "Contenido Técnico Publicado", Condicion('m_contenido', 2), "Meta: 2 Artículos al mes", "Requisito operativo de liderazgo"),
+        ]),
+    Persona('david', NOMBRE_2, "👷",
+        campos=[
+            Campo('d_monto_det', "Monto de Obras Adicionales Detectadas ($)", DINERO),
+            Campo('d_crono_dev', "Desviación de Cronograma / Presupuesto (%)", PORCENTAJE),
+            Campo('d_sat', "Índice de Satisfacción del Cliente (NPS 0-10)", max_valor=10.0),
+            Campo('d_seg', "Cursos de Seguridad e Higiene Impartidos", ENTERO),
+            Campo('d_eval', "Evaluación de Desempeño Personal (%)", PORCENTAJE),
+            Campo('d_obra', "Cantidad de Cotizaciones Generadas", ENTERO),
+        ],
+        captura=[('d_monto_det', 'd_sat'), ('d_crono_dev', 'd_seg'), ('d_obra', 'd_eval')],
+        meta=CampoMeta('meta_david', "Obras Detectadas $", 1000000.00, paso=50000.0),
+        recompensa=CampoMeta('bono_david', "Bono por alcanzar la meta ($)", 15000.0),
+        columnas_panel=2,
+        tv=SeccionTv("Oportunidades Generadas en Sitio", 'd_monto_det', "OPORTUNIDADES CERRADAS (ACUM)", 'Monto Detectado',
+                     "Monto Detectado por Mes vs Meta", color='#009640', destacada=True),
+        kpis=[
+            Kpi('deteccion', "Oportunidades Detectadas en Obra", Condicion('d_monto_det', meta_anual='meta_david'), "Meta Mensual: >${meta:,.0f} detectados", "Suma para Comisión 1% y Bono extra", DINERO),
+            Kpi('cronograma', "Desviación de Cronograma y Ppto.", Condicion('d_crono_dev', 5.0, inversa=True), "Meta: Menor al 5% de desviación", "Requisito para Bono de 1 mes de sueldo", PORCENTAJE),
+            Kpi('nps', "Índice de Satisfacción (NPS)", Condicion('d_sat', 9.0), "Meta: Calificación mínima 9/10", "KPI indispensable de Calidad Post-Venta"),
+            Kpi('seguridad', "Cursos de Seguridad e Higiene", Condicion('d_seg', 2), "Meta: 2 Cursos impartidos en mes", "KPI indispensable de Seguridad (Bitácora)"),
+        ]),
+    Persona('hellen', NOMBRE_3, "👩‍💼",
+        campos=[
+            Campo('h_ventas', "Facturación Mensual de Productos ($)", DINERO),
+            Campo('h_citas', "Citas Generadas y Registradas (CRM)", ENTERO),
+            Campo('h_mail', "Mailings Enviados", ENTERO),
+            Campo('h_fb', "Publicaciones en Facebook", ENTERO),
+            Campo('h_art', "Artículos de Productos Creados", ENTERO),
+        ],
+        captura=[('h_ventas', 'h_citas'), ('h_mail', 'h_fb', 'h_art')],
+        meta=CampoMeta('meta_hellen', "Productos $", 1000000.00, paso=50000.0),
+        recompensa=CampoMeta('bono_hellen', "Bono por alcanzar la meta ($)", 25000.0),
+        tv=SeccionTv("Carrera a la Meta de Productos", 'h_ventas', "Ventas de Productos (YTD)", 'Venta Real Acumulada',
+                     "Venta Acumulada y Proyección al Cierre vs Camino Ideal", grafica=ACUMULADA, color='#009640'),
+        kpis=[
+            Kpi('ventas', "Ventas de Productos", Condicion('h_ventas', meta_anual='meta_hellen'), "Meta Mensual: ~${meta:,.0f} en facturación", "Suma acumulado para Bono de ${recompensa:,.0f}", DINERO),
+            Kpi('citas', "Citas Generadas (CRM)", Condicion('h_citas', 4), "Meta: 4 Citas nuevas en el mes", "Motor principal de prospección y ventas"),
+            Kpi('digital', "Estrategia Digital Integral",
+                [Condicion('h_mail', 2, etiqueta="📧 Mailing"), Condicion('h_fb', 2, etiqueta="📱 Facebook"), Condicion('h_art', 1, etiqueta="📝 Artículo")],
+                "Meta: 2 Mails / 2 FB / 1 Articulo", "Requisito integral de sueldo", textos=("CUMPLIDO", "PENDIENTE")),
+        ]),
+])
+
+# ==========================================
+# 💵 COMISIONES Y BONOS (EDITAR AQUÍ LAS TASAS)
+# ==========================================
+# Comision: tasa sobre el total anual de una columna. Bono: el monto de "Metas" si se alcanza la meta anual de la persona.
+# Las tarjetas "MI CARTERA" y el simulador del ADMIN (💵 Simulador de Pagos) se calculan con estas reglas.
+PLAN_PAGOS = pagos.PlanPagos(REGISTRO_KPIS, [
+    pagos.Comision('mario_nuevos', 'mario', 'm_ventas_nuevos', 0.05, "Comisión Nuevos Clientes"),
+    pagos.Comision('mario_obras', 'mario', 'd_monto_det', 0.01, "Comisión Obras Adicionales"),
+    pagos.Comision('david_obras', 'david', 'd_monto_det', 0.01, "Comisión Obras Adicionales"),
+    pagos.Bono('david_bono', 'david', 'bono_david', "Bono Productividad"),
+    pagos.Bono('hellen_bono', 'hellen', 'bono_hellen', "Bono por Meta Anual"),
+])
+
+# --- CONSTANTES ---
+ANIO_INICIO = 2026  # Primer año del selector de año fiscal (llega hasta el año actual + 9)
+ANIOS = list(range(ANIO_INICIO, datetime.now().year + 10))  # Años del selector y de los reportes estáticos
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+# Contador de guardados de cada fila (concurrencia optimista, ver concurrencia.py): última columna de "Datos" y
+# de "Metas". Si una hoja existente no tiene ese encabezado, BackendGSheets lo agrega al leerla; las celdas vacías valen 0.
+COLUMNA_VERSION = esquema.COLUMNA_VERSION
+COLUMNAS_BD = REGISTRO_KPIS.columnas_datos + [COLUMNA_VERSION]   # Derivadas del registro de personas (mismo orden que la hoja)
+COLUMNAS_METAS = REGISTRO_KPIS.columnas_metas + [COLUMNA_VERSION]
+COLUMNAS_ENTERAS = REGISTRO_KPIS.columnas_enteras
+DEFAULT_DATA = {col: 0.0 if col not in ['Año', 'Mes', COLUMNA_VERSION] + COLUMNAS_ENTERAS else 0 for col in COLUMNAS_BD if col not in ['Año', 'Mes']}
+
+# --- ESQUEMA TIPADO DE LAS HOJAS (Año int16, Mes categórico ordenado, conteos int16, dinero float, Versión int64) ---
+ESQUEMA_DATOS = esquema.EsquemaHoja("Datos", {'Año': esquema.ANIO, 'Mes': esquema.MES, **{
+    c.columna: esquema.ENTERO if c.es_entero else esquema.DECIMAL for c in REGISTRO_KPIS.campos}, COLUMNA_VERSION: esquema.VERSION}, meses=MESES)
+ESQUEMA_METAS = esquema.EsquemaHoja("Metas", {'Año': esquema.ANIO, **{
+    c.columna: esquema.TEXTO if c.tipo == TEXTO else esquema.DECIMAL for c in REGISTRO_KPIS.campos_metas}, COLUMNA_VERSION: esquema.VERSION},
+    defectos={p.recompensa.columna: p.recompensa.defecto for p in REGISTRO_KPIS.personas if p.recompensa is not None})
+
+# --- OPCIONES FIJAS DEL MENÚ (las de cada persona salen del registro) ---
+OPCION_TV = "🏠 Vista General (TV)"
+OPCION_ADMIN = "🔐 ADMIN (Config & Captura)"
+
+# --- ALMACENAMIENTO ---
+# "gsheets" (producción), "sqlite" / "duckdb" (motor local para históricos grandes) o "memoria" (pruebas sin internet).
+# Se puede cambiar sin tocar el código en .streamlit/secrets.toml:  [almacenamiento]  backend = "sqlite"  ruta = "codesa.sqlite3"
+BACKEND_ALMACENAMIENTO = "gsheets"
+RUTA_BD_LOCAL = "codesa_local.sqlite3"
+
+# --- CACHÉ COMPARTIDA DE GOOGLE SHEETS ---
+TTL_HOJAS_SEGUNDOS = 60        # Máximo de segundos que se reutiliza una lectura antes de volver a consultar Sheets
+REFRESCO_HOJAS_SEGUNDOS = 45   # Cada cuánto un hilo de fondo refresca las hojas (0 = sin hilo de fondo)
+MAX_REINTENTOS_ESCRITURA = 5   # Intentos de guardar una fila (con espera exponencial) antes de marcarla como fallida
+RUTA_RESPALDO_LOCAL = "respaldo_codesa.sqlite3"  # Copia local de ambas hojas + diario de ediciones sin conexión
+ENFRIAMIENTO_CONEXION_SEGUNDOS = 60  # Tras una caída, segundos sin reintentar conectar en cada rerun
+
+# --- PROYECCIÓN AL CIERRE DEL AÑO (gráficas de la TV y tarjetas "MI CARTERA") ---
+COLUMNAS_DINERO = [c.columna for c in REGISTRO_KPIS.campos if c.tipo == DINERO]  # Se proyectan todas a la vez
+PROYECCION_ANIOS_HISTORIA = 3  # Años anteriores para estimar la estacionalidad de cada mes
+PROYECCION_CONFIANZA = 0.80    # Nivel de la banda (0.80 = el cierre cae dentro 8 de cada 10 veces)
+
+# --- MODO TV / KIOSCO (abrir la app con ?modo=tv, opcional &anio=2026) ---
+TV_INTERVALO_SEGUNDOS = 30     # Cada cuánto la pantalla revisa si cambió la versión de los datos
+
+# --- MÉTRICAS DE RENDIMIENTO (pestaña 📈 Diagnóstico del ADMIN) ---
+METRICAS_LOG_POR_RERUN = True                   # Una línea JSON por rerun con el tiempo de cada fase (stderr)
+METRICAS_RUTA_PROMETHEUS = "metricas_codesa.prom"  # Archivo para el textfile collector de node_exporter (None = no escribir)
+METRICAS_INTERVALO_EXPORTACION = 15             # Segundos mínimos entre escrituras del archivo .prom
+
+# --- REPORTES ESTÁTICOS (python reportes_estaticos.py: HTML de la TV y de cada panel, por año y mes) ---
+RUTA_REPORTES = "reportes"     # Carpeta del sitio estático (index.html + un archivo por año, mes y panel)
+REPORTES_PROCESOS = 0          # Procesos para renderizar en paralelo (0 = uno por núcleo)
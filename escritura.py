@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+
+from concurrencia import ConflictoEdicion, verificar_remota
+
+# ==========================================
+# ✍️ ESCRITURA POR FILA + COLA DE ESCRITURAS
+# ==========================================
+# En lugar de reescribir la hoja completa con conn.update(), solo se envía la
+# fila que cambió: (Año, Mes) en "Datos" o (Año) en "Metas" (ver
+# BackendAlmacenamiento.escribir_fila en almacenamiento.py).
+# Las escrituras pasan por una cola en segundo plano que:
+# - fusiona ediciones repetidas de la misma llave (solo se envía la última),
+# - reintenta con espera exponencial si Google Sheets falla,
+# - antes de sobreescribir una fila, la lee sola y compara su versión (ver concurrencia.py):
+#   si alguien más la cambió, fusiona lo que no se pisa o la marca en conflicto sin escribir,
+# - expone el estado de cada llave: pendiente / confirmado / fallido / conflicto.
+
+PENDIENTE = "pendiente"
+CONFIRMADO = "confirmado"
+FALLIDO = "fallido"
+CONFLICTO = "conflicto"
+
+
+def valores_fila(registro, columnas):
+    """Convierte un registro a la lista de celdas (tipos nativos) en el orden de la hoja."""
+    fila = []
+    for col in columnas:
+        valor = registro.get(col, "")
+        if hasattr(valor, "item"):
+            valor = valor.item()  # numpy -> Python
+        if isinstance(valor, float) and valor.is_integer() and col == 'Año':
+            valor = int(valor)
+        fila.append(valor)
+    return fila
+
+
+class _Escritura:
+    def __init__(self, hoja, llave, fila, nueva, registro, valores, esperado=None, ids=()):
+        self.hoja = hoja
+        self.llave = llave
+        self.fila = fila
+        self.nueva = nueva
+        self.registro = registro
+        self.valores = valores
+        self.esperado = esperado   # la fila que debería seguir en la hoja (la base de este guardado)
+        self.ids = list(ids)       # ids del diario local que quedan cubiertos al enviar estos valores
+        self.fusionada = False     # lo enviado se fusionó con cambios ajenos de la fila remota
+        self.estado = PENDIENTE
+        self.intentos = 0
+        self.error = None
+        self.proximo_intento = 0.0
+        self.actualizado_en = time.time()
+
+
+class ColaEscrituras:
+    def __init__(self, escribir_fila, al_confirmar=None, max_reintentos=5, espera_base=1.0, max_historial=200,
+                 leer_fila=None, columnas=None, al_conflicto=None):
+        # escribir_fila(hoja, fila, valores, nueva) hace la llamada real a Google Sheets;
+        # leer_fila(hoja, fila) -> registro (o None) lee solo esa fila para el compare-and-set.
+        # al_confirmar(hoja, llave, ids, fusionada) / al_conflicto(hoja, llave, ids) reciben los ids del diario
+        # que cubre lo enviado (nunca los de una edición que llegó mientras se escribía: esa sigue en la cola);
+        # fusionada indica que en la hoja quedaron campos de otra persona que la copia local aún no tiene.
+        self._escribir_fila = escribir_fila
+        self._al_confirmar = al_confirmar
+        self._leer_fila = leer_fila
+        self._columnas = dict(columnas or {})   # hoja -> columnas en el orden de la hoja
+        self._al_conflicto = al_conflicto
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.max_historial = max_historial
+        self._cond = threading.Condition()
+        self._pendientes = OrderedDict()   # (hoja, llave) -> _Escritura, en orden de llegada
+        self._estados = OrderedDict()      # (hoja, llave) -> _Escritura (último estado conocido)
+        self._hilo = threading.Thread(target=self._trabajar, name="cola-escrituras", daemon=True)
+        self._hilo.start()
+
+    # --- API PARA LA APP ---
+    def encolar(self, hoja, llave, fila, nueva, registro, valores, esperado=None, id_diario=None):
+        """Agrega (o fusiona) la escritura de una llave. Devuelve inmediatamente."""
+        ids = [] if id_diario is None else [id_diario]
+        with self._cond:
+            previa = self._pendientes.get((hoja, llave))
+            if previa is not None:
+                # Edición repetida de la misma llave: se reemplazan los valores y se reinician los intentos
+                # (la hoja sigue teniendo lo que esperaba la primera, así que su `esperado` no cambia).
+                previa.registro = registro
+                previa.valores = valores
+                previa.ids.extend(ids)
+                previa.intentos = 0
+                previa.error = None
+                previa.proximo_intento = 0.0
+                previa.estado = PENDIENTE
+                previa.actualizado_en = time.time()
+            else:
+                escritura = _Escritura(hoja, llave, fila, nueva, registro, valores, esperado, ids)
+                self._pendientes[(hoja, llave)] = escritura
+                self._historial(escritura)
+            self._cond.notify()
+
+    def anotar_conflicto(self, hoja, llave, registro, error):
+        """Deja constancia de una edición que no se envió por conflicto (p. ej. al reenviar el diario)."""
+        with self._cond:
+            escritura = _Escritura(hoja, llave, None, False, registro, None)
+            escritura.estado, escritura.error = CONFLICTO, error
+            self._historial(escritura)
+
+    def _historial(self, escritura):
+        clave = (escritura.hoja, escritura.llave)
+        self._estados[clave] = escritura
+        self._estados.move_to_end(clave)
+        while len(self._estados) > self.max_historial:
+            self._estados.popitem(last=False)
+
+    def estado(self, hoja, llave):
+        escritura = self._estados.get((hoja, llave))
+        return (escritura.estado, escritura.error) if escritura is not None else (None, None)
+
+    def recientes(self, limite=10):
+        """Últimas llaves escritas con su estado (lo más reciente primero)."""
+        with self._cond:
+            items = list(self._estados.values())[-limite:]
+        return [(e.hoja, e.llave, e.estado, e.intentos, e.error) for e in reversed(items)]
+
+    def pendientes(self, hoja):
+        """Registros aún no confirmados de una hoja (para no perderlos al releer Sheets)."""
+        with self._cond:
+            return [e.registro for (h, _), e in self._pendientes.items() if h == hoja]
+
+    # --- HILO DE FONDO ---
+    def _siguiente(self):
+        """Primera escritura lista para enviarse (respetando la espera de sus reintentos)."""
+        ahora = time.monotonic()
+        espera_minima = None
+        for clave, escritura in self._pendientes.items():
+            if escritura.proximo_intento <= ahora:
+                return clave, escritura, 0
+            falta = escritura.proximo_intento - ahora
+            espera_minima = falta if espera_minima is None else min(espera_minima, falta)
+        return None, None, espera_minima
+
+    def _trabajar(self):
+        while True:
+            with self._cond:
+                clave, escritura, espera = self._siguiente()
+                while escritura is None:
+                    self._cond.wait(timeout=espera)
+                    clave, escritura, espera = self._siguiente()
+                fila, nueva, valores = escritura.fila, escritura.nueva, escritura.valores
+                registro, esperado, ids = escritura.registro, escritura.esperado, list(escritura.ids)
+
+            enviado = registro
+            try:
+                if not nueva and self._leer_fila is not None:
+                    # Compare-and-set contra la fila remota: solo esa fila, no la hoja completa
+                    enviado = verificar_remota(escritura.hoja, escritura.llave, registro, esperado,
+                                               self._leer_fila(escritura.hoja, fila), self._columnas[escritura.hoja])
+                valores_envio = valores if enviado is registro else valores_fila(enviado, self._columnas[escritura.hoja])
+                self._escribir_fila(escritura.hoja, fila, valores_envio, nueva)
+            except ConflictoEdicion as e:
+                with self._cond:
+                    escritura.error = str(e)
+                    escritura.ids = escritura.ids[len(ids):]
+                    if escritura.valores is valores:
+                        escritura.estado = CONFLICTO
+                        self._pendientes.pop(clave, None)
+                    # Si llegó una edición nueva mientras se escribía, no se descarta: se queda en la cola
+                    # y pasa otra vez por la fusión contra la fila remota (puede que ya no choque).
+                if self._al_conflicto is not None:
+                    try:
+                        self._al_conflicto(escritura.hoja, escritura.llave, ids)
+                    except Exception:
+                        pass
+                continue
+            except Exception as e:
+                with self._cond:
+                    escritura.intentos += 1
+                    escritura.error = str(e)
+                    if escritura.intentos >= self.max_reintentos:
+                        escritura.estado = FALLIDO
+                        self._pendientes.pop(clave, None)
+                    else:
+                        escritura.proximo_intento = time.monotonic() + self.espera_base * (2 ** (escritura.intentos - 1))
+                continue
+
+            with self._cond:
+                # La fila ya existe en la hoja: una edición posterior la sobreescribe, no la vuelve a agregar.
+                # Su base es lo que se guardó aquí (si allá se fusionó con otra edición, tendrá otra versión
+                # y la siguiente escritura se fusiona igual, sin borrar lo ajeno).
+                escritura.nueva = False
+                escritura.esperado = registro
+                escritura.fusionada = fusionada = escritura.fusionada or enviado is not registro
+                confirmado = escritura.valores is valores
+                if confirmado:
+                    escritura.estado = CONFIRMADO
+                    escritura.error = None
+                    escritura.fusionada = False
+                    self._pendientes.pop(clave, None)
+                # Si llegó una edición nueva mientras se escribía, se queda en la cola y se reenvía:
+                # hasta que se envíe, la llave no se confirma (su diario sigue pendiente por si el proceso cae).
+                escritura.actualizado_en = time.time()
+            if confirmado and self._al_confirmar is not None:
+                try:
+                    self._al_confirmar(escritura.hoja, escritura.llave, ids, fusionada)
+                except Exception:
+                    pass
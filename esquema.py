@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🧾 ESQUEMA TIPADO DE LAS HOJAS (INGESTA EN UNA SOLA PASADA)
+# ==========================================
+# Cada hoja declara el tipo de sus columnas y se convierte en un solo paso
+# vectorizado (todas las columnas numéricas juntas, sin ciclo por columna):
+# - Año            -> int16
+# - Mes            -> categórico ordenado (Enero < ... < Diciembre)
+# - conteos (KPIs) -> int16
+# - dinero / %     -> float64
+# - texto          -> str
+# - Versión        -> int64 (contador de guardados de la fila, ver concurrencia.py)
+# Las celdas vacías valen 0 (o el valor por defecto de la columna). Las celdas
+# con algo que no se puede interpretar NO se pierden en silencio: quedan en 0 y
+# se reportan en `rechazos` con su fila de la hoja, columna, valor y motivo.
+# Las filas nunca se descartan: su posición es la que se usa al escribir en Sheets.
+
+ANIO = "anio"
+MES = "mes"
+ENTERO = "entero"
+DECIMAL = "decimal"
+TEXTO = "texto"
+VERSION = "version"
+COLUMNA_VERSION = "Versión"   # Última columna de "Datos" y "Metas"
+
+_DTYPES = {ANIO: "int16", ENTERO: "int16", DECIMAL: "float64", VERSION: "int64"}
+_TIPOS_SQL = {ANIO: "INTEGER", ENTERO: "INTEGER", DECIMAL: "REAL", VERSION: "INTEGER", MES: "TEXT", TEXTO: "TEXT"}
+_LIMITE_INT16 = np.iinfo(np.int16).max
+COLUMNAS_RECHAZOS = ["hoja", "fila", "columna", "valor", "motivo"]
+
+
+class EsquemaHoja:
+    def __init__(self, nombre, tipos, meses=None, defectos=None):
+        # tipos: {columna: ANIO | MES | ENTERO | DECIMAL | TEXTO | VERSION} en el orden de la hoja
+        self.nombre = nombre
+        self.tipos = dict(tipos)
+        self.columnas = list(self.tipos)
+        self.meses = list(meses or [])
+        self.defectos = dict(defectos or {})
+        self.numericas = [c for c, t in self.tipos.items() if t in _DTYPES]
+        self._enteras = np.array([self.tipos[c] != DECIMAL for c in self.numericas], dtype=bool)
+        self._int16 = np.array([self.tipos[c] in (ANIO, ENTERO) for c in self.numericas], dtype=bool)
+        self._anio = np.array([self.tipos[c] == ANIO for c in self.numericas], dtype=bool)
+        self._tipo_mes = pd.CategoricalDtype(self.meses, ordered=True)
+
+    def tipos_sql(self):
+        return {c: _TIPOS_SQL[t] for c, t in self.tipos.items()}
+
+    def vacio(self):
+        return pd.DataFrame({c: pd.Series(dtype=self._dtype(c)) for c in self.columnas})
+
+    def _dtype(self, columna):
+        tipo = self.tipos[columna]
+        return self._tipo_mes if tipo == MES else _DTYPES.get(tipo, object)
+
+    def _defecto(self, columna):
+        return self.defectos.get(columna, "" if self.tipos[columna] in (TEXTO, MES) else 0)
+
+    # --- INGESTA ---
+    def ingerir(self, crudo):
+        """(DataFrame tipado, DataFrame de rechazos) a partir de la hoja tal como llega de Sheets."""
+        if crudo is None or crudo.empty or 'Año' not in crudo.columns:
+            return self.vacio(), pd.DataFrame(columns=COLUMNAS_RECHAZOS)
+        n = len(crudo)
+        faltantes = [c for c in self.columnas if c not in crudo.columns]
+        crudo = crudo.reindex(columns=self.columnas)
+        for c in faltantes:
+            crudo[c] = self._defecto(c)
+        rechazos = []
+        resultado = {}
+
+        # 1. Todas las columnas numéricas en un solo bloque (n x k)
+        if self.numericas:
+            bloque = crudo[self.numericas]
+            if all(pd.api.types.is_numeric_dtype(t) for t in bloque.dtypes):
+                valores = bloque.to_numpy(dtype=float)
+                vacias = np.isnan(valores)
+            else:
+                plano = pd.Series(bloque.to_numpy(dtype=object).ravel())
+                es_texto = plano.map(type).eq(str).to_numpy()
+                if es_texto.any():
+                    # "$1,250.50" o " 12 " tal como los puede devolver Sheets
+                    plano[es_texto] = plano[es_texto].str.replace(r"[$,\s]", "", regex=True)
+                vacias = (plano.isna() | (es_texto & plano.eq(""))).to_numpy().reshape(n, -1)
+                valores = pd.to_numeric(plano, errors='coerce').to_numpy(dtype=float).reshape(n, -1)
+            invalidas = np.isnan(valores) & ~vacias
+            no_enteras = self._enteras & ~np.isnan(valores) & (valores != np.round(valores))
+            fuera_rango = self._int16 & (np.abs(np.nan_to_num(valores)) > _LIMITE_INT16)
+            anio_invalido = self._anio & ~vacias & ~np.isnan(valores) & (valores <= 0)
+            originales = None
+            for mascara, motivo in ((invalidas, "no es un número"), (no_enteras, "debe ser entero"),
+                                    (fuera_rango, "fuera de rango"), (anio_invalido, "año inválido")):
+                if mascara.any():
+                    originales = bloque.to_numpy(dtype=object) if originales is None else originales
+                    filas, cols = np.nonzero(mascara)
+                    rechazos.append((filas, np.asarray(self.numericas, dtype=object)[cols], originales[filas, cols], motivo))
+            malas = invalidas | no_enteras | fuera_rango | anio_invalido
+            valores = np.where(vacias | malas, 0, valores)
+            for j, c in enumerate(self.numericas):
+                resultado[c] = valores[:, j].astype(_DTYPES[self.tipos[c]])
+
+        # 2. Mes: categórico ordenado; lo que no es un mes conocido queda vacío (NaN) y se reporta
+        for c in (c for c, t in self.tipos.items() if t == MES):
+            texto = crudo[c].astype("string").str.strip()
+            nombre = texto.str.capitalize()
+            mes = pd.Categorical(nombre.where(nombre.isin(self.meses)), dtype=self._tipo_mes)
+            malas = np.asarray(pd.isna(mes)) & texto.fillna("").ne("").to_numpy()
+            if malas.any():
+                filas = np.flatnonzero(malas)
+                rechazos.append((filas, np.full(len(filas), c, dtype=object), crudo[c].to_numpy(dtype=object)[filas], "mes desconocido"))
+            resultado[c] = mes
+
+        # 3. Texto libre
+        for c in (c for c, t in self.tipos.items() if t == TEXTO):
+            texto = crudo[c].astype("string").str.strip()
+            resultado[c] = texto.mask(texto.isna() | texto.eq(""), str(self._defecto(c))).astype(str).to_numpy(dtype=object)
+
+        df = pd.DataFrame(resultado, index=crudo.index)[self.columnas]
+        return df.reset_index(drop=True), self._reporte(rechazos)
+
+    def _reporte(self, rechazos):
+        # rechazos: [(filas, columnas, valores originales, motivo)] como arreglos por motivo
+        if not rechazos:
+            return pd.DataFrame(columns=COLUMNAS_RECHAZOS)
+        return pd.DataFrame({
+            "hoja": self.nombre,
+            "fila": np.concatenate([filas for filas, _, _, _ in rechazos]) + 2,  # fila 1 = encabezado en Sheets
+            "columna": np.concatenate([cols for _, cols, _, _ in rechazos]),
+            "valor": np.concatenate([valores for _, _, valores, _ in rechazos]).astype(str),
+            "motivo": np.concatenate([np.full(len(filas), motivo, dtype=object) for filas, _, _, motivo in rechazos]),
+        }).sort_values(["fila", "columna"], ignore_index=True)
@@ -0,0 +1,325 @@
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from almacen import AlmacenRegistros, llave_mes
+from almacenamiento import BackendGSheets, BackendMemoria, BackendSQL, AlmacenConsultas
+from cache_hojas import CacheHojas
+from concurrencia import ConflictoEdicion, resolver, version
+from config import (REGISTRO_KPIS, COLUMNA_VERSION, COLUMNAS_BD, COLUMNAS_METAS, MESES, DEFAULT_DATA, ESQUEMA_DATOS, ESQUEMA_METAS,
+                    BACKEND_ALMACENAMIENTO, RUTA_BD_LOCAL, TTL_HOJAS_SEGUNDOS, REFRESCO_HOJAS_SEGUNDOS,
+                    MAX_REINTENTOS_ESCRITURA, RUTA_RESPALDO_LOCAL, ENFRIAMIENTO_CONEXION_SEGUNDOS,
+                    COLUMNAS_DINERO, PROYECCION_ANIOS_HISTORIA, PROYECCION_CONFIANZA)
+from escritura import ColaEscrituras, valores_fila
+from metricas import tramo
+from proyeccion import proyeccion
+from respaldo_local import RespaldoLocal, CircuitoConexion
+
+# ==========================================
+# 🔌 ESTADO COMPARTIDO PEREZOSO (CONEXIÓN, CACHÉ E ÍNDICE)
+# ==========================================
+# Importar este módulo no conecta ni lee nada. app.py crea un Estado por rerun y
+# cada página le pide solo lo que usa (un mes, las metas, los totales del año...).
+# El primer acceso a cualquier dato de la conexión (almacen, backend, ...) es el
+# que conecta y lee; el resto del rerun reutiliza lo mismo.
+# Los objetos de proceso (backend, caché de hojas, cola, respaldo) siguen siendo
+# únicos con st.cache_resource y se comparten entre todas las sesiones.
+
+
+# ==========================================
+# 🔌 SISTEMA ANTICAÍDAS Y CONEXIÓN A BD
+# ==========================================
+def configuracion_almacenamiento():
+    try:
+        conf = dict(st.secrets.get("almacenamiento", {}))
+    except Exception:  # Sin secrets.toml
+        conf = {}
+    return conf.get("backend", BACKEND_ALMACENAMIENTO), conf.get("ruta", RUTA_BD_LOCAL)
+
+@st.cache_resource(show_spinner=False)
+def obtener_backend(tipo, ruta):
+    if tipo == "gsheets":
+        # gspread + google-auth tardan en importarse: solo se cargan con este backend y al conectar
+        from streamlit_gsheets import GSheetsConnection
+        conn = st.connection("gsheets", type=GSheetsConnection)
+        return BackendGSheets(conn, ESQUEMA_DATOS, ESQUEMA_METAS)
+    if tipo == "memoria":
+        return BackendMemoria(ESQUEMA_DATOS, ESQUEMA_METAS)
+    if tipo in ("sqlite", "duckdb"):
+        return BackendSQL(ruta, ESQUEMA_DATOS.tipos_sql(), ESQUEMA_METAS.tipos_sql(), MESES, motor=tipo)
+    raise ValueError(f"Backend de almacenamiento desconocido: {tipo}")
+
+@st.cache_resource(show_spinner=False)
+def obtener_almacen_sql(tipo, ruta, _backend):
+    # Con motor SQL no hay lectura completa: cada consulta (mes, año, YTD) se resuelve dentro del motor
+    return AlmacenConsultas(_backend)
+
+@st.cache_resource(show_spinner=False)
+def obtener_respaldo_local():
+    return RespaldoLocal(RUTA_RESPALDO_LOCAL, tipar=lambda d, m: (ESQUEMA_DATOS.ingerir(d)[0], ESQUEMA_METAS.ingerir(m)[0]))
+
+@st.cache_resource(show_spinner=False)
+def obtener_circuito():
+    return CircuitoConexion(enfriamiento_segundos=ENFRIAMIENTO_CONEXION_SEGUNDOS)
+
+@st.cache_resource(show_spinner=False)
+def obtener_cache_hojas(tipo, _backend, _circuito, _respaldo):
+    # Un solo objeto por proceso: todas las sesiones comparten la misma lectura de Sheets.
+    def leer():
+        try:
+            resultado = _backend.leer_hojas()
+        except Exception:
+            _circuito.fallo()
+            raise
+        _circuito.exito()
+        return resultado
+    return CacheHojas(leer, ttl_segundos=TTL_HOJAS_SEGUNDOS, intervalo_refresco=REFRESCO_HOJAS_SEGUNDOS,
+                      al_publicar=lambda h: _respaldo.guardar_espejo(h.df_datos, h.df_metas))
+
+@st.cache_resource(show_spinner=False)
+def obtener_cola_escrituras(tipo, _backend, _cache_hojas, _respaldo):
+    # Escrituras fila por fila en segundo plano; al confirmarse se marca el diario. La instantánea compartida
+    # ya tiene la edición aplicada en sitio: se conserva (se relee por TTL), salvo que en la hoja haya quedado
+    # una fusión con cambios ajenos que la copia local no tiene.
+    def al_confirmar(hoja, llave, ids, fusionada):
+        _respaldo.marcar_enviados(ids)
+        if fusionada:
+            _cache_hojas.invalidar()
+    # Si la fila de la hoja cambió y la edición choca con ella, no se envía: la siguiente lectura trae lo que quedó allá
+    def al_conflicto(hoja, llave, ids):
+        _respaldo.marcar_conflicto(ids)
+        _cache_hojas.invalidar()
+    return ColaEscrituras(_backend.escribir_fila, al_confirmar=al_confirmar, max_reintentos=MAX_REINTENTOS_ESCRITURA,
+                          leer_fila=_backend.leer_fila, columnas={"Datos": COLUMNAS_BD, "Metas": COLUMNAS_METAS}, al_conflicto=al_conflicto)
+
+@st.cache_resource(show_spinner=False)
+def obtener_candado_guardado():
+    # Compare-and-set + upsert de una fila como un solo paso entre todas las sesiones del proceso
+    return threading.Lock()
+
+
+# --- LECTURAS SOBRE CUALQUIER ALMACÉN (también las usa reportes_estaticos.py, sin Estado) ---
+def datos_mes(almacen, anio, mes):
+    registro = almacen.mes(anio, mes)
+    if registro is not None:
+        return {**DEFAULT_DATA, **registro}
+    else: return DEFAULT_DATA.copy()
+
+def metas_anio(almacen, anio):
+    # {clave de persona: meta anual, columna de recompensa: valor}, con los valores por defecto del registro
+    row = almacen.metas(anio) or {}
+    metas = {}
+    for p in REGISTRO_KPIS.personas:
+        metas[p.clave] = p.meta.convertir(row.get(p.meta.columna, p.meta.defecto))
+        if p.recompensa is not None:
+            metas[p.recompensa.columna] = p.recompensa.convertir(row.get(p.recompensa.columna, p.recompensa.defecto))
+    return metas
+
+
+def _al_conectar(nombre):
+    # Atributo que se llena al conectar: el primer acceso (desde cualquier página) conecta y lee
+    return property(lambda self: (self._conectar(), getattr(self, nombre))[1])
+
+
+class Estado:
+    almacen = _al_conectar('_almacen')
+    conexion_exitosa = _al_conectar('_conexion_exitosa')
+    version_datos = _al_conectar('_version_datos')
+    backend = _al_conectar('_backend')
+    cache_hojas = _al_conectar('_cache_hojas')
+    cola_escrituras = _al_conectar('_cola_escrituras')
+
+    def __init__(self):
+        self.respaldo = obtener_respaldo_local()
+        self.circuito = obtener_circuito()
+        self.tipo_backend, self.ruta_backend = configuracion_almacenamiento()
+        self._conectado = False
+        self._conexion_exitosa = False
+        self._backend = self._cache_hojas = self._cola_escrituras = None
+
+    def _conectar(self):
+        if self._conectado:
+            return
+        self._conectado = True
+        try:
+            if not self.circuito.permitir():
+                raise ConnectionError("Google Sheets sigue sin responder; se espera el enfriamiento antes de reintentar.")
+            try:
+                self._backend = obtener_backend(self.tipo_backend, self.ruta_backend)
+            except Exception:
+                self.circuito.fallo()
+                raise
+            if self._backend.lee_hojas_completas:
+                self._cache_hojas = obtener_cache_hojas(self.tipo_backend, self._backend, self.circuito, self.respaldo)
+                self._cola_escrituras = obtener_cola_escrituras(self.tipo_backend, self._backend, self._cache_hojas, self.respaldo)
+                hojas = self._cache_hojas.obtener()
+                # Índice (Año, Mes) construido una sola vez por versión de datos y compartido entre sesiones
+                self._almacen = hojas.derivado('almacen', self._construir_almacen)
+                self._conexion_exitosa = True
+                self._reproducir_diario()
+                self._version_datos = f"{self.tipo_backend}:{hojas.version}"
+            else:
+                self._almacen = obtener_almacen_sql(self.tipo_backend, self.ruta_backend, self._backend)
+                self._conexion_exitosa = True
+                self._version_datos = f"{self.tipo_backend}:{self._almacen.version}"
+        except Exception:
+            self._conexion_exitosa = False
+            self._version_datos = None  # Datos locales sin versión: las gráficas se construyen sin caché compartida
+            # Sin conexión: se sirve al instante la copia local (índice armado una vez por espejo)
+            # + las ediciones del diario posteriores a ella (el upsert es idempotente)
+            self._almacen = self.respaldo.derivado_espejo(lambda espejo: AlmacenRegistros(
+                *(espejo if espejo is not None else (ESQUEMA_DATOS.vacio(), ESQUEMA_METAS.vacio())), COLUMNAS_BD, COLUMNAS_METAS, MESES))
+            for hoja, registro in self.respaldo.posteriores_al_espejo():
+                if hoja == "Datos": self._almacen.upsert_mes(registro)
+                else: self._almacen.upsert_metas(registro)
+            st.sidebar.error("⚠️ Usando respaldo local. Sin conexión a Google Sheets; lo que guardes se enviará al reconectar.")
+
+    def _construir_almacen(self, hojas):
+        with tramo("almacen.construir"):
+            almacen = AlmacenRegistros(hojas.df_datos, hojas.df_metas, COLUMNAS_BD, COLUMNAS_METAS, MESES)
+        # Lo que sigue en la cola aún no está en Sheets: se vuelve a aplicar para no "perder" la edición al releer
+        for registro in self._cola_escrituras.pendientes("Datos"): almacen.upsert_mes(registro)
+        for registro in self._cola_escrituras.pendientes("Metas"): almacen.upsert_metas(registro)
+        return almacen
+
+    def _reproducir_diario(self):
+        # Ediciones hechas sin conexión (o que no alcanzaron a subir antes de un reinicio): se reenvían en orden,
+        # fusionadas con lo que otros hayan guardado mientras tanto (su base viene en el diario)
+        with obtener_candado_guardado():
+            for id_diario, hoja, llave, registro, base in self.respaldo.por_reproducir():
+                vigente = self._vigente(self._almacen, hoja, llave)
+                try:
+                    registro, _ = resolver(hoja, llave, base, registro, vigente, COLUMNAS_BD if hoja == "Datos" else COLUMNAS_METAS)
+                except ConflictoEdicion as e:
+                    self._cola_escrituras.anotar_conflicto(hoja, llave, registro, str(e))
+                    self.respaldo.marcar_conflicto([id_diario])
+                    self.respaldo.encolados.add(id_diario)
+                    continue
+                self._aplicar(self._almacen, hoja, llave, registro, vigente, id_diario)
+
+    # --- LÓGICA DE EXTRACCIÓN DE DATOS ---
+    def get_month_data(self, anio, mes):
+        return datos_mes(self.almacen, anio, mes)
+
+    def get_ytd_data(self, anio):
+        # Totales del año ya precalculados en el cubo de agregados (O(1))
+        with tramo("ytd"):
+            return self.almacen.totales(anio)
+
+    def get_metas_anio(self, anio):
+        return metas_anio(self.almacen, anio)
+
+    def get_fila_metas(self, anio):
+        # La fila de "Metas" como la muestra el formulario (valores por defecto donde falten) con su versión
+        row = self.almacen.metas(anio) or {}
+        return {'Año': anio, **{c.columna: c.convertir(row.get(c.columna, c.defecto)) for c in REGISTRO_KPIS.campos_metas},
+                COLUMNA_VERSION: version(row)}
+
+    def get_proyeccion_anio(self, anio, vigentes=None):
+        # Cierre proyectado de todas las columnas de dinero (caché compartida por versión de datos);
+        # vigentes = (versión, almacén) de datos_vigentes() para proyectar sobre los datos más recientes
+        version, almacen = vigentes or (self.version_datos, self.almacen)
+        return proyeccion(almacen.cubo, anio, version, COLUMNAS_DINERO, MESES, PROYECCION_ANIOS_HISTORIA, PROYECCION_CONFIANZA)
+
+    def datos_vigentes(self):
+        # (versión, almacén) actuales sin releer Sheets: la caché compartida decide cuándo hace falta
+        if self.backend.lee_hojas_completas:
+            hojas_vigentes = self.cache_hojas.obtener()
+            return hojas_vigentes.version, hojas_vigentes.derivado('almacen', self._construir_almacen)
+        return self.almacen.version, self.almacen
+
+    def rechazos(self):
+        """Celdas de Sheets que el esquema no pudo interpretar en la última lectura (None si no hay)."""
+        rechazos = [r for r in self.backend.rechazos.values() if not r.empty] if self.conexion_exitosa else []
+        return pd.concat(rechazos, ignore_index=True) if rechazos else None
+
+    # --- ESCRITURA ---
+    @staticmethod
+    def _vigente(almacen, hoja, llave):
+        # Copia de la fila actual (el upsert la modifica en sitio) o None si aún no existe
+        registro = almacen.mes(*llave) if hoja == "Datos" else almacen.metas(llave)
+        return dict(registro) if registro is not None else None
+
+    def _aplicar(self, almacen, hoja, llave, registro, vigente, id_diario):
+        # Índice compartido + cola hacia Sheets (si hay conexión) con la fila que debería seguir allá
+        if hoja == "Datos":
+            registro = almacen.upsert_mes(registro)
+            fila, columnas = almacen.fila(*llave), COLUMNAS_BD
+        else:
+            registro = almacen.upsert_metas(registro)
+            fila, columnas = almacen.fila_metas(llave), COLUMNAS_METAS
+        if self._conexion_exitosa:
+            self._cache_hojas.registrar_edicion()
+            self._cola_escrituras.encolar(hoja, llave, fila, vigente is None, dict(registro), valores_fila(registro, columnas), esperado=vigente, id_diario=id_diario)
+            self.respaldo.encolados.add(id_diario)
+
+    def guardar_registro(self, hoja, llave, registro_nuevo, base=None, forzar=False):
+        """Compare-and-set de UNA fila contra `base` (la fila tal como la mostró el formulario, ver concurrencia.py).
+
+        Devuelve (registro guardado, columnas que se quedaron con lo que guardó otra persona);
+        ConflictoEdicion si se pisan (con forzar=True, en los campos en conflicto gana registro_nuevo).
+        """
+        columnas = COLUMNAS_BD if hoja == "Datos" else COLUMNAS_METAS
+        if self.conexion_exitosa and not self.backend.lee_hojas_completas:
+            # Motor SQL local: la versión se compara en la misma transacción que escribe (sin cola);
+            # si otra sesión ganó entre la lectura y la escritura, se vuelve a fusionar contra su fila
+            while True:
+                vigente = self._vigente(self.almacen, hoja, llave)
+                registro, ajenas = resolver(hoja, llave, base, registro_nuevo, vigente, columnas, forzar)
+                if self.backend.upsert_si_version(hoja, registro, None if vigente is None else version(vigente)):
+                    return registro, ajenas
+        # Contra el índice de este rerun (sin releer Sheets); si quedó atrás, la cola lo detecta en la fila remota
+        almacen = self.almacen
+        with obtener_candado_guardado():
+            vigente = self._vigente(almacen, hoja, llave)
+            registro, ajenas = resolver(hoja, llave, base, registro_nuevo, vigente, columnas, forzar)
+            # 1) Diario local (durable, con su base)  2) índice compartido  3) cola hacia Sheets
+            id_diario = self.respaldo.registrar(hoja, llave, registro, base=vigente)
+            self._aplicar(almacen, hoja, llave, registro, vigente, id_diario)
+        return registro, ajenas
+
+    def _resolver_lote(self, almacen, registros, bases, forzar):
+        # Cada fila del archivo contra la vigente, como un guardado del ADMIN: (a escribir, versiones esperadas, conflictos)
+        escritos, versiones, conflictos = [], [], []
+        for registro, base in zip(registros, bases):
+            llave = llave_mes(registro['Año'], registro['Mes'])
+            vigente = self._vigente(almacen, "Datos", llave)
+            try:
+                escrito, _ = resolver("Datos", llave, base, registro, vigente, COLUMNAS_BD, forzar)
+            except ConflictoEdicion as e:
+                conflictos.append((registro, base, e))
+                continue
+            escritos.append(escrito)
+            versiones.append(None if vigente is None else version(vigente))
+        return escritos, versiones, conflictos
+
+    def importar_registros(self, registros, bases, forzar=False):
+        """Importación masiva con el compare-and-set de concurrencia.py y todas las filas en UNA escritura.
+
+        bases: cada fila como se vio en la vista previa (PlanImportacion.bases()). Lo que otra persona cambió
+        después se fusiona; si cambió los mismos campos a otros valores esa fila no se escribe.
+        Devuelve (registros escritos, [(registro, base, ConflictoEdicion)]); con forzar=True en esos campos gana el archivo.
+        """
+        if not self.backend.lee_hojas_completas:
+            # Motor SQL: la versión de todas las filas se compara en la misma transacción que escribe
+            while True:
+                escritos, versiones, conflictos = self._resolver_lote(self.almacen, registros, bases, forzar)
+                if self.backend.upsert_lote_si_version("Datos", escritos, versiones):
+                    return escritos, conflictos
+        with obtener_candado_guardado():
+            # Una sola relectura (no una por fila) para ver también lo guardado en otro proceso o a mano en la hoja
+            hojas = self.cache_hojas.refrescar()
+            almacen = self._almacen = hojas.derivado('almacen', self._construir_almacen)
+            escritos, _, conflictos = self._resolver_lote(almacen, registros, bases, forzar)
+            if escritos:
+                cambios = [(almacen.fila(r['Año'], r['Mes']), valores_fila(r, COLUMNAS_BD)) for r in escritos]
+                try:
+                    self.backend.escribir_lote("Datos", [(fila, valores, fila is None) for fila, valores in cambios])
+                except Exception:
+                    self.cache_hojas.invalidar()  # Pudo quedar escrito a medias: la siguiente lectura trae lo que de verdad quedó
+                    raise
+                for registro in escritos: almacen.upsert_mes(registro)
+                self.cache_hojas.registrar_edicion()
+            self._version_datos = f"{self.tipo_backend}:{self.cache_hojas.version}"
+        return escritos, conflictos
@@ -0,0 +1,142 @@
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from kpis import MENSUAL, ACUMULADA
+from metricas import tramo
+
+# ==========================================
+# 📈 GRÁFICAS DE LA VISTA TV (MEMORIZADAS)
+# ==========================================
+# Las figuras solo cambian cuando alguien guarda un mes o una meta de ESA persona,
+# así que su especificación (JSON) se guarda en una caché compartida por todas las
+# sesiones, con llave (sección, año, firma de la sección, metas) y tamaño acotado
+# (se descarta la menos usada al llenarse). La firma (paginas/tv.py) cubre la serie,
+# la meta y la proyección al cierre de la sección: guardar el mes de otra persona
+# cambia la versión de datos pero no la firma, y esta figura sale de la caché.
+# Hay dos tipos de gráfica (MENSUAL y ACUMULADA); cada sección de la TV (SeccionTv
+# en el registro de config.py) elige el suyo, su color y sus textos.
+
+FIGURAS_MAX_ENTRADAS = 64
+
+LAYOUT_BASE = dict(
+    margin=dict(l=10, r=10, t=30, b=10), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+    xaxis=dict(showgrid=False, linecolor='#ddd'), yaxis=dict(showgrid=True, gridcolor='#f4f4f4', showticklabels=False), showlegend=False, hovermode="x unified"
+)
+
+
+def barras_proyeccion(fig, camino, color):
+    # Meses que faltan: barra tenue con la proyección y su banda como barra de error
+    meses, centro, inferior, superior = camino
+    fig.add_trace(go.Bar(
+        x=meses, y=centro, name='Proyección', marker=dict(color=color, line=dict(color=color, width=1)), opacity=0.35,
+        error_y=dict(type='data', symmetric=False, array=superior - centro, arrayminus=centro - inferior, color='#999', thickness=1),
+        hovertemplate='%{x}: $%{y:,.0f} (proyección)<extra></extra>'
+    ))
+    fig.update_layout(barmode='overlay')  # Reales y proyectadas caen en meses distintos: cada barra con su ancho completo
+    return list(meses)
+
+
+def rgba(color, alfa):
+    # '#rrggbb' de la sección -> 'rgba(r, g, b, alfa)' para rellenos y barras semitransparentes
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f'rgba({r}, {g}, {b}, {alfa})'
+
+
+def figura_mensual(tv, meses, serie, camino, meta_mensual):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=meses, y=serie, name=tv.serie,
+        marker=dict(color=rgba(tv.color, 0.8), line=dict(color=tv.color, width=1.5)),
+        text=serie, texttemplate='$%{text:,.2s}', textposition='outside', textfont=dict(size=12, color=tv.color, weight='bold')
+    ))
+    meses = list(meses) + (barras_proyeccion(fig, camino, tv.color) if camino else [])
+    fig.add_trace(go.Scatter(
+        x=meses, y=[meta_mensual]*len(meses), name='Meta Mensual Ideal',
+        mode='lines', line=dict(color='rgba(212, 175, 55, 0.9)', width=2, dash='dash')
+    ))
+    fig.update_layout(
+        title=dict(text=f"{tv.titulo_grafica} (${meta_mensual:,.0f})", font=dict(size=14, color='#555')),
+        height=260, **LAYOUT_BASE
+    )
+    fig.update_traces(cliponaxis=False)
+    return fig
+
+
+def figura_acumulada(tv, meses, acumulado, camino, meta_mensual, meta_anual):
+    fig = go.Figure()
+    todos = list(meses) + ([m for m in camino[0] if m not in meses] if camino else [])
+    meta_acum = meta_mensual * np.arange(1, len(todos) + 1)
+
+    fig.add_trace(go.Scatter(
+        x=meses, y=acumulado, mode='lines+markers+text', fill='tozeroy', fillcolor=rgba(tv.color, 0.1),
+        name=tv.serie, line=dict(color=tv.color, width=3), marker=dict(size=8, color=tv.color, line=dict(width=1.5, color='white')),
+        text=acumulado, texttemplate='$%{text:,.2s}', textposition='top left', textfont=dict(size=11, color=tv.color, weight='bold')
+    ))
+    if camino:
+        # Banda de confianza (superior y luego inferior rellenando hasta ella) y el centro punteado
+        meses_p, centro, inferior, superior = camino
+        fig.add_trace(go.Scatter(x=meses_p, y=superior, mode='lines', line=dict(width=0), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=meses_p, y=inferior, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=rgba(tv.color, 0.12), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(
+            x=meses_p, y=centro, mode='lines+markers', name='Proyección', line=dict(color=tv.color, width=2, dash='dot'), marker=dict(size=5),
+            hovertemplate='%{x}: $%{y:,.0f} (proyección)<extra></extra>'
+        ))
+        fig.add_annotation(x=meses_p[-1], y=centro[-1], text=f"Cierre proyectado: ${centro[-1]:,.0f}", showarrow=False, yshift=12,
+                           xanchor='right', font=dict(color=tv.color, size=12))
+    fig.add_trace(go.Scatter(
+        x=todos, y=meta_acum, name='Trayectoria Ideal',
+        mode='lines', line=dict(color='rgba(212, 175, 55, 0.9)', width=2, dash='dot')
+    ))
+    fig.add_hline(y=meta_anual, line_dash="solid", annotation_text=f"🥇 GRAN META ANUAL: ${meta_anual:,.0f}",
+                  line_color="rgba(200, 0, 0, 0.3)", line_width=1.5, annotation_position="top left", annotation_font=dict(color="red", size=15, weight="bold"))
+
+    fig.update_layout(
+        title=dict(text=tv.titulo_grafica, font=dict(size=14, color='#555')),
+        height=280, **LAYOUT_BASE
+    )
+    fig.update_traces(cliponaxis=False)
+    return fig
+
+
+# Constructor de cada tipo de gráfica (SeccionTv.grafica del registro de KPIs)
+CONSTRUCTORES = {MENSUAL: figura_mensual, ACUMULADA: figura_acumulada}
+
+
+def construir(tv, metas, datos):
+    """Figura de una sección de la TV (la persona.tv del registro) sin pasar por la caché."""
+    return CONSTRUCTORES[tv.grafica](tv, *datos, *metas)
+
+
+@st.cache_data(max_entries=FIGURAS_MAX_ENTRADAS, show_spinner=False)
+def spec_figura(seccion, anio, firma, metas, _tv, _datos):
+    # _tv sale del registro (fijo para cada sección) y _datos (meses, serie y proyección) ya queda
+    # determinado por la firma de la sección: ninguno de los dos forma parte de la llave
+    with tramo("figura.construir"):
+        return construir(_tv, metas, _datos).to_json()
+
+
+def figura(persona, anio, firma, metas, datos):
+    """Figura lista para st.plotly_chart; sin firma (modo sin conexión) se construye sin caché."""
+    with tramo("figura"):
+        if firma is None:
+            return construir(persona.tv, metas, datos)
+        return json.loads(spec_figura(persona.clave, anio, firma, tuple(metas), persona.tv, tuple(datos)))
+
+
+# ==========================================
+# 💵 SIMULADOR DE PAGOS (ADMIN)
+# ==========================================
+def figura_simulacion(metas, valores, pago, parametro):
+    """Mapa de calor del pago total: metas anuales candidatas (filas) x valores del parámetro (columnas)."""
+    fig = go.Figure(go.Heatmap(
+        z=pago, x=valores, y=metas, colorscale='Greens', colorbar=dict(title="Pago $", tickformat="$,.2s"),
+        hovertemplate=f"Meta anual: %{{y}}<br>{parametro}: %{{x}}<br>Pago total: $%{{z:,.0f}}<extra></extra>"
+    ))
+    fig.update_layout(
+        height=420, margin=dict(l=10, r=10, t=10, b=10), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(title=parametro, type='category'), yaxis=dict(title="Meta anual", type='category')
+    )
+    return fig
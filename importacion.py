@@ -0,0 +1,166 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from esquema import COLUMNAS_RECHAZOS, COLUMNA_VERSION
+from metricas import tramo
+
+# ==========================================
+# 📦 IMPORTACIÓN MASIVA Y EXPORTACIÓN POR RANGO DE AÑOS
+# ==========================================
+# Importar muchos (Año, Mes) a la vez desde CSV, Excel o Parquet:
+# 1. leer_archivo(): archivo -> DataFrame crudo (las columnas se reconocen por nombre).
+# 2. planear():      validación vectorizada con el esquema de "Datos" y comparación contra
+#                    lo guardado -> filas nuevas / actualizadas / sin cambios / rechazadas.
+# 3. El ADMIN muestra la vista previa y, al confirmar, todo se escribe en UN solo lote
+#    (BackendAlmacenamiento.escribir_lote) en lugar de un envío por mes.
+# - Las columnas que no vienen en el archivo conservan su valor actual (0 si el mes es nuevo).
+# - Una fila con cualquier celda inválida no se importa (nunca se guarda a medias).
+# - Si un (Año, Mes) se repite en el archivo, gana la última fila.
+# - La "Versión" del archivo (p. ej. de un CSV exportado) se ignora: manda la guardada y al
+#   importar cada fila sube de versión, como un guardado más (ver concurrencia.py).
+# - El plan guarda cada fila tal como se vio en la vista previa (su "base"): al importar se
+#   compara contra la vigente y se fusiona o se reporta en conflicto, igual que en la captura.
+# exportar_csv() genera el CSV año por año, sin armar la tabla completa en memoria.
+
+FORMATOS = {".csv": "CSV", ".xlsx": "Excel", ".xls": "Excel", ".parquet": "Parquet"}
+LLAVE = ['Año', 'Mes']
+
+
+def leer_archivo(nombre, contenido):
+    """DataFrame crudo a partir del nombre y los bytes del archivo subido."""
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{extension}'. Usa {', '.join(FORMATOS)}.")
+    buffer = io.BytesIO(contenido)
+    try:
+        if extension == ".csv":
+            df = pd.read_csv(buffer, skipinitialspace=True)
+        elif extension == ".parquet":
+            df = pd.read_parquet(buffer)
+        else:
+            df = pd.read_excel(buffer)
+    except ImportError as e:  # openpyxl / pyarrow son opcionales: solo se necesitan para ese formato
+        raise ImportError(f"Para leer archivos {FORMATOS[extension]} falta un paquete opcional: {e}") from e
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+class PlanImportacion:
+    """Resultado de validar y comparar un archivo contra lo guardado (aún sin escribir nada)."""
+
+    def __init__(self, nuevos, actualizados, sin_cambios, rechazos, diferencias, ignoradas, previos):
+        self.nuevos = nuevos              # DataFrame: meses que no existen (se agregan al final)
+        self.actualizados = actualizados  # DataFrame: meses existentes con al menos un valor distinto
+        self.previos = previos            # DataFrame: la fila guardada de cada actualizado, como estaba en la vista previa
+        self.sin_cambios = sin_cambios    # filas del archivo idénticas a lo guardado
+        self.rechazos = rechazos          # DataFrame con COLUMNAS_RECHAZOS (fila = fila del archivo)
+        self.diferencias = diferencias    # DataFrame largo: Año, Mes, columna, actual, nuevo
+        self.ignoradas = ignoradas        # columnas del archivo que no son de la hoja
+
+    @property
+    def total(self):
+        return len(self.nuevos) + len(self.actualizados)
+
+    def registros(self):
+        """Registros completos a guardar (tipos nativos de Python), primero los actualizados."""
+        return pd.concat([self.actualizados, self.nuevos], ignore_index=True).to_dict('records')
+
+    def bases(self):
+        """Base del compare-and-set de cada registro de registros() ({} = el mes no existía en la vista previa)."""
+        return self.previos.to_dict('records') + [{}] * len(self.nuevos)
+
+
+def planear(crudo, esquema, actual, origen="archivo"):
+    """PlanImportacion de `crudo` contra `actual` (DataFrame tipado de la hoja "Datos")."""
+    if crudo is None or crudo.empty:
+        raise ValueError("El archivo no tiene filas.")
+    faltan = [c for c in LLAVE if c not in crudo.columns]
+    if faltan:
+        raise ValueError(f"Al archivo le faltan las columnas {', '.join(faltan)}.")
+    presentes = [c for c in esquema.columnas if c in crudo.columns and c != COLUMNA_VERSION]
+    ignoradas = [c for c in crudo.columns if c not in esquema.tipos]
+    columnas_valor = [c for c in esquema.columnas if c not in LLAVE]
+
+    with tramo("importacion.validar"):
+        df, rechazos = esquema.ingerir(crudo[presentes])
+        rechazos = rechazos.assign(hoja=origen)
+        n = len(df)
+        con_rechazo = np.zeros(n, dtype=bool)
+        con_rechazo[rechazos["fila"].to_numpy(dtype=np.intp) - 2] = True
+        sin_anio = (df['Año'].to_numpy() == 0) & ~con_rechazo
+        sin_mes = df['Mes'].isna().to_numpy() & ~con_rechazo
+        validas = ~(con_rechazo | sin_anio | sin_mes)
+        repetidas = np.zeros(n, dtype=bool)
+        repetidas[validas] = df[validas].duplicated(LLAVE, keep='last').to_numpy()
+        extra = [(sin_anio, 'Año', "falta el año"), (sin_mes, 'Mes', "falta el mes"),
+                 (repetidas, 'Mes', "repetida en el archivo (se usa la última)")]
+        extra = [pd.DataFrame({"hoja": origen, "fila": np.flatnonzero(m) + 2, "columna": col,
+                               "valor": crudo[col].astype("string").fillna("").to_numpy(dtype=object)[m], "motivo": motivo})
+                 for m, col, motivo in extra if m.any()]
+        if extra:
+            rechazos = pd.concat([rechazos, *extra], ignore_index=True).sort_values(["fila", "columna"], ignore_index=True)
+
+    with tramo("importacion.comparar"):
+        candidatas = df[validas & ~repetidas].astype({'Año': 'int64', 'Mes': str})
+        base = actual.drop_duplicates(LLAVE, keep='first').astype({'Año': 'int64', 'Mes': str})
+        unido = candidatas.merge(base[esquema.columnas], on=LLAVE, how='left', suffixes=('', '_actual'), indicator=True)
+        existe = (unido['_merge'] == 'both').to_numpy()
+        for c in columnas_valor:
+            if c not in presentes:  # No viene en el archivo: se conserva lo guardado
+                unido[c] = pd.Series(np.where(existe, unido[f"{c}_actual"], unido[c]), index=unido.index).astype(df[c].dtype)
+        nuevo = unido[columnas_valor].to_numpy(dtype=object)
+        previo = unido[[f"{c}_actual" for c in columnas_valor]].to_numpy(dtype=object)
+        distinto = (nuevo != previo) & existe[:, None]
+        cambio = distinto.any(axis=1)
+        filas, cols = np.nonzero(distinto)
+        diferencias = pd.DataFrame({
+            'Año': unido['Año'].to_numpy()[filas], 'Mes': unido['Mes'].to_numpy()[filas],
+            'columna': np.asarray(columnas_valor, dtype=object)[cols], 'actual': previo[filas, cols], 'nuevo': nuevo[filas, cols],
+        })
+        nuevos = unido.loc[~existe, esquema.columnas]
+        orden = np.lexsort((pd.Categorical(nuevos['Mes'], categories=esquema.meses).codes, nuevos['Año'].to_numpy()))
+        nuevos = nuevos.iloc[orden].reset_index(drop=True)
+        actualizados = unido.loc[cambio, esquema.columnas].reset_index(drop=True)
+        previos = unido.loc[cambio, LLAVE + [f"{c}_actual" for c in columnas_valor]].reset_index(drop=True)
+        previos.columns = esquema.columnas
+
+    return PlanImportacion(nuevos, actualizados, int((existe & ~cambio).sum()), rechazos[COLUMNAS_RECHAZOS], diferencias, ignoradas, previos)
+
+
+# ==========================================
+# 📤 EXPORTACIÓN EN BLOQUES
+# ==========================================
+def exportar_csv(almacen, anios, columnas, meses):
+    """Bloques de bytes del CSV: el encabezado y luego un bloque por año (meses en orden calendario)."""
+    yield pd.DataFrame(columns=columnas).to_csv(index=False).encode("utf-8")
+    for anio in anios:
+        df = almacen.anio_df(anio)
+        if df.empty:
+            continue
+        orden = np.argsort(pd.Categorical(df['Mes'].astype(str), categories=meses).codes, kind='stable')
+        yield df.iloc[orden][columnas].to_csv(index=False, header=False).encode("utf-8")
+
+
+class FlujoBytes(io.RawIOBase):
+    """Archivo de solo lectura sobre un generador de bloques de bytes (para st.download_button)."""
+
+    def __init__(self, bloques):
+        self._bloques = iter(bloques)
+        self._resto = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while not self._resto:
+            try:
+                self._resto = next(self._bloques)
+            except StopIteration:
+                return 0
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
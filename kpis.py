@@ -0,0 +1,214 @@
+import numpy as np
+
+# ==========================================
+# 📋 REGISTRO DECLARATIVO DE PERSONAS E INDICADORES
+# ==========================================
+# Cada persona declara:
+# - sus columnas en la hoja "Datos" (Campo, en el orden de la hoja),
+# - su meta anual y su recompensa en la hoja "Metas",
+# - sus KPIs: una o varias condiciones (columna + umbral fijo o meta anual / 12,
+#   normal o inversa) que se cumplen TODAS para marcar el KPI como logrado,
+# - opcionalmente, su sección en la Vista General (SeccionTv).
+# Los paneles individuales (tarjetas y "MI CARTERA"), las secciones de la Vista
+# General (TV) y los formularios del ADMIN se generan a partir de este registro, y EvaluadorKpis calcula el estado de TODOS los KPIs de TODAS
+# las personas para todos los meses en una sola operación vectorizada.
+
+DINERO = "dinero"
+DECIMAL = "decimal"
+ENTERO = "entero"
+PORCENTAJE = "porcentaje"
+TEXTO = "texto"
+
+MENSUAL = "mensual"      # Gráfica de la TV: barras por mes contra la meta mensual
+ACUMULADA = "acumulada"  # Gráfica de la TV: venta acumulada contra el camino a la meta anual
+
+
+class Campo:
+    """Columna capturada cada mes en la hoja "Datos"."""
+
+    def __init__(self, columna, etiqueta, tipo=DECIMAL, max_valor=None):
+        self.columna = columna
+        self.etiqueta = etiqueta
+        self.tipo = tipo
+        self.max_valor = max_valor
+
+    @property
+    def es_entero(self):
+        return self.tipo == ENTERO
+
+    def convertir(self, valor):
+        return int(valor) if self.es_entero else float(valor)
+
+
+class CampoMeta:
+    """Columna de la hoja "Metas" (meta anual o recompensa de una persona)."""
+
+    def __init__(self, columna, etiqueta, defecto, tipo=DINERO, paso=1000.0):
+        self.columna = columna
+        self.etiqueta = etiqueta
+        self.defecto = defecto
+        self.tipo = tipo
+        self.paso = paso
+
+    def convertir(self, valor):
+        return str(valor) if self.tipo == TEXTO else float(valor)
+
+
+class Condicion:
+    """columna >= umbral (o, si es inversa, 0 < columna <= umbral).
+
+    El umbral es un número fijo o, con meta_anual, la meta anual de esa columna de "Metas" / 12.
+    """
+
+    def __init__(self, columna, umbral=None, meta_anual=None, inversa=False, etiqueta=None):
+        if (umbral is None) == (meta_anual is None):
+            raise ValueError(f"La condición sobre '{columna}' necesita un umbral fijo o una meta_anual (solo uno).")
+        self.columna = columna
+        self.umbral = umbral
+        self.meta_anual = meta_anual
+        self.inversa = inversa
+        self.etiqueta = etiqueta or columna
+
+    def umbral_mensual(self, metas):
+        """Umbral resuelto; metas: {columna de "Metas": meta anual} (RegistroKpis.metas_por_columna)."""
+        return self.umbral if self.meta_anual is None else metas[self.meta_anual] / 12
+
+
+class Kpi:
+    def __init__(self, clave, titulo, condiciones, descripcion, premio, formato=None,
+                 textos=("LOGRADO", "EN PROCESO")):
+        self.clave = clave
+        self.titulo = titulo
+        self.condiciones = condiciones if isinstance(condiciones, (list, tuple)) else [condiciones]
+        self.descripcion = descripcion  # admite {meta} (umbral mensual) y {recompensa}
+        self.premio = premio            # ídem
+        self.formato = formato          # DINERO, PORCENTAJE o None (número tal cual)
+        self.textos = textos            # (texto si se cumple, texto si no)
+
+    @property
+    def compuesto(self):
+        return len(self.condiciones) > 1
+
+
+class SeccionTv:
+    """Sección de la Vista General (TV): una columna de dinero contra la meta anual de la persona."""
+
+    def __init__(self, titulo, columna, etiqueta, serie, titulo_grafica, grafica=MENSUAL, color='#004a99', destacada=False):
+        self.titulo = titulo                  # Encabezado de la sección (después del nombre de la persona)
+        self.columna = columna
+        self.etiqueta = etiqueta              # Rótulo del total del año (YTD)
+        self.serie = serie                    # Nombre de la serie real en la gráfica
+        self.titulo_grafica = titulo_grafica  # En las MENSUAL se le agrega la meta mensual
+        self.grafica = grafica                # MENSUAL o ACUMULADA
+        self.color = color                    # Hex (#rrggbb)
+        self.destacada = destacada            # Total en recuadro de color en vez de st.metric
+
+
+class Persona:
+    def __init__(self, clave, nombre, icono, campos, meta, recompensa=None, kpis=(), captura=None,
+                 columnas_panel=3, sucursal="", tv=None):
+        self.clave = clave
+        self.nombre = nombre
+        self.icono = icono
+        self.campos = list(campos)
+        self.meta = meta
+        self.recompensa = recompensa
+        self.kpis = list(kpis)
+        # Filas del formulario de captura (tuplas de columnas); por defecto, de 3 en 3 en el orden de la hoja.
+        columnas = [c.columna for c in self.campos]
+        self.captura = captura or [tuple(columnas[i:i + 3]) for i in range(0, len(columnas), 3)]
+        self.columnas_panel = columnas_panel
+        self.sucursal = sucursal
+        self.tv = tv
+
+    @property
+    def opcion_menu(self):
+        return f"{self.icono} {self.nombre}"
+
+    def campo(self, columna):
+        return next(c for c in self.campos if c.columna == columna)
+
+
+class RegistroKpis:
+    """Personas registradas y el esquema de hojas que se deriva de ellas."""
+
+    def __init__(self, personas):
+        self.personas = list(personas)
+        self.por_clave = {p.clave: p for p in self.personas}
+        self.por_opcion = {p.opcion_menu: p for p in self.personas}
+        if len(self.por_clave) != len(self.personas):
+            raise ValueError("Hay claves de persona repetidas en el registro de KPIs.")
+        self.campos = [c for p in self.personas for c in p.campos]
+        self.columnas_datos = ['Año', 'Mes'] + [c.columna for c in self.campos]
+        self.columnas_enteras = [c.columna for c in self.campos if c.es_entero]
+        self.campos_metas = [p.meta for p in self.personas] + [p.recompensa for p in self.personas if p.recompensa is not None]
+        self.columnas_metas = ['Año'] + [c.columna for c in self.campos_metas]
+        columnas = set(self.columnas_datos)
+        for p in self.personas:
+            for kpi in p.kpis:
+                for cond in kpi.condiciones:
+                    if cond.columna not in columnas:
+                        raise ValueError(f"El KPI '{kpi.clave}' de {p.nombre} usa la columna '{cond.columna}', que no está en la hoja.")
+            if p.tv is not None and p.tv.columna not in columnas:
+                raise ValueError(f"La sección de TV de {p.nombre} grafica la columna '{p.tv.columna}', que no está en la hoja.")
+        self.secciones_tv = [p for p in self.personas if p.tv is not None]
+        self.evaluador = EvaluadorKpis(self)
+
+    @property
+    def sucursales(self):
+        return list(dict.fromkeys(p.sucursal for p in self.personas if p.sucursal))
+
+    def metas_por_columna(self, metas):
+        """Meta anual de cada columna de "Metas" a partir del dict {clave de persona: meta}."""
+        return {p.meta.columna: metas[p.clave] for p in self.personas}
+
+
+# ==========================================
+# ⚡ EVALUACIÓN VECTORIZADA
+# ==========================================
+class EvaluadorKpis:
+    """Estado (logrado / en proceso) de todos los KPIs sobre una matriz de meses.
+
+    Las condiciones de todos los KPIs se aplanan en columnas; con una matriz
+    valores (n_meses x n_condiciones) el resultado es (n_meses x n_kpis) sin
+    ciclos por persona, KPI o mes.
+    """
+
+    def __init__(self, registro):
+        condiciones, inicios, self.claves = [], [], []
+        for p in registro.personas:
+            for kpi in p.kpis:
+                inicios.append(len(condiciones))
+                condiciones.extend(kpi.condiciones)
+                self.claves.append((p.clave, kpi.clave))
+        self.columnas = [c.columna for c in condiciones]
+        self.umbral_fijo = np.array([np.nan if c.umbral is None else float(c.umbral) for c in condiciones])
+        self.inversa = np.array([c.inversa for c in condiciones], dtype=bool)
+        self._por_meta = [(j, c.meta_anual) for j, c in enumerate(condiciones) if c.meta_anual is not None]
+        self._inicios = np.array(inicios, dtype=np.intp)
+        self.indice = {clave: k for k, clave in enumerate(self.claves)}
+
+    def umbrales(self, n, metas):
+        """Umbral de cada condición por fila; metas: {columna de meta: escalar o arreglo (n,) anual}."""
+        umbral = np.tile(self.umbral_fijo, (n, 1))
+        for j, columna in self._por_meta:
+            umbral[:, j] = np.asarray(metas[columna], dtype=float) / 12
+        return umbral
+
+    def evaluar(self, valores, metas):
+        valores = np.asarray(valores, dtype=float)
+        if not self.claves:
+            return np.zeros((len(valores), 0), dtype=bool)
+        umbral = self.umbrales(len(valores), metas)
+        cumple = np.where(self.inversa, (valores <= umbral) & (valores > 0), valores >= umbral)
+        return np.logical_and.reduceat(cumple, self._inicios, axis=1)
+
+    def evaluar_mes(self, registro, metas):
+        """(n_kpis,) para un solo mes, directo de su registro (sin tocar el resto del año)."""
+        valores = np.array([[float(registro.get(c, 0) or 0) for c in self.columnas]])
+        return self.evaluar(valores, metas)[0]
+
+    def evaluar_anio(self, cubo, anio, metas):
+        """(12 x n_kpis) para un año, directo de las series mensuales del cubo (meses sin registro = 0)."""
+        valores = np.column_stack([cubo.mensual(anio, c, solo_presentes=False) for c in self.columnas]) if self.columnas else np.zeros((12, 0))
+        return self.evaluar(valores, metas)
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ==========================================
+# ⏱️ MÉTRICAS DE TIEMPO POR FASE (TRAMOS)
+# ==========================================
+# `with tramo("sheets.leer_datos"):` mide un bloque y lo registra en:
+# - PROCESO: histograma de todo el proceso (todas las sesiones y los hilos de fondo),
+# - la sesión actual (si el bloque corre dentro de un rerun de Streamlit).
+# Cada serie guarda una ventana de las últimas muestras (percentiles "en vivo")
+# y cubetas acumuladas desde el arranque (formato de histograma de Prometheus).
+# Al final de cada rerun se puede emitir una línea JSON con los tramos de ese
+# rerun y escribir el archivo .prom para el textfile collector de node_exporter.
+
+CUBETAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+VENTANA_MUESTRAS = 500
+LLAVE_SESION = "_metricas_sesion"
+
+_log = logging.getLogger("codesa.metricas")
+if not _log.handlers:
+    _manejador = logging.StreamHandler()
+    _manejador.setFormatter(logging.Formatter("%(message)s"))
+    _log.addHandler(_manejador)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+
+
+class SerieTiempos:
+    def __init__(self, ventana=VENTANA_MUESTRAS):
+        self.ventana = deque(maxlen=ventana)
+        self.cubetas = np.zeros(len(CUBETAS_MS) + 1, dtype=np.int64)  # la última es +Inf
+        self.suma = 0.0
+        self.conteo = 0
+
+    def registrar(self, ms):
+        self.ventana.append(ms)
+        self.cubetas[np.searchsorted(CUBETAS_MS, ms)] += 1
+        self.suma += ms
+        self.conteo += 1
+
+    def resumen(self):
+        muestras = np.fromiter(self.ventana, dtype=float)
+        p50, p95, p99 = np.percentile(muestras, [50, 95, 99]) if len(muestras) else (0.0, 0.0, 0.0)
+        return {"muestras": len(muestras), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                "max_ms": muestras.max() if len(muestras) else 0.0, "total": self.conteo}
+
+    def histograma_ventana(self):
+        """Conteo de la ventana por cubeta: {"≤5 ms": n, ..., ">10000 ms": n}."""
+        conteos = np.bincount(np.searchsorted(CUBETAS_MS, np.fromiter(self.ventana, dtype=float)), minlength=len(CUBETAS_MS) + 1)
+        etiquetas = [f"≤{c} ms" for c in CUBETAS_MS] + [f">{CUBETAS_MS[-1]} ms"]
+        return dict(zip(etiquetas, conteos.tolist()))
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def registrar(self, nombre, ms):
+        with self._lock:
+            serie = self._series.get(nombre)
+            if serie is None:
+                serie = self._series[nombre] = SerieTiempos()
+            serie.registrar(ms)
+
+    def nombres(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def resumen(self):
+        """{tramo: {muestras, p50_ms, p95_ms, p99_ms, max_ms, total}} de la ventana de cada tramo."""
+        with self._lock:
+            return {nombre: serie.resumen() for nombre, serie in sorted(self._series.items())}
+
+    def histograma(self, nombre):
+        with self._lock:
+            serie = self._series.get(nombre)
+            return serie.histograma_ventana() if serie is not None else {}
+
+    def prometheus(self, prefijo="codesa_tramo"):
+        """Texto en formato de exposición de Prometheus (histograma acumulado + percentiles de la ventana)."""
+        lineas = [f"# HELP {prefijo}_ms Duración de cada tramo en milisegundos.", f"# TYPE {prefijo}_ms histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+            for nombre, serie in series:
+                acumulado = np.cumsum(serie.cubetas)
+                for limite, n in zip(CUBETAS_MS, acumulado):
+                    lineas.append(f'{prefijo}_ms_bucket{{tramo="{nombre}",le="{limite}"}} {n}')
+                lineas.append(f'{prefijo}_ms_bucket{{tramo="{nombre}",le="+Inf"}} {acumulado[-1]}')
+                lineas.append(f'{prefijo}_ms_sum{{tramo="{nombre}"}} {serie.suma:.3f}')
+                lineas.append(f'{prefijo}_ms_count{{tramo="{nombre}"}} {serie.conteo}')
+            for cuantil in ("p50", "p95", "p99"):
+                lineas.append(f"# HELP {prefijo}_{cuantil}_ms Percentil {cuantil[1:]} de las últimas {VENTANA_MUESTRAS} muestras.")
+                lineas.append(f"# TYPE {prefijo}_{cuantil}_ms gauge")
+                for nombre, serie in series:
+                    lineas.append(f'{prefijo}_{cuantil}_ms{{tramo="{nombre}"}} {serie.resumen()[cuantil + "_ms"]:.3f}')
+        return "\n".join(lineas) + "\n"
+
+    def exportar_prometheus(self, ruta):
+        # Escritura atómica: el collector nunca lee un archivo a medias
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(temporal, ruta)
+
+
+PROCESO = RegistroMetricas()
+
+
+# ==========================================
+# 🧵 SESIÓN Y RERUN ACTUALES
+# ==========================================
+class _MetricasSesion:
+    def __init__(self):
+        self.registro = RegistroMetricas()
+        self.rerun = {}   # tramo -> ms acumulados en el rerun en curso
+
+
+def _sesion():
+    """Métricas de la sesión del rerun en curso, o None si no hay rerun (hilos de fondo, reportes_estaticos.py)."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    if LLAVE_SESION not in st.session_state:
+        st.session_state[LLAVE_SESION] = _MetricasSesion()
+    return st.session_state[LLAVE_SESION]
+
+
+def registrar(nombre, ms):
+    PROCESO.registrar(nombre, ms)
+    sesion = _sesion()
+    if sesion is not None:
+        sesion.registro.registrar(nombre, ms)
+        sesion.rerun[nombre] = sesion.rerun.get(nombre, 0.0) + ms
+
+
+@contextmanager
+def tramo(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def metricas_sesion():
+    sesion = _sesion()
+    return sesion.registro if sesion is not None else RegistroMetricas()
+
+
+def iniciar_rerun():
+    sesion = _sesion()
+    if sesion is not None:
+        sesion.rerun = {}
+    return time.perf_counter()
+
+
+_ultima_exportacion = [0.0]
+
+
+def cerrar_rerun(inicio, log=True, ruta_prometheus=None, intervalo_exportacion=15, **contexto):
+    """Registra el tramo "rerun", emite la línea JSON del rerun y, cada `intervalo_exportacion` s, el archivo .prom."""
+    ms = (time.perf_counter() - inicio) * 1000
+    registrar("rerun", ms)
+    sesion = _sesion()
+    if log:
+        tramos = {k: round(v, 2) for k, v in (sesion.rerun if sesion is not None else {"rerun": ms}).items()}
+        _log.info(json.dumps({"evento": "rerun", "ts": round(time.time(), 3), **contexto, "tramos_ms": tramos},
+                             ensure_ascii=False, default=str))
+    ahora = time.monotonic()
+    if ruta_prometheus and ahora - _ultima_exportacion[0] >= intervalo_exportacion:
+        _ultima_exportacion[0] = ahora
+        try:
+            PROCESO.exportar_prometheus(ruta_prometheus)
+        except OSError as e:
+            _log.warning(json.dumps({"evento": "error_exportar_prometheus", "ruta": ruta_prometheus, "error": str(e)}))
+    return ms
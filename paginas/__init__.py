@@ -0,0 +1,8 @@
+# ==========================================
+# 📄 PÁGINAS DEL TABLERO
+# ==========================================
+# Una por opción del menú; app.py importa solo la que se está mostrando:
+# - tv:       Vista General (también el modo kiosco ?modo=tv). Única que carga plotly.
+# - persona:  panel individual, generado desde el registro de KPIs.
+# - admin:    captura, metas, importación / exportación y diagnóstico.
+# - estilos:  CSS de las tarjetas (lo comparten app.py y reportes_estaticos.py).
@@ -0,0 +1,323 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import importacion
+import metricas
+from concurrencia import ConflictoEdicion
+from config import REGISTRO_KPIS, PLAN_PAGOS, COLUMNAS_BD, MESES, ESQUEMA_DATOS
+from escritura import PENDIENTE, CONFIRMADO, CONFLICTO
+from kpis import TEXTO
+from pagos import Comision
+from metricas import tramo
+
+# Pestañas perezosas: solo se ejecuta la pestaña abierta (st.tabs con estado en "pestana_admin")
+PESTANAS = ["📝 Captura Mensual", "🎯 Configurar Metas y Premios", "💵 Simulador de Pagos", "📦 Importar / Exportar", "📈 Diagnóstico"]
+# Nombre legible de cada columna editable (avisos de fusión y de conflicto al guardar)
+ETIQUETAS = {**{c.columna: c.etiqueta for c in REGISTRO_KPIS.campos},
+             **{p.meta.columna: f"Meta Anual {p.nombre}" for p in REGISTRO_KPIS.personas},
+             **{p.recompensa.columna: p.recompensa.etiqueta for p in REGISTRO_KPIS.personas if p.recompensa is not None}}
+
+
+def estado_guardados_sidebar(estado):
+    # Estado de los guardados en segundo plano (se refresca solo mientras haya algo pendiente)
+    cola_escrituras = estado.cola_escrituras
+    hay_pendientes = any(e[2] == PENDIENTE for e in cola_escrituras.recientes())
+    @st.fragment(run_every=2 if hay_pendientes else None)
+    def estado_guardados():
+        for hoja, llave, estado_envio, intentos, error in cola_escrituras.recientes(5):
+            etiqueta = f"{hoja}: {llave[0]} {llave[1]}" if isinstance(llave, tuple) else f"{hoja}: {llave}"
+            if estado_envio == PENDIENTE: st.caption(f"⏳ {etiqueta} — pendiente" + (f" (reintento {intentos}: {error})" if intentos else ""))
+            elif estado_envio == CONFIRMADO: st.caption(f"✅ {etiqueta} — guardado en Google Sheets")
+            elif estado_envio == CONFLICTO: st.caption(f"⚠️ {etiqueta} — no se envió, chocó con otra edición: {error}")
+            else: st.caption(f"❌ {etiqueta} — falló tras {intentos} intentos: {error}")
+    with st.sidebar.expander("💾 Estado de guardado", expanded=hay_pendientes):
+        estado_guardados()
+
+# --- GUARDADO CON CONCURRENCIA OPTIMISTA (ver concurrencia.py) ---
+def texto_llave(hoja, llave):
+    return f"{llave[1]} {llave[0]}" if hoja == "Datos" else f"las metas de {llave}"
+
+def base_edicion(hoja, llave, actual):
+    # La fila como se mostró al empezar a editar esta llave: base del compare-and-set (solo se renueva al guardar)
+    guardada = st.session_state.get(f"base_{hoja}")
+    if guardada is None or guardada[0] != llave:
+        guardada = st.session_state[f"base_{hoja}"] = (llave, actual)
+    return guardada[1]
+
+def guardar_edicion(estado, hoja, llave, registro, forzar=False):
+    # Si otra persona cambió los mismos campos no se guarda nada: el conflicto se muestra arriba del formulario
+    try:
+        guardado, ajenas = estado.guardar_registro(hoja, llave, registro, st.session_state[f"base_{hoja}"][1], forzar)
+    except ConflictoEdicion as e:
+        st.session_state[f"conflicto_{hoja}"] = (llave, registro, e)
+        st.rerun()
+    st.session_state[f"base_{hoja}"] = (llave, guardado)
+    st.session_state.pop(f"conflicto_{hoja}", None)
+    if ajenas: st.toast(f"🔀 Otra persona guardó {texto_llave(hoja, llave)} mientras editabas; se conservaron sus cambios en: {', '.join(ETIQUETAS.get(c, c) for c in ajenas)}.")
+
+def descartar_edicion(hoja, widgets):
+    # Los widgets vuelven a tomar los valores guardados y la base se renueva en el siguiente render
+    for clave in widgets + [f"base_{hoja}", f"conflicto_{hoja}"]:
+        st.session_state.pop(clave, None)
+
+def panel_conflicto(estado, hoja, llave, widgets):
+    conflicto = st.session_state.get(f"conflicto_{hoja}")
+    if conflicto is None or conflicto[0] != llave:
+        return
+    _, registro, error = conflicto
+    st.error(f"⚠️ Otra persona guardó {texto_llave(hoja, llave)} mientras editabas y cambió los mismos campos con otros valores. No se guardó nada.")
+    st.dataframe(pd.DataFrame({'Campo': [ETIQUETAS.get(c, c) for c in error.conflictos],
+                               'Tu valor': [str(mio) for mio, _ in error.conflictos.values()],
+                               'Valor guardado': [str(suyo) for _, suyo in error.conflictos.values()]}), use_container_width=True, hide_index=True)
+    c_mios, c_suyos = st.columns(2)
+    if c_mios.button("✍️ Guardar con mis valores en esos campos", key=f"forzar_{hoja}"):
+        guardar_edicion(estado, hoja, llave, registro, forzar=True)
+        st.success(f"✅ Se guardó {texto_llave(hoja, llave)} con tus valores en esos campos; el resto de los cambios de la otra persona se conservó.")
+    else:
+        c_suyos.button("↩️ Descartar mis cambios", key=f"descartar_{hoja}", on_click=descartar_edicion, args=(hoja, widgets))
+
+def pestana_captura(estado, anio_seleccionado):
+    mes_seleccionado = st.selectbox("Selecciona el mes a capturar:", MESES, index=0)
+    st.warning(f"Editando registros de: **{mes_seleccionado} {anio_seleccionado}**")
+    llave = (anio_seleccionado, mes_seleccionado)
+    db = estado.get_month_data(anio_seleccionado, mes_seleccionado)
+    base_edicion("Datos", llave, db)
+    # El periodo va en la llave de cada widget: Streamlit reconoce un widget solo por su key y, con la misma,
+    # ignoraría value= al cambiar de mes o de año (se verían y guardarían las cifras del periodo anterior)
+    panel_conflicto(estado, "Datos", llave, [f"cap_{anio_seleccionado}_{mes_seleccionado}_{c.columna}" for c in REGISTRO_KPIS.campos])
+
+    with st.form("form_captura"):
+        capturados = {}
+        for n, persona in enumerate(REGISTRO_KPIS.personas, start=1):
+            if n > 1: st.markdown("---")
+            st.markdown(f"### {n}. Indicadores de {persona.nombre}")
+            for fila in persona.captura:
+                for col, columna in zip(st.columns(len(fila)) if len(fila) > 1 else [st], fila):
+                    campo = persona.campo(columna)
+                    if campo.es_entero: capturados[columna] = col.number_input(campo.etiqueta, value=int(db[columna]), key=f"cap_{anio_seleccionado}_{mes_seleccionado}_{columna}")
+                    else: capturados[columna] = col.number_input(campo.etiqueta, value=float(db[columna]), max_value=campo.max_valor, key=f"cap_{anio_seleccionado}_{mes_seleccionado}_{columna}")
+
+        if st.form_submit_button("💾 GUARDAR REGISTROS MENSUALES"):
+            nuevo_registro = {'Año': anio_seleccionado, 'Mes': mes_seleccionado}
+            nuevo_registro.update({c.columna: c.convertir(capturados[c.columna]) for c in REGISTRO_KPIS.campos})
+
+            # Solo se envía la fila (Año, Mes) editada, en segundo plano, si nadie pisó los mismos campos
+            guardar_edicion(estado, "Datos", llave, nuevo_registro)
+
+            if estado.conexion_exitosa and not estado.backend.lee_hojas_completas:
+                st.success(f"✅ Guardado en la base de datos local ({estado.backend.nombre}).")
+            elif estado.conexion_exitosa:
+                st.success("✅ Registro guardado. Enviando a Google Sheets en segundo plano (ver 💾 Estado de guardado).")
+            else:
+                st.success("✅ Guardado en el respaldo local. Se enviará a Google Sheets al recuperar la conexión.")
+
+def pestana_metas(estado, anio_seleccionado):
+    st.info(f"💡 Ajusta las metas y recompensas específicas para el año **{anio_seleccionado}**.")
+    metas_actuales = estado.get_metas_anio(anio_seleccionado)
+    base_edicion("Metas", anio_seleccionado, estado.get_fila_metas(anio_seleccionado))
+    panel_conflicto(estado, "Metas", anio_seleccionado, [f"{prefijo}_{anio_seleccionado}_{p.clave}" for p in REGISTRO_KPIS.personas for prefijo in ("meta", "recompensa")])
+
+    with st.form("form_metas"):
+        metas_capturadas = {}
+        for n, persona in enumerate(REGISTRO_KPIS.personas):
+            if n > 0: st.markdown("---")
+            st.markdown(f"#### {persona.opcion_menu}")
+            c_meta, c_recompensa = st.columns(2)
+            metas_capturadas[persona.meta.columna] = c_meta.number_input(f"Meta Anual {persona.nombre} ({persona.meta.etiqueta})", value=float(metas_actuales[persona.clave]), step=persona.meta.paso, key=f"meta_{anio_seleccionado}_{persona.clave}")
+            recompensa = persona.recompensa
+            if recompensa is None: continue
+            if recompensa.tipo == TEXTO: metas_capturadas[recompensa.columna] = c_recompensa.text_input(recompensa.etiqueta, value=metas_actuales[recompensa.columna], key=f"recompensa_{anio_seleccionado}_{persona.clave}")
+            else: metas_capturadas[recompensa.columna] = c_recompensa.number_input(recompensa.etiqueta, value=float(metas_actuales[recompensa.columna]), step=recompensa.paso, key=f"recompensa_{anio_seleccionado}_{persona.clave}")
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.form_submit_button("🎯 GUARDAR METAS Y PREMIOS"):
+            nuevo_registro_meta = {'Año': anio_seleccionado}
+            nuevo_registro_meta.update({c.columna: c.convertir(metas_capturadas[c.columna]) for c in REGISTRO_KPIS.campos_metas})
+
+            guardar_edicion(estado, "Metas", anio_seleccionado, nuevo_registro_meta)
+
+            if estado.conexion_exitosa:
+                st.success(f"✅ Nuevas metas y premios para {anio_seleccionado} enviadas a la nube en segundo plano.")
+                st.rerun()
+            else:
+                st.success("✅ Metas guardadas en el respaldo local.")
+                st.rerun()
+
+def base_pagos(estado):
+    # Totales anuales y metas de TODOS los años para el motor de pagos (se arman una vez por versión de datos)
+    version = estado.version_datos
+    guardada = st.session_state.get('base_pagos')
+    if version is None or guardada is None or guardada[0] != version:
+        almacen = estado.almacen
+        with tramo("pagos.base"):
+            anios, totales = almacen.cubo.totales_por_anio(PLAN_PAGOS.columnas)
+            guardada = (version, anios, totales, PLAN_PAGOS.metas_por_anio(almacen.metas_df(), anios))
+        st.session_state['base_pagos'] = guardada
+    return guardada[1:]
+
+def pestana_simulador(estado, anio_seleccionado):
+    import graficas  # plotly solo se carga al abrir el simulador
+    anios, totales, metas = base_pagos(estado)
+    if not anios:
+        st.caption("Aún no hay capturas para calcular pagos.")
+        return
+    formato_dinero = {c: st.column_config.NumberColumn(format="dollar") for c in [p.nombre for p in PLAN_PAGOS.personas] + ['Total']}
+    st.markdown("#### 💵 Pagos por año con las reglas actuales")
+    st.caption("Comisiones y bonos de cada año con sus metas guardadas (tasas en config.py → PLAN_PAGOS).")
+    st.dataframe(PLAN_PAGOS.tabla_anual(anios, totales, metas), use_container_width=True, hide_index=True, height=250, column_config=formato_dinero)
+
+    st.markdown("---")
+    st.markdown("#### 🧪 ¿Qué pasa si...? Metas y tasas candidatas sobre los años capturados")
+    metas_actuales = estado.get_metas_anio(anio_seleccionado)
+    c_persona, c_regla = st.columns(2)
+    persona = c_persona.selectbox("Persona:", [p for p in PLAN_PAGOS.personas if PLAN_PAGOS.columna_meta[p.clave]], format_func=lambda p: p.opcion_menu, key="sim_persona")
+    regla = c_regla.selectbox("Regla a variar:", PLAN_PAGOS.reglas_de(persona.clave), format_func=lambda r: r.descripcion, key="sim_regla")
+    desde, hasta = (st.select_slider("Años a simular:", options=anios, value=(anios[0], anios[-1]), key="sim_anios")
+                    if len(anios) > 1 else (anios[0], anios[0]))
+    c_metas, c_valores, c_puntos = st.columns([2, 2, 1])
+    meta_actual = metas_actuales[persona.clave]
+    pct_meta = c_metas.slider(f"Meta anual candidata (% de la de {anio_seleccionado}: ${meta_actual:,.0f})", 10, 300, (50, 150), step=5, key="sim_pct_meta")
+    if isinstance(regla, Comision):
+        tasas = c_valores.slider("Tasa candidata (%)", 0.0, 20.0, (0.0, min(round(regla.tasa * 200, 1), 20.0)), step=0.5, key=f"sim_tasa_{regla.clave}")
+    else:
+        base = max(float(metas_actuales.get(regla.monto, 0)), 1000.0)
+        montos = c_valores.slider("Monto candidato del bono ($)", 0.0, base * 5, (0.0, base * 2), step=base / 20, key=f"sim_monto_{regla.clave}")
+    puntos = c_puntos.number_input("Puntos por eje", 3, 51, 21, key="sim_puntos")
+
+    metas_candidatas = meta_actual * np.linspace(*pct_meta, puntos) / 100
+    valores = np.linspace(*tasas, puntos) / 100 if isinstance(regla, Comision) else np.linspace(*montos, puntos)
+    filas = (np.asarray(anios) >= desde) & (np.asarray(anios) <= hasta)
+    pago, alcanzados = PLAN_PAGOS.simular(totales[filas], {c: m[filas] for c, m in metas.items()}, persona.clave, regla, metas_candidatas, valores)
+
+    etiquetas_valor = [f"{v:.2%}" for v in valores] if isinstance(regla, Comision) else [f"${v:,.0f}" for v in valores]
+    etiquetas_meta = [f"${m:,.0f}" for m in metas_candidatas]
+    n_anios = int(filas.sum())
+    st.caption(f"Pago total de {persona.nombre} en {n_anios} año(s) ({desde}–{hasta}) por meta anual (filas) y {regla.parametro.lower()} de «{regla.descripcion}» (columnas).")
+    st.plotly_chart(graficas.figura_simulacion(etiquetas_meta, etiquetas_valor, pago, regla.parametro), use_container_width=True)
+    tabla = pd.DataFrame(pago, index=pd.Index(etiquetas_meta, name="Meta anual"), columns=etiquetas_valor)
+    tabla.insert(0, "Años con meta", alcanzados)
+    with st.expander("📋 Tabla de la simulación"):
+        st.dataframe(tabla, use_container_width=True, column_config={v: st.column_config.NumberColumn(format="dollar") for v in etiquetas_valor})
+
+def importar(estado, registros, bases, forzar=False):
+    # Los meses que otra persona cambió en los mismos campos después de la vista previa no se escriben: van al panel
+    with tramo("importacion.escribir"): escritos, conflictos = estado.importar_registros(registros, bases, forzar)
+    st.session_state.pop('plan_importacion', None)
+    if conflictos: st.session_state['conflictos_importacion'] = conflictos
+    else: st.session_state.pop('conflictos_importacion', None)
+    return escritos
+
+def panel_conflictos_importacion(estado):
+    conflictos = st.session_state.get('conflictos_importacion')
+    if not conflictos:
+        return
+    st.error(f"⚠️ {len(conflictos)} mes(es) del archivo no se importaron: otra persona los guardó después de la vista previa "
+             "y cambió los mismos campos con otros valores.")
+    st.dataframe(pd.DataFrame([{'Mes': texto_llave("Datos", e.llave), 'Campo': ETIQUETAS.get(c, c), 'Valor del archivo': str(mio), 'Valor guardado': str(suyo)}
+                               for _, _, e in conflictos for c, (mio, suyo) in e.conflictos.items()]), use_container_width=True, hide_index=True)
+    c_mios, c_suyos = st.columns(2)
+    if c_mios.button("✍️ Importar con los valores del archivo en esos campos", key="forzar_importacion"):
+        registros, bases, _ = zip(*conflictos)
+        escritos = importar(estado, list(registros), list(bases), forzar=True)
+        st.success(f"✅ Se importaron {len(escritos)} mes(es) con los valores del archivo en esos campos; el resto de los cambios de la otra persona se conservó.")
+    else:
+        c_suyos.button("↩️ Conservar lo guardado", key="descartar_importacion", on_click=st.session_state.pop, args=('conflictos_importacion', None))
+
+def pestana_masivo(estado):
+    almacen = estado.almacen
+    st.markdown("#### 📥 Importación masiva de capturas mensuales")
+    st.caption(f"CSV, Excel o Parquet con las columnas **Año** y **Mes** y cualquiera de: {', '.join(REGISTRO_KPIS.columnas_datos[2:])}. "
+               "Las columnas que no vengan conservan su valor actual; una fila con alguna celda inválida no se importa.")
+    archivo = st.file_uploader("Archivo a importar", type=[e.lstrip(".") for e in importacion.FORMATOS], key="archivo_importacion")
+    if archivo is not None:
+        # El plan se recalcula solo si cambia el archivo o la versión de los datos
+        clave_plan = (archivo.file_id, estado.version_datos)
+        if st.session_state.get('plan_importacion', (None,))[0] != clave_plan:
+            try:
+                plan = importacion.planear(importacion.leer_archivo(archivo.name, archivo.getvalue()), ESQUEMA_DATOS, almacen.datos_df(), origen=archivo.name)
+            except (ValueError, ImportError) as e:
+                plan = e
+            st.session_state['plan_importacion'] = (clave_plan, plan)
+        plan = st.session_state['plan_importacion'][1]
+        if isinstance(plan, Exception):
+            st.error(f"❌ No se pudo leer el archivo: {plan}")
+        else:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Nuevos", len(plan.nuevos)); c2.metric("Actualizados", len(plan.actualizados))
+            c3.metric("Sin cambios", plan.sin_cambios); c4.metric("Celdas rechazadas", len(plan.rechazos))
+            if plan.ignoradas: st.caption(f"Columnas ignoradas (no son de la hoja): {', '.join(plan.ignoradas)}")
+            if not plan.nuevos.empty:
+                with st.expander(f"➕ {len(plan.nuevos)} mes(es) nuevos"): st.dataframe(plan.nuevos, use_container_width=True, hide_index=True)
+            if not plan.diferencias.empty:
+                with st.expander(f"✏️ {len(plan.diferencias)} valor(es) que cambian en {len(plan.actualizados)} mes(es)"): st.dataframe(plan.diferencias, use_container_width=True, hide_index=True)
+            if not plan.rechazos.empty:
+                with st.expander(f"⚠️ {len(plan.rechazos)} celda(s) rechazadas (fila = fila del archivo)"): st.dataframe(plan.rechazos, use_container_width=True, hide_index=True)
+            conexion_exitosa = estado.conexion_exitosa
+            en_cola = conexion_exitosa and estado.backend.lee_hojas_completas and bool(estado.cola_escrituras.pendientes("Datos"))
+            if not conexion_exitosa: st.warning("La importación masiva necesita conexión: sin ella solo se puede exportar.")
+            elif en_cola: st.info("⏳ Hay capturas enviándose en segundo plano; espera a que terminen para importar.")
+            if st.button(f"📥 IMPORTAR {plan.total} REGISTRO(S)", disabled=not plan.total or not conexion_exitosa or en_cola):
+                try:
+                    escritos = importar(estado, plan.registros(), plan.bases())
+                except Exception as e:
+                    st.error(f"❌ La importación falló: {e}")
+                else:
+                    st.success(f"✅ {len(escritos)} mes(es) importados en una sola escritura."
+                               + (" Los que chocaron con otra edición se muestran abajo." if st.session_state.get('conflictos_importacion') else ""))
+    panel_conflictos_importacion(estado)
+
+    st.markdown("---")
+    st.markdown("#### 📤 Exportar capturas por rango de años")
+    anios_con_datos = almacen.anios()
+    if not anios_con_datos:
+        st.caption("Aún no hay capturas para exportar.")
+    else:
+        desde, hasta = (st.select_slider("Años a exportar:", options=anios_con_datos, value=(anios_con_datos[0], anios_con_datos[-1]))
+                        if len(anios_con_datos) > 1 else (anios_con_datos[0], anios_con_datos[0]))
+        anios_exportar = [a for a in anios_con_datos if desde <= a <= hasta]
+        # El CSV se genera por años solo al hacer clic (sin rerun del tablero)
+        st.download_button("⬇️ Descargar CSV", data=lambda: importacion.FlujoBytes(importacion.exportar_csv(almacen, anios_exportar, COLUMNAS_BD, MESES)),
+                           file_name=f"capturas_codesa_{desde}_{hasta}.csv", mime="text/csv", on_click="ignore")
+
+def pestana_diagnostico(rechazos):
+    st.info("⏱️ Tiempo de cada fase de los últimos reruns (ventana de las últimas muestras). "
+            "`sheets.*` = llamadas a Google Sheets, `ingesta.*` = conversión tipada de cada hoja, `rerun` = script completo.")
+    for titulo, registro in (("Esta sesión", metricas.metricas_sesion()), ("Proceso (todas las sesiones)", metricas.PROCESO)):
+        st.markdown(f"#### {titulo}")
+        resumen = registro.resumen()
+        if not resumen:
+            st.caption("Aún no hay mediciones.")
+            continue
+        st.dataframe(pd.DataFrame.from_dict(resumen, orient='index').rename_axis('Fase').round(1), use_container_width=True)
+        fase = st.selectbox("Histograma de la fase:", list(resumen), index=list(resumen).index('rerun') if 'rerun' in resumen else 0, key=f"hist_{titulo}")
+        st.bar_chart(pd.Series(registro.histograma(fase), name="Reruns"))
+    if rechazos is not None:
+        st.markdown("#### Celdas rechazadas en la última lectura")
+        st.dataframe(rechazos, use_container_width=True, hide_index=True)
+    st.download_button("⬇️ Métricas en formato Prometheus", metricas.PROCESO.prometheus(), file_name="metricas_codesa.prom", mime="text/plain")
+
+
+def mostrar(estado, anio_seleccionado):
+    st.title(f"🔐 Panel de Administración: {anio_seleccionado}")
+
+    tab_captura, tab_metas, tab_simulador, tab_masivo, tab_diagnostico = st.tabs(PESTANAS, key="pestana_admin", on_change="rerun")
+
+    # Celdas de Sheets que el esquema no pudo interpretar (quedaron en 0 / vacías, ver pestaña Diagnóstico)
+    rechazos = estado.rechazos()
+    if rechazos is not None:
+        st.warning(f"⚠️ {len(rechazos)} celda(s) de Google Sheets no se pudieron interpretar y se tomaron como 0. Detalle en 📈 Diagnóstico.")
+
+    if estado.conexion_exitosa and estado.backend.lee_hojas_completas:
+        estado_guardados_sidebar(estado)
+
+    if tab_captura.open:
+        with tab_captura: pestana_captura(estado, anio_seleccionado)
+    if tab_metas.open:
+        with tab_metas: pestana_metas(estado, anio_seleccionado)
+    if tab_simulador.open:
+        with tab_simulador: pestana_simulador(estado, anio_seleccionado)
+    if tab_masivo.open:
+        with tab_masivo: pestana_masivo(estado)
+    if tab_diagnostico.open:
+        with tab_diagnostico: pestana_diagnostico(rechazos)
@@ -0,0 +1,24 @@
+# ==========================================
+# 🎨 ESTILOS VISUALES (CSS)
+# ==========================================
+# Compartidos por la app (app.py) y los reportes estáticos (reportes_estaticos.py):
+# las tarjetas (user-card, money-card, kpi-*, badge-*) se ven igual en ambos.
+CSS = """
+    <style>
+    :root { --codesa-black: #121212; --molub-blue: #004a99; --biothan-green: #009640; --gold-bonus: #d4af37; --text-dark: #333333; }
+    [data-testid="stSidebar"] { background-color: var(--codesa-black); }
+    [data-testid="stSidebar"] * { color: white !important; }
+    h1, h2, h3 { color: var(--codesa-black) !important; font-weight: 700 !important; }
+    .corporate-subtitle { color: var(--molub-blue); font-weight: 600; margin-top: -10px; margin-bottom: 25px; }
+    .user-card { background-color: white; padding: 20px; border-radius: 12px; border-top: 6px solid var(--molub-blue); box-shadow: 0px 4px 12px rgba(0,0,0,0.08); text-align: center; margin-bottom: 20px; height: 100%; display: flex; flex-direction: column; justify-content: space-between; }
+    .money-card { background-color: #fffbf0; border-top: 6px solid var(--gold-bonus); padding: 20px; border-radius: 12px; text-align: center; box-shadow: 0px 4px 12px rgba(0,0,0,0.1); margin-bottom: 20px; }
+    .kpi-label { font-size: 15px; color: var(--text-dark); font-weight: 700; text-transform: uppercase; margin-bottom: 8px; min-height: 55px; display: flex; align-items: center; justify-content: center;}
+    .kpi-value { font-size: 28px; font-weight: 800; color: var(--codesa-black); margin: 5px 0; }
+    .kpi-meta { font-size: 12px; color: var(--molub-blue); margin-bottom: 5px; font-weight: bold; background-color: #f0f7ff; padding: 6px; border-radius: 6px; border: 1px solid #dbeafe; min-height: 45px; display: flex; align-items: center; justify-content: center; line-height: 1.2; }
+    .kpi-bonus { font-size: 11px; color: #856404; background-color: #fff3cd; border: 1px solid #ffeeba; padding: 4px; border-radius: 4px; margin-bottom: 10px; font-weight: bold; }
+    .badge { padding: 8px 10px; border-radius: 8px; font-weight: bold; font-size: 13px; display: block; width: 100%; margin-top: auto;}
+    .badge-success { background-color: #e6f4ea; color: var(--biothan-green); border: 2px solid var(--biothan-green); }
+    .badge-danger { background-color: #fee2e2; color: #991b1b; border: 2px solid #f87171; }
+    @media (max-width: 768px) { .kpi-value { font-size: 24px !important; } .user-card { padding: 15px; margin-bottom: 15px; } }
+    </style>
+"""
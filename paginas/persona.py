@@ -0,0 +1,96 @@
+import functools
+
+import streamlit as st
+
+from config import REGISTRO_KPIS, PLAN_PAGOS, MESES, PROYECCION_CONFIANZA
+from kpis import DINERO, PORCENTAJE, TEXTO
+from pagos import Bono
+
+
+# --- FUNCIONES VISUALES DE TARJETAS ---
+def texto_umbral(condicion, metas):
+    # Umbral resuelto (fijo o meta anual / 12); metas: {columna de "Metas": meta anual}
+    umbral = condicion.umbral_mensual(metas)
+    return f"{umbral:g}" if condicion.meta_anual is None else f"{umbral:,.0f}"
+
+def tarjeta_kpi(kpi, valores, cumplio, contexto):
+    # HTML de la tarjeta de un KPI del registro; el estado (cumplio) ya viene del evaluador vectorizado
+    estilo = "badge-success" if cumplio else "badge-danger"
+    texto = kpi.textos[0] if cumplio else kpi.textos[1]
+    icon = "✅" if cumplio else "⚠️"
+    if kpi.compuesto:
+        detalle = "<br>".join(f"{c.etiqueta}: <b>{valores[c.columna]}</b>/{texto_umbral(c, contexto['metas'])}" for c in kpi.condiciones)
+        cuerpo = f"""<div style="font-size:14px; text-align:left; padding-left:20px;">{detalle}</div>"""
+    else:
+        actual = valores[kpi.condiciones[0].columna]
+        val_fmt = f"${actual:,.2f}" if kpi.formato == DINERO else (f"{actual}%" if kpi.formato == PORCENTAJE else f"{actual}")
+        cuerpo = f"""<div class="kpi-value">{val_fmt}</div>"""
+    return f"""<div class="user-card"><div class="kpi-label">{kpi.titulo}</div><div class="kpi-meta">{kpi.descripcion.format(**contexto)}</div>{cuerpo}<div class="kpi-bonus">🎁 {kpi.premio.format(**contexto)}</div><div class="{estilo}">{icon} {texto}</div></div>"""
+
+def mostrar_kpi(kpi, valores, cumplio, contexto):
+    st.markdown(tarjeta_kpi(kpi, valores, cumplio, contexto), unsafe_allow_html=True)
+
+def kpis_persona(persona, valores, metas_actuales):
+    # ([(kpi, cumplio)] en orden del panel, contexto de los textos y umbrales); directo del registro del mes (no hace falta leer el resto del año)
+    metas = REGISTRO_KPIS.metas_por_columna(metas_actuales)
+    estado = REGISTRO_KPIS.evaluador.evaluar_mes(valores, metas)
+    contexto = {'meta': metas_actuales[persona.clave] / 12, 'recompensa': metas_actuales.get(persona.recompensa.columna) if persona.recompensa else "", 'metas': metas}
+    return [(kpi, bool(estado[REGISTRO_KPIS.evaluador.indice[(persona.clave, kpi.clave)]])) for kpi in persona.kpis], contexto
+
+def panel_persona(persona, valores, metas_actuales):
+    kpis, contexto = kpis_persona(persona, valores, metas_actuales)
+    for i in range(0, len(kpis), persona.columnas_panel):
+        for col, (kpi, cumplio) in zip(st.columns(persona.columnas_panel), kpis[i:i + persona.columnas_panel]):
+            with col: mostrar_kpi(kpi, valores, cumplio, contexto)
+
+def pie_proyeccion(proy, metas, claves, detalle=""):
+    # Comisiones/bonos con los totales proyectados a diciembre (centro y banda) al pie de la tarjeta
+    if not proy.disponible: return ""
+    centro, inferior, superior = (sum(PLAN_PAGOS.del_anio(proy.totales_cierre(i), metas)[c] for c in claves) for i in range(3))
+    return f"""<div style="margin-top:10px; font-size:13px; color:#555;">🔮 Proyección al cierre: <b>${centro:,.2f}</b> (rango {PROYECCION_CONFIANZA:.0%}: ${inferior:,.0f} – ${superior:,.0f}){detalle}</div>"""
+
+def cifra(etiqueta, valor, tamano=24, color="#121212"):
+    return f"""<div><div style="font-size:12px;">{etiqueta}</div><div style="font-size:{tamano}px; font-weight:bold; color:{color};">{valor}</div></div>"""
+
+def cartera_acumulada(persona, anio_seleccionado, ytd, metas, proy):
+    # Una cifra por regla de PLAN_PAGOS de la persona (mismas reglas que el simulador del ADMIN) y el avance a su meta anual
+    reglas, pagos = PLAN_PAGOS.reglas_de(persona.clave), PLAN_PAGOS.del_anio(ytd, metas)
+    meta_anual, columna = metas[persona.clave], PLAN_PAGOS.columna_meta[persona.clave]
+    alcanzado = float(ytd.get(columna, 0) or 0) if columna else 0.0
+    cifras, comisiones = [], [r for r in reglas if not isinstance(r, Bono)]
+    for r in reglas:
+        if isinstance(r, Bono):
+            ganado = meta_anual > 0 and alcanzado >= meta_anual
+            estado_bono = f"🔓 ¡GANADO! ${metas[r.monto]:,.0f}" if ganado else "🔒 Pendiente de alcanzar"
+            cifras.append(cifra(f"{r.descripcion} (${metas[r.monto]:,.0f})", estado_bono, 20, "#009640" if ganado else "#888"))
+        else:
+            cifras.append(cifra(r.descripcion, f"${pagos[r.clave]:,.2f}"))
+    if len(comisiones) > 1:
+        cifras.append(cifra("TOTAL ACUMULADO", f"${sum(pagos[r.clave] for r in comisiones):,.2f}", 30, "#d4af37"))
+    progreso, detalle = "", ""
+    if columna and meta_anual > 0:
+        pct = min(alcanzado / meta_anual, 1.0) * 100
+        recompensa = persona.recompensa
+        titulo = f"✈️ Progreso {metas[recompensa.columna]}" if recompensa is not None and recompensa.tipo == TEXTO else "🎯 Progreso a la Meta Anual"
+        progreso = f"""<div style="margin-top:10px; background:white; padding:10px; border-radius:8px;"><div style="font-weight:bold;">{titulo} (Meta: ${meta_anual:,.0f})</div><div style="background:#eee; height:15px; border-radius:10px;"><div style="background:#009640; width:{pct}%; height:100%; border-radius:10px;"></div></div><div style="font-size:11px; text-align:right;">Monto Alcanzado: ${alcanzado:,.0f} ({pct:.1f}%)</div></div>"""
+        if columna in proy.columnas:
+            cierre = proy.cierre(columna)[0]
+            detalle = f" · a diciembre: ${cierre:,.0f} ({min(cierre / meta_anual, 1.0):.0%} de la meta)"
+    pie = pie_proyeccion(proy, metas, [r.clave for r in reglas], detalle)
+    return f"""<div class="money-card"><h3 style="color:#d4af37 !important;">💰 MI CARTERA {anio_seleccionado} (ACUMULADA)</h3><div style="display:flex; justify-content:space-around; align-items:center;">{"".join(cifras)}</div>{progreso}{pie}</div>"""
+
+# HTML de la tarjeta de dinero acumulado (y proyectado a diciembre) de cada persona con reglas en PLAN_PAGOS;
+# las personas sin reglas de pago solo muestran sus KPIs
+CARTERAS = {p.clave: functools.partial(cartera_acumulada, p) for p in PLAN_PAGOS.personas}
+
+
+# --- PANEL INDIVIDUAL (generado desde el registro) ---
+def mostrar(estado, persona, anio_seleccionado):
+    # Solo lo que usa el panel: el registro del mes, las metas del año y (si tiene cartera) sus totales
+    mes_seleccionado = st.sidebar.selectbox("🗓️ Mes Operativo:", MESES, index=0)
+    db = estado.get_month_data(anio_seleccionado, mes_seleccionado)
+    metas_actuales = estado.get_metas_anio(anio_seleccionado)
+    st.title(f"{persona.opcion_menu} - {mes_seleccionado} {anio_seleccionado}")
+    if persona.clave in CARTERAS:
+        st.markdown(CARTERAS[persona.clave](anio_seleccionado, estado.get_ytd_data(anio_seleccionado), metas_actuales, estado.get_proyeccion_anio(anio_seleccionado)), unsafe_allow_html=True)
+    panel_persona(persona, db, metas_actuales)
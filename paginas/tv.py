@@ -0,0 +1,107 @@
+import hashlib
+
+import streamlit as st
+
+import graficas  # plotly solo se carga cuando alguien abre la Vista General
+from config import REGISTRO_KPIS, TV_INTERVALO_SEGUNDOS, PROYECCION_CONFIANZA
+from kpis import ACUMULADA
+from metricas import tramo
+
+
+# --- VISTA TV: FIRMAS POR SECCIÓN Y VIGILANCIA DE VERSIÓN ---
+def firma_seccion(persona, cubo, anio, metas, proy):
+    # Todo lo que dibuja la sección: serie del año, meta y proyección (cierre y camino; también cambian
+    # si se corrige un año anterior). Misma firma = misma sección, aunque otra persona haya guardado
+    columna = persona.tv.columna
+    camino = camino_tv(proy, columna, persona.tv.grafica == ACUMULADA)
+    return (anio, tuple(cubo.meses_con_datos(anio)), cubo.mensual(anio, columna).tobytes(), metas.get(persona.meta.columna),
+            proy.cierre(columna), camino and (tuple(camino[0]), *(serie.tobytes() for serie in camino[1:])))
+
+def firmas_tv(alm, anio, proy):
+    # Si ninguna firma cambió, la pantalla no se redibuja
+    metas = alm.metas(anio) or {}
+    return {p.clave: firma_seccion(p, alm.cubo, anio, metas, proy) for p in REGISTRO_KPIS.secciones_tv}
+
+def llave_figura(firma):
+    # Llave de la caché de figuras: cada gráfica se reconstruye solo cuando cambia SU sección
+    return hashlib.sha1(repr(firma).encode()).hexdigest()
+
+def texto_proyeccion(proy, columna):
+    centro, inferior, superior = proy.cierre(columna)
+    return f"🔮 Cierre proyectado: **${centro:,.0f}** (rango {PROYECCION_CONFIANZA:.0%}: ${inferior:,.0f} – ${superior:,.0f})"
+
+def camino_tv(proy, columna, acumulado=False):
+    return proy.camino(columna, acumulado) if proy.disponible else None
+
+# Sección de cada persona con tv en el registro: título y columna graficada (también los usa reportes_estaticos.py)
+TITULOS = {p.clave: f"{p.icono} {p.nombre.upper()} | {p.tv.titulo}" for p in REGISTRO_KPIS.secciones_tv}
+COLUMNAS = {p.clave: p.tv.columna for p in REGISTRO_KPIS.secciones_tv}
+
+def argumentos_figura(cubo, anio, seccion, proy, meta_anual):
+    # (metas, datos) de graficas.figura: las ACUMULADA son la venta acumulada contra la meta anual
+    columna, meses = COLUMNAS[seccion], cubo.meses_con_datos(anio)
+    if REGISTRO_KPIS.por_clave[seccion].tv.grafica == ACUMULADA:
+        return (meta_anual / 12, meta_anual), (meses, cubo.acumulado(anio, columna), camino_tv(proy, columna, acumulado=True))
+    return (meta_anual / 12,), (meses, cubo.mensual(anio, columna), camino_tv(proy, columna))
+
+@st.fragment(run_every=TV_INTERVALO_SEGUNDOS)
+def vigilar_version_tv(estado, anio):
+    # Se ejecuta solo cada TV_INTERVALO_SEGUNDOS; si la versión no cambió no hace absolutamente nada
+    if not estado.conexion_exitosa:
+        # Solo se consulta: el intento de prueba lo hace _conectar en el rerun (permitir() aquí lo gastaría)
+        if estado.circuito.puede_reintentar(): st.rerun()
+        return
+    version, alm = estado.datos_vigentes()
+    if version == st.session_state.get('tv_version'):
+        return
+    st.session_state['tv_version'] = version
+    if firmas_tv(alm, anio, estado.get_proyeccion_anio(anio, (version, alm))) != st.session_state.get('tv_firmas'):
+        st.rerun()  # Solo se reconstruyen las gráficas de las secciones cuya firma cambió (el resto sale de la caché)
+
+def seccion_tv(persona, anio, ytd, meta_anual, cubo, proy, firma):
+    tv, columna = persona.tv, persona.tv.columna
+    st.markdown(f"### {TITULOS[persona.clave]}")
+    col_1, col_2 = st.columns([1, 3])
+    with col_1:
+        if tv.destacada:
+            st.markdown(f"""<div style="background-color:{graficas.rgba(tv.color, 0.1)}; padding:15px; border-radius:10px; text-align:center; border:1px solid {tv.color};">
+                <div style="color:{tv.color}; font-weight:bold; font-size:13px;">{tv.etiqueta}</div>
+                <div style="font-size:32px; font-weight:800; color:#121212;">${ytd[columna]:,.0f}</div></div>""", unsafe_allow_html=True)
+            st.markdown("<br>", unsafe_allow_html=True)
+        else:
+            st.metric(tv.etiqueta, f"${ytd[columna]:,.0f}")
+        pct = min((ytd[columna] / meta_anual), 1.0) if meta_anual > 0 else 0
+        st.progress(pct)
+        st.caption(f"Meta Anual: ${meta_anual:,.0f} ({pct*100:.1f}%)")
+        if proy.disponible: st.caption(texto_proyeccion(proy, columna))
+    with col_2:
+        if cubo.meses_con_datos(anio):
+            fig = graficas.figura(persona, anio, firma, *argumentos_figura(cubo, anio, persona.clave, proy, meta_anual))
+            with tramo("plotly_chart"): st.plotly_chart(fig, use_container_width=True)
+        else: st.info("Aún no hay datos de ventas registrados para este año.")
+
+# ==========================================
+# 📊 PANELES PRINCIPALES (DASHBOARD TV MEJORADO)
+# ==========================================
+def mostrar(estado, anio_seleccionado, modo_tv):
+    st.markdown(f"<h1 style='text-align:center'>DASHBOARD ESTRATÉGICO {anio_seleccionado}</h1>", unsafe_allow_html=True)
+    st.markdown("---")
+
+    almacen = estado.almacen
+    ytd = estado.get_ytd_data(anio_seleccionado)
+    metas_actuales = estado.get_metas_anio(anio_seleccionado)
+    proy = estado.get_proyeccion_anio(anio_seleccionado)  # Todas las columnas de dinero, una vez por versión de datos
+
+    firmas = firmas_tv(almacen, anio_seleccionado, proy)
+    if estado.conexion_exitosa:
+        st.session_state['tv_version'] = estado.datos_vigentes()[0]
+        st.session_state['tv_firmas'] = firmas
+    if modo_tv:
+        vigilar_version_tv(estado, anio_seleccionado)
+
+    # --- UNA SECCIÓN POR PERSONA (en el orden del registro; series directo del cubo, meses en orden calendario) ---
+    for i, persona in enumerate(REGISTRO_KPIS.secciones_tv):
+        if i: st.markdown("---")
+        # Sin versión (modo sin conexión) la figura se construye sin caché
+        firma = llave_figura(firmas[persona.clave]) if estado.version_datos is not None else None
+        seccion_tv(persona, anio_seleccionado, ytd, metas_actuales[persona.clave], almacen.cubo, proy, firma)
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from kpis import TEXTO
+from metricas import tramo
+
+# ==========================================
+# 💵 COMISIONES Y BONOS (MOTOR VECTORIZADO + SIMULADOR "¿QUÉ PASA SI?")
+# ==========================================
+# Las reglas de pago se declaran en config.py (PLAN_PAGOS) junto al registro de personas:
+# - Comision: tasa x total anual de una columna de "Datos" (p. ej. 5% de m_ventas_nuevos)
+# - Bono:     monto de "Metas" (p. ej. bono_david) si el total anual de la columna ligada
+#             a la meta de la persona (la condición del KPI con meta_anual) la alcanza
+# calcular() evalúa TODAS las reglas para TODOS los años en una sola pasada:
+# totales (n_años x n_columnas) -> pagos (n_años x n_reglas), sin ciclo por año ni por persona.
+# simular() barre una rejilla de metas anuales candidatas x valores candidatos de una regla
+# (la tasa de una comisión o el monto de un bono) sobre los años elegidos con broadcasting:
+# años x metas -> suma por meta -> pago total (n_metas x n_valores), sin ciclo por celda.
+
+
+class Comision:
+    parametro = "Tasa"
+
+    def __init__(self, clave, persona, columna, tasa, etiqueta):
+        self.clave = clave
+        self.persona = persona
+        self.columna = columna
+        self.tasa = tasa
+        self.etiqueta = etiqueta
+
+    @property
+    def descripcion(self):
+        return f"{self.etiqueta} ({self.tasa:.0%})"
+
+
+class Bono:
+    parametro = "Monto del bono"
+
+    def __init__(self, clave, persona, monto, etiqueta):
+        self.clave = clave
+        self.persona = persona
+        self.monto = monto       # columna de "Metas" con el monto
+        self.etiqueta = etiqueta
+        self.meta = None         # columna de "Metas" con la meta anual (la de la persona)
+        self.columna = None      # columna de "Datos" que se compara contra la meta
+
+    @property
+    def descripcion(self):
+        return self.etiqueta
+
+
+class PlanPagos:
+    """Reglas de pago de todas las personas, resueltas contra el registro de KPIs."""
+
+    def __init__(self, registro, reglas):
+        self.registro = registro
+        self.reglas = list(reglas)
+        self.claves = [r.clave for r in self.reglas]
+        self.por_clave = {r.clave: r for r in self.reglas}
+        if len(set(self.claves)) != len(self.claves):
+            raise ValueError("Hay claves repetidas en las reglas de pago.")
+        # Meta anual de cada persona -> columna que la alcanza (de las condiciones con meta_anual)
+        columna_de_meta = {c.meta_anual: c.columna for p in registro.personas for k in p.kpis for c in k.condiciones if c.meta_anual}
+        self.columna_meta = {p.clave: columna_de_meta.get(p.meta.columna) for p in registro.personas}
+        for r in self.reglas:
+            if r.persona not in registro.por_clave:
+                raise ValueError(f"La regla de pago '{r.clave}' es de '{r.persona}', que no está en el registro.")
+            if isinstance(r, Bono):
+                r.meta = registro.por_clave[r.persona].meta.columna
+                r.columna = self.columna_meta[r.persona]
+                if r.columna is None:
+                    raise ValueError(f"El bono '{r.clave}' necesita un KPI de {r.persona} con meta_anual='{r.meta}'.")
+        self.personas = [p for p in registro.personas if any(r.persona == p.clave for r in self.reglas)]
+        self.columnas = list(dict.fromkeys([r.columna for r in self.reglas] + [c for c in self.columna_meta.values() if c]))
+        self._i = {c: j for j, c in enumerate(self.columnas)}
+        self._defectos = {c.columna: float(c.defecto) for c in registro.campos_metas if c.tipo != TEXTO}
+
+        comisiones = [(k, r) for k, r in enumerate(self.reglas) if isinstance(r, Comision)]
+        bonos = [(k, r) for k, r in enumerate(self.reglas) if isinstance(r, Bono)]
+        self._pos_com = np.array([k for k, _ in comisiones], dtype=np.intp)
+        self._i_com = np.array([self._i[r.columna] for _, r in comisiones], dtype=np.intp)
+        self._tasas = np.array([r.tasa for _, r in comisiones], dtype=float)
+        self._pos_bono = np.array([k for k, _ in bonos], dtype=np.intp)
+        self._i_bono = np.array([self._i[r.columna] for _, r in bonos], dtype=np.intp)
+        self._bonos = [r for _, r in bonos]
+        # (n_reglas x n_personas): suma los pagos de cada persona con un producto de matrices
+        self._indicador = np.array([[r.persona == p.clave for p in self.personas] for r in self.reglas], dtype=float).reshape(len(self.reglas), -1)
+
+    def reglas_de(self, persona):
+        return [r for r in self.reglas if r.persona == persona]
+
+    # --- ENTRADAS ---
+    def metas_por_anio(self, metas_df, anios):
+        """{columna de "Metas": (n_años,)} alineado con `anios` (años sin fila = valores por defecto)."""
+        if metas_df is None or metas_df.empty:
+            return {c: np.full(len(anios), d) for c, d in self._defectos.items()}
+        df = metas_df.drop_duplicates('Año', keep='first')
+        df = df.set_index(df['Año'].astype(int)).reindex(list(anios))
+        return {c: pd.to_numeric(df[c], errors='coerce').fillna(d).to_numpy(dtype=float) if c in df.columns else np.full(len(anios), d)
+                for c, d in self._defectos.items()}
+
+    def metas_de_anio(self, metas):
+        """Lo mismo para un año, a partir del dict de Estado.get_metas_anio ({clave de persona: meta, recompensa: valor})."""
+        por_columna = {**{c: metas[c] for c in self._defectos if c in metas}, **self.registro.metas_por_columna(metas)}
+        return {c: np.array([float(v)]) for c, v in por_columna.items()}
+
+    # --- CÁLCULO ---
+    def calcular(self, totales, metas):
+        """(n_años x n_reglas) de pagos; totales: (n_años x len(columnas)), metas: de metas_por_anio()."""
+        totales = np.asarray(totales, dtype=float).reshape(-1, len(self.columnas))
+        n = len(totales)
+        with tramo("pagos.calcular"):
+            pagos = np.zeros((n, len(self.reglas)))
+            pagos[:, self._pos_com] = totales[:, self._i_com] * self._tasas
+            if self._bonos:
+                meta = np.column_stack([metas[r.meta] for r in self._bonos])
+                monto = np.column_stack([metas[r.monto] for r in self._bonos])
+                pagos[:, self._pos_bono] = np.where(totales[:, self._i_bono] >= meta, monto, 0.0)
+        return pagos
+
+    def por_persona(self, pagos):
+        return pagos @ self._indicador
+
+    def del_anio(self, ytd, metas):
+        """{clave de regla: monto} de un año, con sus totales (dict) y las metas de Estado.get_metas_anio."""
+        totales = np.array([[float(ytd.get(c, 0) or 0) for c in self.columnas]])
+        return dict(zip(self.claves, self.calcular(totales, self.metas_de_anio(metas))[0].tolist()))
+
+    def tabla_anual(self, anios, totales, metas):
+        """DataFrame Año x persona (+ Total) con lo pagado en cada año."""
+        por_persona = self.por_persona(self.calcular(totales, metas))
+        df = pd.DataFrame(por_persona, columns=[p.nombre for p in self.personas])
+        df.insert(0, 'Año', np.asarray(anios, dtype=int))
+        df['Total'] = por_persona.sum(axis=1)
+        return df
+
+    # --- SIMULACIÓN ---
+    def simular(self, totales, metas, persona, regla, metas_candidatas, valores):
+        """(pago total n_metas x n_valores, años que alcanzan cada meta (n_metas,)) sumando las filas de `totales`.
+
+        Se reemplazan la meta anual de `persona` por cada meta candidata y el parámetro de
+        `regla` (tasa o monto) por cada valor; el resto de sus reglas queda como está.
+        """
+        totales = np.asarray(totales, dtype=float).reshape(-1, len(self.columnas))
+        g = np.asarray(metas_candidatas, dtype=float)
+        v = np.asarray(valores, dtype=float)
+        with tramo("pagos.simular"):
+            # Se suma sobre los años ANTES de abrir la rejilla: (n_años x n_metas) -> (n_metas,) y luego (n_metas x n_valores)
+            alcanza = totales[:, self._i[self.columna_meta[persona]], None] >= g[None, :]   # (n_años x n_metas)
+            fijo = np.zeros(len(g))
+            for r in self.reglas_de(persona):
+                if r.clave == regla.clave:
+                    continue
+                if isinstance(r, Comision): fijo += totales[:, self._i[r.columna]].sum() * r.tasa
+                else: fijo += np.where(alcanza, metas[r.monto][:, None], 0.0).sum(axis=0)
+            if isinstance(regla, Comision):
+                variable = totales[:, self._i[regla.columna]].sum() * v[None, :]        # (1 x n_valores)
+            else:
+                variable = alcanza.sum(axis=0)[:, None] * v[None, :]                    # (n_metas x n_valores)
+            pago = fijo[:, None] + variable
+        return pago, alcanza.sum(axis=0)
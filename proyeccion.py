@@ -0,0 +1,121 @@
+from statistics import NormalDist
+
+import numpy as np
+import streamlit as st
+
+from metricas import tramo
+
+# ==========================================
+# 🔮 PROYECCIÓN AL CIERRE DEL AÑO (CON BANDA DE CONFIANZA)
+# ==========================================
+# Para todas las columnas de dinero a la vez (matrices 12 x n_columnas, sin ciclo por persona):
+# 1. Estacionalidad: peso de cada mes en los `historia` años anteriores con capturas
+#    (1 = un mes promedio; sin historia todos los meses pesan igual).
+# 2. Nivel: lo real de los meses transcurridos (enero .. último mes capturado) entre la suma
+#    de sus pesos; si el año aún no tiene capturas, el de los años anteriores.
+# 3. Cierre = acumulado + nivel x pesos de los meses que faltan. La banda suma la varianza
+#    de los residuos de cada mes que falta y la incertidumbre del nivel estimado (aprox. normal).
+# El resultado se guarda en una caché compartida con llave (año, versión de datos, columnas):
+# la pantalla TV y las tarjetas de cartera no lo recalculan mientras nadie guarde nada.
+
+PROYECCIONES_MAX_ENTRADAS = 64
+
+
+class Proyeccion:
+    def __init__(self, columnas, meses, transcurridos, actual, mensual, acumulado, muestras):
+        self.columnas = list(columnas)
+        self.meses = list(meses)
+        self.transcurridos = transcurridos  # meses de enero al último capturado
+        self.actual = actual                # (n_columnas,) acumulado real a la fecha
+        self.mensual = mensual              # (centro, inferior, superior), cada uno (meses que faltan x n_columnas)
+        self.acumulado = acumulado          # ídem, acumulado del año
+        self.muestras = muestras            # meses usados para estimar el nivel (0 = no hay con qué proyectar)
+        self._j = {c: j for j, c in enumerate(self.columnas)}
+
+    @property
+    def disponible(self):
+        """Hay algo que proyectar: faltan meses y hay con qué estimar el nivel."""
+        return self.transcurridos < len(self.meses) and self.muestras > 0
+
+    def cierre(self, columna):
+        """(centro, inferior, superior) del total a diciembre."""
+        j = self._j[columna]
+        if not self.disponible:
+            return (float(self.actual[j]),) * 3
+        return tuple(float(serie[-1, j]) for serie in self.acumulado)
+
+    def totales_cierre(self, cual=0):
+        """{columna: total a diciembre} (cual: 0 = centro, 1 = inferior, 2 = superior), p. ej. para PLAN_PAGOS.del_anio."""
+        return {c: self.cierre(c)[cual] for c in self.columnas}
+
+    def camino(self, columna, acumulado=False):
+        """(meses que faltan, centro, inferior, superior) mes a mes; el acumulado arranca en el último mes real."""
+        j = self._j[columna]
+        meses = self.meses[self.transcurridos:]
+        series = [s[:, j] for s in (self.acumulado if acumulado else self.mensual)]
+        if acumulado and self.transcurridos:
+            meses = [self.meses[self.transcurridos - 1]] + meses
+            series = [np.concatenate(([self.actual[j]], s)) for s in series]
+        return (meses, *series)
+
+
+def proyectar(cubo, anio, columnas, meses, historia=3, confianza=0.8):
+    with tramo("proyeccion.calcular"):
+        n_meses, columnas = len(meses), list(columnas)
+        real = np.column_stack([cubo.mensual(anio, c, solo_presentes=False) for c in columnas]).reshape(n_meses, len(columnas))
+        presentes = [meses.index(m) for m in cubo.meses_con_datos(anio) if m in meses]
+        k = max(presentes) + 1 if presentes else 0
+        anteriores = [a for a in range(anio - historia, anio) if cubo.meses_con_datos(a)]
+        pasado = np.stack([np.column_stack([cubo.mensual(a, c, solo_presentes=False) for c in columnas]) for a in anteriores]) if anteriores else None
+
+        # 1. Pesos estacionales (n_meses x n_columnas): lo de cada mes en la historia / el mes promedio
+        pesos = np.ones((n_meses, len(columnas)))
+        if pasado is not None:
+            suma_mes, promedio = pasado.sum(axis=0), pasado.sum(axis=(0, 1)) / n_meses
+            pesos = np.divide(suma_mes, promedio, out=pesos, where=promedio > 0)
+
+        # 2. Nivel = lo real / los pesos de esos meses (con los meses transcurridos o, si no hay, con la historia);
+        #    la dispersión son los residuos contra nivel x peso, de este año y de la historia juntos
+        def residuos(valores, w):
+            nivel = np.divide(valores.sum(axis=0), w.sum(axis=0), out=np.zeros(len(columnas)), where=w.sum(axis=0) > 0)
+            return nivel, valores - nivel * w
+        historia_plana = (pasado.reshape(-1, len(columnas)), np.tile(pesos, (len(anteriores), 1))) if pasado is not None else None
+        valores, w = (real[:k], pesos[:k]) if k else (historia_plana or (np.zeros((0, len(columnas))),) * 2)
+        n = len(valores)
+        nivel, resto = residuos(valores, w)
+        if k and historia_plana is not None:
+            resto = np.concatenate([resto, residuos(*historia_plana)[1]])
+        # Grados de libertad: el nivel y, si hay historia, los pesos de cada mes salen de los mismos datos
+        libres = len(resto) - 1 - (n_meses if pasado is not None else 0)
+        varianza = (resto ** 2).sum(axis=0) / libres if libres > 0 else np.zeros(len(columnas))
+        # Cada mes que falta hereda además el error de su peso (estimado con len(anteriores) años)
+        var_mes = varianza * (1 + 1 / len(anteriores)) if anteriores else varianza
+        suma_w = w.sum(axis=0)
+        var_nivel = np.divide(varianza * n, suma_w ** 2, out=np.zeros(len(columnas)), where=suma_w > 0)
+
+        # 3. Meses que faltan: centro y banda, mensual y acumulada
+        actual = real[:k].sum(axis=0)
+        futuros = pesos[k:]
+        z = NormalDist().inv_cdf(0.5 + confianza / 2)
+        mensual = nivel * futuros
+        banda_mensual = z * np.sqrt(var_mes + var_nivel * futuros ** 2)
+        acumulado = actual + np.cumsum(mensual, axis=0)
+        adelante = np.arange(1, len(futuros) + 1)[:, None]
+        banda_acumulada = z * np.sqrt(var_mes * adelante + var_nivel * np.cumsum(futuros, axis=0) ** 2)
+    return Proyeccion(columnas, meses, k, actual,
+                      (mensual, np.maximum(mensual - banda_mensual, 0), mensual + banda_mensual),
+                      (acumulado, np.maximum(acumulado - banda_acumulada, actual), acumulado + banda_acumulada), n)
+
+
+@st.cache_data(max_entries=PROYECCIONES_MAX_ENTRADAS, show_spinner=False)
+def _proyeccion_memo(anio, version, columnas, meses, historia, confianza, _cubo):
+    # _cubo no forma parte de la llave: su contenido ya queda determinado por la versión
+    return proyectar(_cubo, anio, list(columnas), list(meses), historia, confianza)
+
+
+def proyeccion(cubo, anio, version, columnas, meses, historia=3, confianza=0.8):
+    """Proyección del año (compartida por versión de datos); sin versión (modo sin conexión) se calcula sin caché."""
+    with tramo("proyeccion"):
+        if version is None:
+            return proyectar(cubo, anio, columnas, list(meses), historia, confianza)
+        return _proyeccion_memo(anio, version, tuple(columnas), tuple(meses), historia, confianza, cubo)
@@ -0,0 +1,315 @@
+"""Reportes estáticos de los tableros: la Vista General (TV) y el panel de cada persona, por año y mes.
+
+Genera un sitio HTML (index.html + <año>/<mes>-<panel>.html) con cada panel "al cierre" de
+cada mes de cada año de ANIOS: solo con lo capturado de enero a ese mes (YTD, cartera y
+proyección al cierre como se veían entonces). Usa las mismas funciones que la app
+(graficas.construir, paginas.tv, tarjetas de paginas.persona, proyeccion.proyectar).
+
+- Las hojas se leen UNA sola vez (backend de secrets.toml / config.py, o el respaldo local).
+- Los trabajos (año, mes, panel) se reparten en un pool de procesos; cada proceso recibe
+  las hojas una vez al arrancar y arma el índice de cada periodo una sola vez.
+- Incremental: <ruta>/manifiesto.json guarda la huella de lo que entra en cada reporte
+  (filas del periodo + años de historia de la proyección, metas y el código que los dibuja);
+  solo se vuelven a generar los que cambiaron o cuyos archivos faltan.
+- --png exporta además cada gráfica de la TV como PNG (requiere kaleido, opcional); las
+  tarjetas de los paneles son solo HTML.
+
+Uso (desde la raíz del repo):
+    python reportes_estaticos.py
+    python reportes_estaticos.py --anios 2026 2027 --procesos 4 --png
+    python reportes_estaticos.py --origen respaldo      # sin conexión: copia local de la última lectura + diario
+    python reportes_estaticos.py --todo                 # ignora el manifiesto y regenera todo
+"""
+import argparse
+import functools
+import hashlib
+import html
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+import graficas
+import kpis
+import pagos
+import proyeccion
+from almacen import AlmacenRegistros
+from cache_hojas import firma_dataframe
+from config import (REGISTRO_KPIS, ANIOS, MESES, COLUMNA_VERSION, COLUMNAS_BD, COLUMNAS_METAS, COLUMNAS_DINERO, ESQUEMA_DATOS, ESQUEMA_METAS,
+                    PROYECCION_ANIOS_HISTORIA, PROYECCION_CONFIANZA, RUTA_RESPALDO_LOCAL, RUTA_REPORTES, REPORTES_PROCESOS, OPCION_TV)
+from estado import configuracion_almacenamiento, obtener_backend, datos_mes, metas_anio
+from paginas import estilos, persona as pagina_persona, tv as pagina_tv
+from paginas.estilos import CSS
+from proyeccion import proyectar
+from respaldo_local import RespaldoLocal
+
+PANEL_TV = "tv"
+MANIFIESTO = "manifiesto.json"
+# Lo que dibuja los reportes: si cambia cualquiera de estos archivos se regenera todo
+MODULOS_REPORTE = [config, kpis, pagos, proyeccion, graficas, estilos, pagina_persona, pagina_tv, sys.modules[__name__]]
+
+PLANTILLA = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>{titulo}</title>{scripts}{css}
+<style>body {{ font-family: sans-serif; max-width: 1200px; margin: auto; padding: 20px; }} .seccion {{ display: flex; gap: 20px; align-items: center; }}
+.seccion > :first-child {{ flex: 1; }} .seccion > :last-child {{ flex: 3; }} .rejilla {{ display: grid; gap: 20px; }} .nota {{ color: #555; font-size: 13px; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #ddd; padding: 6px 10px; font-size: 13px; }} td.vacio {{ color: #aaa; }}</style></head>
+<body>{cuerpo}</body></html>"""
+
+
+# ==========================================
+# 📥 LECTURA ÚNICA DE LAS HOJAS
+# ==========================================
+def leer_hojas(origen, tipo=None, ruta=None):
+    """(df_datos, df_metas) completos: del backend configurado o del respaldo local (espejo + diario)."""
+    if origen == "respaldo":
+        respaldo = RespaldoLocal(RUTA_RESPALDO_LOCAL, tipar=lambda d, m: (ESQUEMA_DATOS.ingerir(d)[0], ESQUEMA_METAS.ingerir(m)[0]))
+        espejo = respaldo.leer_espejo()
+        if espejo is None:
+            raise SystemExit(f"No hay copia local en {RUTA_RESPALDO_LOCAL}: abre la app con conexión al menos una vez.")
+        almacen = AlmacenRegistros(*espejo, COLUMNAS_BD, COLUMNAS_METAS)
+        for hoja, registro in respaldo.posteriores_al_espejo():
+            if hoja == "Datos": almacen.upsert_mes(registro)
+            else: almacen.upsert_metas(registro)
+        return almacen.datos_df(), almacen.metas_df()
+    conf_tipo, conf_ruta = configuracion_almacenamiento()
+    return obtener_backend(tipo or conf_tipo, ruta or conf_ruta).leer_hojas()
+
+
+# ==========================================
+# 🧮 PERIODOS, HUELLAS Y MANIFIESTO
+# ==========================================
+def paneles():
+    return [PANEL_TV] + [p.clave for p in REGISTRO_KPIS.personas]
+
+
+def recorte_periodo(df_datos, anio, mes):
+    """Filas que ve un reporte al cierre de `mes`: el año hasta ese mes y los años de historia de la proyección."""
+    if df_datos.empty:
+        return df_datos
+    anios = df_datos['Año'].astype(int)
+    en_anio = (anios == anio) & df_datos['Mes'].astype(str).isin(MESES[:MESES.index(mes) + 1])
+    return df_datos[en_anio | anios.between(anio - PROYECCION_ANIOS_HISTORIA, anio - 1)]
+
+
+def huella(df_datos, df_metas, anio, mes, panel, codigo, png):
+    # La TV y las carteras dependen del periodo completo; un panel sin cartera solo del registro del mes
+    if panel == PANEL_TV or panel in pagina_persona.CARTERAS:
+        datos = recorte_periodo(df_datos, anio, mes)
+    else:
+        datos = df_datos[(df_datos['Año'].astype(int) == anio) & (df_datos['Mes'].astype(str) == mes)] if not df_datos.empty else df_datos
+    metas = df_metas[df_metas['Año'].astype(int) == anio] if not df_metas.empty else df_metas
+    # La versión de la fila no cambia lo que se dibuja (volver a guardar lo mismo no regenera nada)
+    partes = [firma_dataframe(datos.drop(columns=[COLUMNA_VERSION], errors='ignore').reset_index(drop=True)),
+              firma_dataframe(metas.drop(columns=[COLUMNA_VERSION], errors='ignore').reset_index(drop=True)), codigo, str(png and panel == PANEL_TV)]
+    return hashlib.sha1("|".join(partes).encode()).hexdigest()
+
+
+def huella_codigo():
+    sha = hashlib.sha1()
+    for modulo in MODULOS_REPORTE:
+        with open(modulo.__file__, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def archivo(anio, mes, panel, extension="html", seccion=None):
+    # Ruta relativa a la carpeta del sitio: <año>/<01..12>-<panel>[-<sección>].<ext>
+    return f"{anio}/{MESES.index(mes) + 1:02d}-{panel}{f'-{seccion}' if seccion else ''}.{extension}"
+
+
+def leer_manifiesto(ruta):
+    try:
+        with open(os.path.join(ruta, MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def escribir_manifiesto(ruta, manifiesto):
+    # Escritura atómica: un corte a la mitad no deja un manifiesto corrupto
+    temporal = os.path.join(ruta, MANIFIESTO + ".tmp")
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporal, os.path.join(ruta, MANIFIESTO))
+
+
+# ==========================================
+# 🖨️ RENDER (DENTRO DE CADA PROCESO DEL POOL)
+# ==========================================
+_HOJAS = None
+
+
+def _iniciar_proceso(df_datos, df_metas):
+    # Las hojas llegan una vez por proceso (no con cada trabajo)
+    global _HOJAS
+    _HOJAS = (df_datos, df_metas)
+
+
+@functools.lru_cache(maxsize=4)
+def _periodo(anio, mes):
+    # Índice, metas y proyección del periodo: una vez por (año, mes) aunque se dibujen varios paneles
+    df_datos, df_metas = _HOJAS
+    almacen = AlmacenRegistros(recorte_periodo(df_datos, anio, mes), df_metas, COLUMNAS_BD, COLUMNAS_METAS, MESES)
+    proy = proyectar(almacen.cubo, anio, COLUMNAS_DINERO, MESES, PROYECCION_ANIOS_HISTORIA, PROYECCION_CONFIANZA)
+    return almacen, metas_anio(almacen, anio), proy
+
+
+def pagina(titulo, cuerpo, plotly=False):
+    scripts = '<script src="../plotly.min.js"></script>' if plotly else ""
+    return PLANTILLA.format(titulo=html.escape(titulo), scripts=scripts, css=CSS,
+                            cuerpo=f'<p><a href="../index.html">← Índice de reportes</a></p>{cuerpo}')
+
+
+def barra(pct):
+    return (f'<div style="background:#eee; height:12px; border-radius:6px;"><div style="background:#009640; width:{pct * 100:.1f}%; '
+            f'height:100%; border-radius:6px;"></div></div>')
+
+
+def cuerpo_tv(anio, mes, almacen, metas, proy, ruta, png):
+    ytd, cubo = almacen.totales(anio), almacen.cubo
+    partes = [f"<h1 style='text-align:center'>DASHBOARD ESTRATÉGICO {anio}</h1><p class='nota' style='text-align:center'>Al cierre de {mes} {anio}</p><hr>"]
+    for seccion, titulo in pagina_tv.TITULOS.items():
+        columna, meta_anual = pagina_tv.COLUMNAS[seccion], metas[seccion]
+        pct = min(ytd[columna] / meta_anual, 1.0) if meta_anual > 0 else 0
+        # texto_proyeccion es markdown de Streamlit: aquí las negritas van en HTML
+        nota = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", pagina_tv.texto_proyeccion(proy, columna)) if proy.disponible else ""
+        resumen = (f"<div><div class='nota'>Acumulado del año (YTD)</div><div class='kpi-value'>${ytd[columna]:,.0f}</div>{barra(pct)}"
+                   f"<div class='nota'>Meta Anual: ${meta_anual:,.0f} ({pct * 100:.1f}%)</div><div class='nota'>{nota}</div></div>")
+        if cubo.meses_con_datos(anio):
+            metas_fig, datos_fig = pagina_tv.argumentos_figura(cubo, anio, seccion, proy, meta_anual)
+            fig = graficas.construir(REGISTRO_KPIS.por_clave[seccion].tv, metas_fig, datos_fig)
+            grafica = fig.to_html(full_html=False, include_plotlyjs=False, config={'displayModeBar': False})
+            if png:
+                fig.write_image(os.path.join(ruta, archivo(anio, mes, PANEL_TV, "png", seccion)), width=1100)
+        else:
+            grafica = "<p class='nota'>Aún no hay datos de ventas registrados para este año.</p>"
+        partes.append(f"<h3>{titulo}</h3><div class='seccion'>{resumen}<div>{grafica}</div></div><hr>")
+    return "".join(partes)
+
+
+def cuerpo_persona(persona, anio, mes, almacen, metas, proy):
+    partes = [f"<h1>{persona.opcion_menu} - {mes} {anio}</h1>"]
+    if persona.clave in pagina_persona.CARTERAS:
+        partes.append(pagina_persona.CARTERAS[persona.clave](anio, almacen.totales(anio), metas, proy))
+    valores = datos_mes(almacen, anio, mes)
+    kpis, contexto = pagina_persona.kpis_persona(persona, valores, metas)
+    tarjetas = "".join(pagina_persona.tarjeta_kpi(kpi, valores, cumplio, contexto) for kpi, cumplio in kpis)
+    partes.append(f"<div class='rejilla' style='grid-template-columns: repeat({persona.columnas_panel}, 1fr);'>{tarjetas}</div>")
+    return "".join(partes)
+
+
+def renderizar(trabajo):
+    """(trabajo, archivos escritos, error o None); nunca lanza: un periodo con error no detiene a los demás."""
+    anio, mes, panel, ruta, png = trabajo
+    try:
+        almacen, metas, proy = _periodo(anio, mes)
+        if panel == PANEL_TV:
+            contenido = pagina(f"{OPCION_TV} - {mes} {anio}", cuerpo_tv(anio, mes, almacen, metas, proy, ruta, png), plotly=True)
+        else:
+            persona = REGISTRO_KPIS.por_clave[panel]
+            contenido = pagina(f"{persona.opcion_menu} - {mes} {anio}", cuerpo_persona(persona, anio, mes, almacen, metas, proy))
+        with open(os.path.join(ruta, archivo(anio, mes, panel)), 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return trabajo, archivos_de(anio, mes, panel, png), None
+    except Exception as e:
+        return trabajo, [], f"{type(e).__name__}: {e}"
+
+
+def archivos_de(anio, mes, panel, png):
+    extras = [archivo(anio, mes, panel, "png", s) for s in pagina_tv.TITULOS] if png and panel == PANEL_TV else []
+    return [archivo(anio, mes, panel)] + extras
+
+
+# ==========================================
+# 🗂️ ÍNDICE DEL SITIO
+# ==========================================
+def escribir_indice(ruta, anios, df_datos):
+    etiquetas = {PANEL_TV: "TV", **{p.clave: p.nombre for p in REGISTRO_KPIS.personas}}
+    con_datos = set() if df_datos.empty else set(zip(df_datos['Año'].astype(int), df_datos['Mes'].astype(str)))
+    filas = []
+    for anio in anios:
+        celdas = []
+        for mes in MESES:
+            enlaces = " · ".join(f'<a href="{archivo(anio, mes, p)}">{html.escape(etiquetas[p])}</a>' for p in paneles())
+            celdas.append(f'<td class="{"" if (anio, mes) in con_datos else "vacio"}">{enlaces}</td>')
+        filas.append(f"<tr><th>{anio}</th>{''.join(celdas)}</tr>")
+    cuerpo = (f"<h1>Reportes de los tableros CODESA</h1><p class='nota'>Cada panel al cierre de cada mes. En gris, meses sin captura. "
+              f"Generado: {time.strftime('%Y-%m-%d %H:%M')}</p><table><tr><th>Año</th>{''.join(f'<th>{m}</th>' for m in MESES)}</tr>{''.join(filas)}</table>")
+    with open(os.path.join(ruta, "index.html"), 'w', encoding='utf-8') as f:
+        f.write(PLANTILLA.format(titulo="Reportes CODESA", scripts="", css=CSS, cuerpo=cuerpo))
+
+
+# ==========================================
+# 🚀 CORRIDA COMPLETA
+# ==========================================
+def generar(ruta, anios, df_datos, df_metas, procesos=0, png=False, todo=False):
+    """Genera lo que cambió y devuelve (generados, sin cambios, [(trabajo, error)])."""
+    os.makedirs(ruta, exist_ok=True)
+    for anio in anios:
+        os.makedirs(os.path.join(ruta, str(anio)), exist_ok=True)
+    plotly_js = os.path.join(ruta, "plotly.min.js")
+    if not os.path.exists(plotly_js):
+        from plotly.offline import get_plotlyjs
+        with open(plotly_js, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+
+    manifiesto = {} if todo else leer_manifiesto(ruta)
+    codigo = huella_codigo()
+    pendientes, huellas, sin_cambios = [], {}, 0
+    for anio in anios:
+        for mes in MESES:
+            for panel in paneles():
+                llave = archivo(anio, mes, panel)
+                huellas[llave] = huella(df_datos, df_metas, anio, mes, panel, codigo, png)
+                previo = manifiesto.get(llave)
+                if previo and previo['huella'] == huellas[llave] and all(os.path.exists(os.path.join(ruta, a)) for a in previo['archivos']):
+                    sin_cambios += 1
+                else:
+                    pendientes.append((anio, mes, panel, ruta, png))
+
+    errores = []
+    if pendientes:
+        # Trabajos en orden (año, mes, panel) y en bloques de un periodo: cada proceso arma su índice una sola vez
+        with ProcessPoolExecutor(max_workers=procesos or None, initializer=_iniciar_proceso, initargs=(df_datos, df_metas)) as pool:
+            for trabajo, archivos, error in pool.map(renderizar, pendientes, chunksize=len(paneles())):
+                llave = archivo(*trabajo[:3])
+                if error:
+                    errores.append((trabajo[:3], error))
+                    manifiesto.pop(llave, None)  # Se reintenta en la siguiente corrida
+                else:
+                    manifiesto[llave] = {'huella': huellas[llave], 'archivos': archivos}
+        escribir_manifiesto(ruta, manifiesto)
+    escribir_indice(ruta, anios, df_datos)
+    return len(pendientes) - len(errores), sin_cambios, errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes estáticos (HTML) de la Vista General y de cada panel, por año y mes.")
+    parser.add_argument("--ruta", default=RUTA_REPORTES, help="Carpeta del sitio estático")
+    parser.add_argument("--anios", type=int, nargs="+", default=ANIOS, help="Años a generar (por defecto los del selector de la app)")
+    parser.add_argument("--procesos", type=int, default=REPORTES_PROCESOS, help="Procesos en paralelo (0 = uno por núcleo)")
+    parser.add_argument("--origen", choices=["backend", "respaldo"], default="backend", help="De dónde leer las hojas")
+    parser.add_argument("--backend", help="Tipo de backend (gsheets, sqlite, duckdb, memoria); por defecto el de secrets.toml / config.py")
+    parser.add_argument("--ruta-bd", help="Ruta de la base local con --backend sqlite / duckdb")
+    parser.add_argument("--png", action="store_true", help="Exportar también las gráficas de la TV como PNG (requiere kaleido)")
+    parser.add_argument("--todo", action="store_true", help="Ignorar el manifiesto y regenerar todos los reportes")
+    args = parser.parse_args()
+    if args.png and importlib.util.find_spec("kaleido") is None:
+        parser.error("--png requiere el paquete kaleido (pip install kaleido).")
+
+    inicio = time.perf_counter()
+    df_datos, df_metas = leer_hojas(args.origen, args.backend, args.ruta_bd)
+    generados, sin_cambios, errores = generar(args.ruta, sorted(set(args.anios)), df_datos, df_metas, args.procesos, args.png, args.todo)
+    print(f"{generados} reportes generados, {sin_cambios} sin cambios, {len(errores)} con error "
+          f"en {time.perf_counter() - inicio:.1f} s -> {os.path.join(args.ruta, 'index.html')}")
+    for (anio, mes, panel), error in errores:
+        print(f"  ✗ {anio} {mes} {panel}: {error}", file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
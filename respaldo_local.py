@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# ==========================================
+# 💽 RESPALDO LOCAL DURABLE (SQLITE) + DIARIO DE EDICIONES
+# ==========================================
+# - Espejo en disco de "Datos" y "Metas": se actualiza cada vez que la caché
+#   lee una versión nueva de Sheets y sirve las lecturas sin conexión.
+# - Diario (append-only) de cada edición del ADMIN. Las que no llegaron a
+#   Sheets se reenvían EN ORDEN cuando vuelve la conexión, aunque la app se
+#   haya reiniciado. Cada edición guarda también su base (la fila sobre la que
+#   se hizo) para fusionarla con lo que otros hayan cambiado mientras tanto.
+# - Circuito de conexión: tras una falla, los reruns dejan de pagar el tiempo
+#   de espera de st.connection hasta que pase el enfriamiento.
+
+TABLA_DATOS = "espejo_datos"
+TABLA_METAS = "espejo_metas"
+
+
+def _a_json(valor):
+    return json.dumps(valor, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+
+
+def _llave_desde_json(texto):
+    llave = json.loads(texto)
+    return tuple(llave) if isinstance(llave, list) else llave
+
+
+class RespaldoLocal:
+    def __init__(self, ruta, tipar=None):
+        # tipar(df_datos, df_metas) -> (df_datos, df_metas) con los tipos del esquema, al leer el espejo del disco
+        self.ruta = ruta
+        self._tipar = tipar
+        self._lock = threading.Lock()
+        self._espejo = None          # (df_datos, df_metas) en memoria para no releer el disco en cada rerun
+        self._espejo_guardado_en = 0.0
+        self._derivado = None        # (espejo, estructura) calculada una vez por espejo (ver derivado_espejo)
+        self.encolados = set()       # ids del diario que ya están en la cola de escrituras de este proceso
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS diario (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, hoja TEXT NOT NULL, llave TEXT NOT NULL,
+                registro TEXT NOT NULL, creado REAL NOT NULL, enviado INTEGER NOT NULL DEFAULT 0)""")
+            con.execute("CREATE INDEX IF NOT EXISTS diario_pendientes ON diario (enviado, id)")
+            if "base" not in {c[1] for c in con.execute("PRAGMA table_info(diario)")}:
+                con.execute("ALTER TABLE diario ADD COLUMN base TEXT")  # Diarios anteriores a la fusión de 3 vías
+            con.execute("CREATE TABLE IF NOT EXISTS meta_espejo (clave TEXT PRIMARY KEY, valor REAL)")
+            fila = con.execute("SELECT valor FROM meta_espejo WHERE clave = 'guardado_en'").fetchone()
+            self._espejo_guardado_en = fila[0] if fila else 0.0
+            self._sin_encolar = con.execute("SELECT COUNT(*) FROM diario WHERE enviado = 0").fetchone()[0] > 0
+
+    @contextmanager
+    def _conectar(self):
+        # Una conexión por operación: el respaldo se usa desde varios hilos (sesiones + cola).
+        con = sqlite3.connect(self.ruta, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # --- ESPEJO DE LAS HOJAS ---
+    def guardar_espejo(self, df_datos, df_metas):
+        with self._lock, self._conectar() as con:
+            df_datos.astype({c: str for c in df_datos.columns if df_datos[c].dtype == object}).to_sql(TABLA_DATOS, con, if_exists="replace", index=False)
+            df_metas.astype({c: str for c in df_metas.columns if df_metas[c].dtype == object}).to_sql(TABLA_METAS, con, if_exists="replace", index=False)
+            self._espejo_guardado_en = time.time()
+            con.execute("INSERT OR REPLACE INTO meta_espejo (clave, valor) VALUES ('guardado_en', ?)", (self._espejo_guardado_en,))
+            self._espejo = (df_datos, df_metas)
+
+    def leer_espejo(self):
+        """(df_datos, df_metas) de la última lectura exitosa de Sheets, o None si nunca hubo una."""
+        with self._lock:
+            if self._espejo is None:
+                try:
+                    with self._conectar() as con:
+                        espejo = (pd.read_sql(f"SELECT * FROM {TABLA_DATOS}", con),
+                                  pd.read_sql(f"SELECT * FROM {TABLA_METAS}", con))
+                except Exception:
+                    return None
+                self._espejo = self._tipar(*espejo) if self._tipar is not None else espejo
+            return self._espejo
+
+    def derivado_espejo(self, constructor):
+        """constructor(espejo o None) una sola vez por espejo (p. ej. el índice que se usa sin conexión)."""
+        espejo = self.leer_espejo()
+        with self._lock:
+            if self._derivado is None or self._derivado[0] is not espejo:
+                self._derivado = (espejo, constructor(espejo))
+            return self._derivado[1]
+
+    # --- DIARIO DE EDICIONES ---
+    def registrar(self, hoja, llave, registro, base=None):
+        """Agrega una edición (y la fila sobre la que se hizo) al diario y devuelve su id."""
+        with self._lock, self._conectar() as con:
+            cursor = con.execute("INSERT INTO diario (hoja, llave, registro, creado, base) VALUES (?, ?, ?, ?, ?)",
+                                 (hoja, _a_json(llave), _a_json(registro), time.time(), None if base is None else _a_json(base)))
+            self._sin_encolar = True
+            return cursor.lastrowid
+
+    def marcar_enviados(self, ids):
+        """Ediciones ya confirmadas en Sheets, por id: una edición posterior de la misma llave sigue pendiente."""
+        self._marcar(ids, 1)
+
+    def marcar_conflicto(self, ids):
+        """Ediciones que chocaron con otra (ver concurrencia.py): no se reenvían, pero quedan en el diario (enviado = 2)."""
+        self._marcar(ids, 2)
+
+    def _marcar(self, ids, enviado):
+        if not ids:
+            return
+        with self._lock, self._conectar() as con:
+            con.executemany("UPDATE diario SET enviado = ? WHERE enviado = 0 AND id = ?", [(enviado, i) for i in ids])
+
+    def pendientes(self):
+        """Ediciones aún no confirmadas en Sheets, en el orden en que se hicieron: (id, hoja, llave, registro, base)."""
+        with self._conectar() as con:
+            filas = con.execute("SELECT id, hoja, llave, registro, base FROM diario WHERE enviado = 0 ORDER BY id").fetchall()
+        return [(id_, hoja, _llave_desde_json(llave), json.loads(registro), json.loads(base) if base else None)
+                for id_, hoja, llave, registro, base in filas]
+
+    def por_reproducir(self):
+        """Pendientes que todavía no se mandaron a la cola de este proceso (vacío sin tocar disco si no hay)."""
+        if not self._sin_encolar:
+            return []
+        entradas = [e for e in self.pendientes() if e[0] not in self.encolados]
+        self._sin_encolar = bool(entradas)
+        return entradas
+
+    def posteriores_al_espejo(self):
+        """Ediciones hechas después de la última copia del espejo (para verlas sin conexión)."""
+        with self._conectar() as con:
+            filas = con.execute("SELECT hoja, registro FROM diario WHERE creado > ? ORDER BY id", (self._espejo_guardado_en,)).fetchall()
+        return [(hoja, json.loads(registro)) for hoja, registro in filas]
+
+
+# ==========================================
+# ⚡ CIRCUITO DE CONEXIÓN A GOOGLE SHEETS
+# ==========================================
+class CircuitoConexion:
+    CERRADO = "cerrado"        # todo normal, se intenta conectar
+    ABIERTO = "abierto"        # Sheets caído: no se intenta hasta que pase el enfriamiento
+    SEMIABIERTO = "semiabierto"  # se permite UN intento de prueba
+
+    def __init__(self, umbral_fallos=1, enfriamiento_segundos=60):
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_segundos = enfriamiento_segundos
+        self._lock = threading.Lock()
+        self.estado = self.CERRADO
+        self.fallos = 0
+        self._abierto_en = 0.0
+
+    def permitir(self):
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            if self.estado == self.ABIERTO and time.monotonic() - self._abierto_en >= self.enfriamiento_segundos:
+                self.estado = self.SEMIABIERTO
+                return True
+            return False
+
+    def puede_reintentar(self):
+        """Si el siguiente permitir() dejaría intentar, SIN cambiar el estado (no gasta el intento de prueba)."""
+        with self._lock:
+            return self.estado == self.CERRADO or (
+                self.estado == self.ABIERTO and time.monotonic() - self._abierto_en >= self.enfriamiento_segundos)
+
+    def exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self.fallos = 0
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            if self.estado == self.SEMIABIERTO or self.fallos >= self.umbral_fallos:
+                self.estado = self.ABIERTO
+                self._abierto_en = time.monotonic()
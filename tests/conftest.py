@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))  # gsheets_falso: la conexión falsa a Google Sheets
+
+APP = os.path.join(RAIZ, "app.py")
+
+
+@pytest.fixture
+def hojas_falsas(tmp_path, monkeypatch):
+    """Hojas sintéticas (2025-2026) detrás de una conexión falsa; respaldo local en una carpeta temporal."""
+    import streamlit as st
+    import streamlit_gsheets
+    import gsheets_falso
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(streamlit_gsheets, "GSheetsConnection", gsheets_falso.ConexionFalsa)
+    monkeypatch.setattr(gsheets_falso.ConexionFalsa, "caida", False)
+    # Como un proceso nuevo: sin backend, caché de hojas ni cola de una prueba anterior
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    gsheets_falso.sembrar(24, anio_final=2026)
+    return gsheets_falso.HOJAS
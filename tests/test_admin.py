@@ -0,0 +1,111 @@
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import gsheets_falso
+from conftest import APP
+
+ADMIN = "🔐 ADMIN (Config & Captura)"
+PESTANA_CAPTURA = "📝 Captura Mensual"
+PESTANA_METAS = "🎯 Configurar Metas y Premios"
+
+
+def abrir_admin(pestana):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    panel(at).set_value(ADMIN)
+    return correr(at, pestana)
+
+
+def correr(at, pestana):
+    # AppTest no conserva la pestaña elegida entre reruns: se vuelve a indicar en cada uno
+    at.session_state["pestana_admin"] = pestana
+    at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def panel(at):
+    return next(s for s in at.sidebar.selectbox if s.label == "Panel de Control:")
+
+
+def anio(at):
+    return next(s for s in at.sidebar.selectbox if s.label == "📅 AÑO FISCAL:")
+
+
+def entrada(at, inicio):
+    return next(w for w in list(at.number_input) + list(at.text_input) if w.label.startswith(inicio))
+
+
+def fila(hojas, hoja, **llave):
+    df = hojas[hoja]
+    for columna, valor in llave.items():
+        df = df[df[columna] == valor]
+    return df.iloc[0] if len(df) else None
+
+
+def esperar(condicion, segundos=10):
+    # La cola de escrituras envía en segundo plano
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_captura_muestra_y_guarda_el_periodo_elegido_al_cambiar_mes_y_anio(hojas_falsas):
+    enero = fila(hojas_falsas, "Datos", Año=2026, Mes="Enero")
+    febrero = fila(hojas_falsas, "Datos", Año=2026, Mes="Febrero")
+    at = abrir_admin(PESTANA_CAPTURA)
+    mes = next(s for s in at.selectbox if s.label.startswith("Selecciona el mes"))
+    assert entrada(at, "Facturación Mensual").value == enero['m_ventas']
+
+    mes.set_value("Febrero")
+    correr(at, PESTANA_CAPTURA)
+    assert entrada(at, "Facturación Mensual").value == febrero['m_ventas']
+    entrada(at, "Citas").set_value(int(febrero['h_citas']) + 1)
+    next(b for b in at.button if b.label == "💾 GUARDAR REGISTROS MENSUALES").click()
+    correr(at, PESTANA_CAPTURA)
+
+    assert esperar(lambda: fila(hojas_falsas, "Datos", Año=2026, Mes="Febrero")['Versión'] == febrero['Versión'] + 1)
+    guardada = fila(hojas_falsas, "Datos", Año=2026, Mes="Febrero")
+    assert guardada['m_ventas'] == febrero['m_ventas']      # No las cifras de Enero
+    assert guardada['h_citas'] == febrero['h_citas'] + 1
+    assert fila(hojas_falsas, "Datos", Año=2026, Mes="Enero")['Versión'] == enero['Versión']
+
+    # Un año sin capturas: el formulario arranca en ceros, no con lo que se veía en 2026
+    anio(at).set_value(2027)
+    correr(at, PESTANA_CAPTURA)
+    assert entrada(at, "Facturación Mensual").value == 0.0
+
+
+def test_metas_muestran_y_guardan_el_anio_elegido(hojas_falsas):
+    hojas_falsas["Metas"].loc[hojas_falsas["Metas"]['Año'] == 2026, 'meta_mario'] = 2_000_000.0
+    at = abrir_admin(PESTANA_METAS)
+    assert entrada(at, "Meta Anual Ing. Mario").value == 2_000_000.0
+
+    anio(at).set_value(2027)
+    correr(at, PESTANA_METAS)
+    meta_defecto = entrada(at, "Meta Anual Ing. Mario").value
+    assert meta_defecto == 10623610.66   # Valor por defecto del registro (2027 no tiene fila)
+    next(b for b in at.button if b.label == "🎯 GUARDAR METAS Y PREMIOS").click()
+    correr(at, PESTANA_METAS)
+
+    assert esperar(lambda: fila(hojas_falsas, "Metas", Año=2027) is not None)
+    assert fila(hojas_falsas, "Metas", Año=2027)['meta_mario'] == meta_defecto
+    assert fila(hojas_falsas, "Metas", Año=2026)['meta_mario'] == 2_000_000.0
+
+
+def test_guardado_confirmado_no_vuelve_a_leer_las_hojas(hojas_falsas):
+    enero = fila(hojas_falsas, "Datos", Año=2026, Mes="Enero")
+    at = abrir_admin(PESTANA_CAPTURA)
+    lecturas = gsheets_falso.ConexionFalsa.lecturas
+    entrada(at, "Citas").set_value(int(enero['h_citas']) + 1)
+    next(b for b in at.button if b.label == "💾 GUARDAR REGISTROS MENSUALES").click()
+    correr(at, PESTANA_CAPTURA)
+    assert esperar(lambda: fila(hojas_falsas, "Datos", Año=2026, Mes="Enero")['Versión'] == enero['Versión'] + 1)
+
+    correr(at, PESTANA_CAPTURA)
+    assert entrada(at, "Citas").value == enero['h_citas'] + 1     # Servido desde la instantánea editada en sitio
+    assert gsheets_falso.ConexionFalsa.lecturas == lecturas
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import gsheets_falso
+from almacen import AlmacenRegistros
+from config import COLUMNAS_BD, COLUMNAS_METAS, DEFAULT_DATA, MESES
+
+
+def almacen_de(df_datos, df_metas):
+    return AlmacenRegistros(df_datos, df_metas, COLUMNAS_BD, COLUMNAS_METAS, MESES)
+
+
+def assert_cubos_iguales(incremental, completo):
+    assert sorted(incremental._anios) == sorted(completo._anios)
+    for anio in completo._anios:
+        a, b = incremental._anios[anio], completo._anios[anio]
+        np.testing.assert_allclose(a.mensual, b.mensual)
+        np.testing.assert_allclose(a.acumulado, b.acumulado)
+        np.testing.assert_allclose(a.totales, b.totales)
+        np.testing.assert_array_equal(a.presentes, b.presentes)
+
+
+def test_upserts_del_cubo_igualan_a_recalcular_todo():
+    df_datos, df_metas = gsheets_falso.datos_sinteticos(30, anio_final=2026)
+    almacen = almacen_de(df_datos, df_metas)
+    rng = np.random.default_rng(1)
+    columnas = almacen.cubo.columnas
+    for _ in range(200):
+        # Meses existentes y nuevos (incluido un año que aún no estaba)
+        anio, mes = int(rng.integers(2024, 2028)), MESES[int(rng.integers(12))]
+        cambios = {c: float(rng.uniform(0, 1000)) for c in rng.choice(columnas, size=3, replace=False)}
+        base = {} if almacen.mes(anio, mes) is not None else DEFAULT_DATA   # Un mes nuevo llega completo, como en la app
+        almacen.upsert_mes({**base, 'Año': anio, 'Mes': mes, **cambios})
+
+    completo = almacen_de(almacen.datos_df(), df_metas).cubo
+    assert_cubos_iguales(almacen.cubo, completo)
+    assert almacen.totales(2026) == pytest.approx(completo.totales(2026))   # Delta vs. suma: solo redondeo
+    assert almacen.cubo.meses_con_datos(2027) == completo.meses_con_datos(2027)
+
+
+def test_upsert_actualiza_indice_y_rebanada_del_anio():
+    df_datos, df_metas = gsheets_falso.datos_sinteticos(12, anio_final=2026)
+    almacen = almacen_de(df_datos, df_metas)
+    antes = almacen.anio_df(2026)
+    almacen.upsert_mes({'Año': 2026, 'Mes': "Marzo", 'm_ventas': 1.0})
+    assert almacen.mes(2026, "Marzo")['m_ventas'] == 1.0
+    assert almacen.anio_df(2026) is not antes
+    assert almacen.anio_df(2026).set_index('Mes').loc["Marzo", 'm_ventas'] == 1.0
+    nuevo = almacen.upsert_mes({'Año': 2027, 'Mes': "Enero", 'm_ventas': 5.0})
+    assert almacen.fila(2027, "Enero") == 12 and almacen.mes(2027, "Enero") is nuevo
@@ -0,0 +1,89 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import gsheets_falso
+from almacenamiento import BackendGSheets, BackendSQL
+from config import ESQUEMA_DATOS, ESQUEMA_METAS, MESES
+from conftest import APP
+
+
+def test_backend_gsheets_lee_y_escribe_filas_por_la_hoja_de_gspread():
+    gsheets_falso.sembrar(12, anio_final=2026)
+    backend = BackendGSheets(SimpleNamespace(client=gsheets_falso._ClienteFalso()), ESQUEMA_DATOS, ESQUEMA_METAS)
+    fila = backend.leer_fila("Datos", 0)
+    assert (fila['Año'], fila['Mes']) == (2026, "Enero")
+    assert backend.leer_fila("Datos", 99) is None
+
+
+def test_backend_gsheets_avisa_claro_si_la_conexion_no_expone_la_hoja():
+    backend = BackendGSheets(SimpleNamespace(client=object()), ESQUEMA_DATOS, ESQUEMA_METAS)
+    with pytest.raises(RuntimeError, match="st-gsheets-connection==0.1.0"):
+        backend.leer_fila("Datos", 0)
+    with pytest.raises(RuntimeError, match="_select_worksheet"):
+        backend.escribir_lote("Datos", [(0, [2026, "Enero"], False)])
+
+
+
+def sin_version(hojas):
+    # 17 columnas en "Datos" (y sin "Versión" en "Metas"), como las hojas creadas antes de la concurrencia
+    for hoja in ("Datos", "Metas"):
+        hojas[hoja] = hojas[hoja].drop(columns="Versión")
+
+
+def test_hoja_sin_columna_version_se_lee_y_recibe_el_encabezado(hojas_falsas):
+    sin_version(hojas_falsas)
+    backend = BackendGSheets(gsheets_falso.ConexionFalsa("gsheets"), ESQUEMA_DATOS, ESQUEMA_METAS)
+    df_datos, df_metas = backend.leer_hojas()
+    assert len(df_datos) == 24 and len(df_metas) == 2
+    assert (df_datos['Versión'] == 0).all() and df_datos['Versión'].dtype == "int64"
+    assert list(hojas_falsas["Datos"].columns)[-1] == "Versión" and list(hojas_falsas["Metas"].columns)[-1] == "Versión"
+
+
+def test_app_con_hojas_sin_columna_version_no_cae_al_respaldo(hojas_falsas):
+    sin_version(hojas_falsas)
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    assert not at.exception, at.exception
+    assert not [e for e in at.sidebar.error if "respaldo local" in e.value]
+    assert "Versión" in hojas_falsas["Datos"].columns
+
+
+def backend_sql(ruta, motor="sqlite"):
+    return BackendSQL(str(ruta), ESQUEMA_DATOS.tipos_sql(), ESQUEMA_METAS.tipos_sql(), MESES, motor=motor)
+
+
+@pytest.mark.parametrize("motor", ["sqlite", "duckdb"])
+def test_backend_sql_un_solo_registro_por_periodo(tmp_path, motor):
+    if motor == "duckdb":
+        pytest.importorskip("duckdb")
+    backend = backend_sql(tmp_path / f"local.{motor}", motor)
+    df_datos, df_metas = gsheets_falso.datos_sinteticos(12, anio_final=2026)
+    repetida = df_datos.iloc[[0]].assign(m_ventas=-1.0)
+    backend.reemplazar_todo(pd.concat([df_datos, repetida], ignore_index=True), df_metas)
+    assert backend.consultar('SELECT COUNT(*) AS n FROM datos').n[0] == 12
+    assert backend.consultar('SELECT m_ventas FROM datos WHERE "Año" = 2026 AND "Mes" = \'Enero\'').m_ventas[0] == pytest.approx(df_datos.m_ventas[0], rel=1e-6)   # REAL es float32 en DuckDB
+
+    backend.upsert("Datos", {**df_datos.iloc[0].to_dict(), 'm_ventas': 5.0, 'Versión': 2})
+    backend.upsert_lote("Datos", [{**df_datos.iloc[1].to_dict(), 'm_ventas': 6.0}, {**df_datos.iloc[1].to_dict(), 'm_ventas': 7.0}])
+    backend.upsert("Metas", {**df_metas.iloc[0].to_dict(), 'meta_mario': 1.0})
+    df = backend.consultar('SELECT "Mes", m_ventas, "Versión" FROM datos WHERE "Mes" IN (\'Enero\', \'Febrero\') ORDER BY m_ventas')
+    assert df.values.tolist() == [["Enero", 5.0, 2], ["Febrero", 7.0, 1]]
+    assert backend.consultar('SELECT COUNT(*) AS n FROM datos').n[0] == 12
+    assert backend.consultar('SELECT COUNT(*) AS n FROM metas').n[0] == 1
+    assert not backend.upsert_si_version("Datos", {**df_datos.iloc[0].to_dict(), 'm_ventas': 8.0}, 1)   # Ya va en la versión 2
+
+
+def test_backend_sql_agrega_la_llave_unica_a_tablas_anteriores(tmp_path):
+    ruta = tmp_path / "anterior.sqlite3"
+    columnas = ", ".join(f'"{c}" {t}' for c, t in ESQUEMA_DATOS.tipos_sql().items())
+    with sqlite3.connect(ruta) as con:
+        con.execute(f"CREATE TABLE datos ({columnas})")
+        con.executemany('INSERT INTO datos ("Año", "Mes", m_ventas) VALUES (?, ?, ?)', [(2026, "Enero", 1.0), (2026, "Enero", 2.0), (2026, "Febrero", 3.0)])
+    backend = backend_sql(ruta)
+    assert backend.consultar('SELECT "Mes", m_ventas FROM datos ORDER BY m_ventas').values.tolist() == [["Enero", 1.0], ["Febrero", 3.0]]
+    plan = backend.consultar('EXPLAIN QUERY PLAN SELECT * FROM datos WHERE "Año" = 2026 AND "Mes" = \'Enero\'')
+    assert plan.detail.str.contains("datos_llave").any()
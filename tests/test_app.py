@@ -0,0 +1,24 @@
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import metricas
+from conftest import APP
+from paginas import persona, tv
+
+
+def test_el_rerun_se_mide_aunque_la_pagina_llame_st_rerun(hojas_falsas, monkeypatch):
+    cierres, llamadas = [], []
+
+    def pagina_que_reinicia(*args):
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            st.rerun()
+
+    monkeypatch.setattr(tv, "mostrar", pagina_que_reinicia)
+    monkeypatch.setattr(persona, "mostrar", pagina_que_reinicia)
+    monkeypatch.setattr(metricas, "cerrar_rerun", lambda inicio, **kw: cierres.append(kw["panel"]))
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    assert not at.exception, at.exception
+    assert len(llamadas) == 2
+    assert len(cierres) == 2      # También el rerun que cortó st.rerun()
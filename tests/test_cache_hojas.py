@@ -0,0 +1,66 @@
+import pandas as pd
+
+from cache_hojas import CacheHojas
+
+
+def lector_de(hojas):
+    # Cada lectura devuelve DataFrames nuevos, como haría Google Sheets
+    return lambda: (hojas["Datos"].copy(), hojas["Metas"].copy())
+
+
+def hojas_base():
+    return {"Datos": pd.DataFrame({"Año": [2026], "Mes": ["Enero"], "m_ventas": [100.0]}),
+            "Metas": pd.DataFrame({"Año": [2026], "meta_mario": [1000.0]})}
+
+
+def test_relectura_sin_cambios_conserva_la_instantanea_y_sus_derivados():
+    publicadas = []
+    cache = CacheHojas(lector_de(hojas_base()), al_publicar=publicadas.append)
+    primera = cache.refrescar()
+    construidos = []
+    indice = primera.derivado("indice", lambda inst: construidos.append(1) or object())
+    leido_en = primera.leido_en
+
+    segunda = cache.refrescar()
+    assert segunda is primera
+    assert segunda.version == 1
+    assert segunda.leido_en > leido_en       # Se renueva el TTL
+    assert segunda.derivado("indice", lambda inst: construidos.append(1) or object()) is indice
+    assert len(construidos) == 1 and len(publicadas) == 1
+
+
+def test_relectura_con_cambios_publica_version_nueva():
+    hojas = hojas_base()
+    cache = CacheHojas(lector_de(hojas))
+    primera = cache.refrescar()
+    hojas["Datos"].loc[0, "m_ventas"] = 200.0
+    segunda = cache.refrescar()
+    assert segunda is not primera
+    assert segunda.version == 2
+    assert segunda.df_datos.loc[0, "m_ventas"] == 200.0
+
+
+def test_edicion_local_hace_que_la_siguiente_lectura_publique_version_nueva():
+    publicadas = []
+    cache = CacheHojas(lector_de(hojas_base()), al_publicar=publicadas.append)
+    primera = cache.refrescar()
+    primera.df_datos.loc[0, "m_ventas"] = 999.0    # Upsert local antes de que Sheets lo refleje
+    cache.registrar_edicion()
+    assert cache.version == 2
+
+    # Sheets aún trae el contenido previo: no debe confundirse con la instantánea editada
+    segunda = cache.refrescar()
+    assert segunda is not primera
+    assert segunda.version == 3
+    assert segunda.df_datos.loc[0, "m_ventas"] == 100.0
+    assert len(publicadas) == 2
+
+
+def test_edicion_local_con_lector_que_devuelve_los_mismos_dataframes():
+    hojas = hojas_base()
+    cache = CacheHojas(lambda: (hojas["Datos"], hojas["Metas"]))
+    primera = cache.refrescar()
+    cache.registrar_edicion()
+    segunda = cache.refrescar()
+    assert segunda is not primera and segunda.version == 3
+    assert cache.refrescar() is segunda     # Y a partir de ahí vuelve a reconocer el mismo contenido
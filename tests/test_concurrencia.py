@@ -0,0 +1,64 @@
+import pytest
+
+from concurrencia import ConflictoEdicion, fusionar, resolver, verificar_remota
+
+COLUMNAS = ['Año', 'Mes', 'm_ventas', 'h_citas', 'Versión']
+
+
+def fila(**cambios):
+    return {'Año': 2026, 'Mes': "Enero", 'm_ventas': 100.0, 'h_citas': 3, 'Versión': 1, **cambios}
+
+
+def test_sin_cambios_ajenos_gana_lo_mio():
+    fusionado, ajenas, conflictos = fusionar(fila(), fila(m_ventas=150.0), fila(), COLUMNAS)
+    assert fusionado['m_ventas'] == 150.0
+    assert (ajenas, conflictos) == ([], {})
+
+
+def test_campos_distintos_se_fusionan_sin_conflicto():
+    vigente = fila(h_citas=5, Versión=2)
+    fusionado, ajenas, conflictos = fusionar(fila(), fila(m_ventas=150.0), vigente, COLUMNAS)
+    assert (fusionado['m_ventas'], fusionado['h_citas']) == (150.0, 5)   # Lo mío y lo de la otra persona
+    assert ajenas == ['h_citas'] and conflictos == {}
+
+
+def test_mismo_valor_en_ambos_lados_no_es_conflicto():
+    fusionado, _, conflictos = fusionar(fila(), fila(m_ventas=150.0), fila(m_ventas=150.0 + 1e-12, Versión=2), COLUMNAS)
+    assert conflictos == {} and fusionado['m_ventas'] == 150.0
+
+
+def test_mismo_campo_a_valores_distintos_es_conflicto():
+    _, _, conflictos = fusionar(fila(), fila(m_ventas=150.0), fila(m_ventas=90.0, Versión=2), COLUMNAS)
+    assert conflictos == {'m_ventas': (150.0, 90.0)}
+
+
+def test_fila_nueva_o_sin_base_gana_lo_mio():
+    assert fusionar(fila(), fila(m_ventas=150.0), None, COLUMNAS)[0]['m_ventas'] == 150.0
+    assert fusionar(None, fila(m_ventas=150.0), fila(m_ventas=90.0, Versión=7), COLUMNAS)[2] == {}
+
+
+def test_resolver_sube_la_version_de_la_vigente():
+    registro, ajenas = resolver("Datos", (2026, "Enero"), fila(), fila(m_ventas=150.0), fila(h_citas=5, Versión=4), COLUMNAS)
+    assert registro['Versión'] == 5 and ajenas == ['h_citas']
+
+
+def test_resolver_lanza_conflicto_salvo_forzado():
+    base, mio, vigente = fila(), fila(m_ventas=150.0), fila(m_ventas=90.0, Versión=2)
+    with pytest.raises(ConflictoEdicion) as e:
+        resolver("Datos", (2026, "Enero"), base, mio, vigente, COLUMNAS)
+    assert e.value.conflictos == {'m_ventas': (150.0, 90.0)} and e.value.vigente is vigente
+    registro, _ = resolver("Datos", (2026, "Enero"), base, mio, vigente, COLUMNAS, forzar=True)
+    assert (registro['m_ventas'], registro['Versión']) == (150.0, 3)
+
+
+def test_verificar_remota():
+    registro = fila(m_ventas=150.0, Versión=2)
+    llave = (2026, "Enero")
+    assert verificar_remota("Datos", llave, registro, fila(), None, COLUMNAS) is registro       # Sin lectura remota
+    assert verificar_remota("Datos", llave, registro, fila(), fila(), COLUMNAS) is registro     # Nadie la tocó
+    fusionado = verificar_remota("Datos", llave, registro, fila(), fila(h_citas=9, Versión=2), COLUMNAS)
+    assert (fusionado['m_ventas'], fusionado['h_citas'], fusionado['Versión']) == (150.0, 9, 3)
+    with pytest.raises(ConflictoEdicion):
+        verificar_remota("Datos", llave, registro, fila(), fila(m_ventas=1.0, Versión=2), COLUMNAS)
+    with pytest.raises(RuntimeError, match="posición"):
+        verificar_remota("Datos", llave, registro, fila(), fila(Mes="Febrero"), COLUMNAS)
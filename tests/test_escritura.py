@@ -0,0 +1,120 @@
+import threading
+import time
+
+from escritura import CONFIRMADO, CONFLICTO, FALLIDO, ColaEscrituras, valores_fila
+
+COLUMNAS = ['Año', 'Mes', 'm_ventas', 'Versión']
+LLAVE = (2026, "Enero")
+
+
+def fila(**cambios):
+    return {'Año': 2026, 'Mes': "Enero", 'm_ventas': 100.0, 'Versión': 1, **cambios}
+
+
+def esperar(condicion, segundos=10):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class HojaLenta:
+    """Fila remota única; la primera llamada a `pausar` se detiene hasta que la prueba la suelte."""
+
+    def __init__(self, remota, pausar):
+        self.remota = remota
+        self.pausar = pausar
+        self.escritas = []
+        self.en_vuelo = threading.Event()
+        self.soltar = threading.Event()
+        self._primera = True
+
+    def _quizas_pausar(self, operacion):
+        if operacion == self.pausar and self._primera:
+            self._primera = False
+            self.en_vuelo.set()
+            assert self.soltar.wait(10)
+
+    def leer_fila(self, hoja, posicion):
+        self._quizas_pausar("leer")
+        return dict(self.remota)
+
+    def escribir_fila(self, hoja, posicion, valores, nueva):
+        self._quizas_pausar("escribir")
+        self.escritas.append(valores)
+        self.remota = dict(zip(COLUMNAS, valores))
+
+
+def cola_para(hoja, confirmados, conflictos, **kwargs):
+    return ColaEscrituras(hoja.escribir_fila, al_confirmar=lambda h, llave, ids, fusionada: confirmados.append(ids),
+                          leer_fila=hoja.leer_fila, columnas={"Datos": COLUMNAS},
+                          al_conflicto=lambda h, llave, ids: conflictos.append(ids), **kwargs)
+
+
+def encolar(cola, registro, esperado, id_diario):
+    cola.encolar("Datos", LLAVE, 0, False, registro, valores_fila(registro, COLUMNAS), esperado, id_diario)
+
+
+def test_ediciones_que_llegan_durante_la_escritura_se_fusionan_y_se_envian_despues():
+    hoja, confirmados, conflictos = HojaLenta(fila(), pausar="escribir"), [], []
+    cola = cola_para(hoja, confirmados, conflictos)
+    encolar(cola, fila(m_ventas=110.0, Versión=2), fila(), 1)
+    assert hoja.en_vuelo.wait(10)
+    encolar(cola, fila(m_ventas=120.0, Versión=2), fila(), 2)
+    encolar(cola, fila(m_ventas=130.0, Versión=2), fila(), 3)
+    hoja.soltar.set()
+
+    assert esperar(lambda: cola.estado("Datos", LLAVE)[0] == CONFIRMADO)
+    assert [v[2] for v in hoja.escritas] == [110.0, 130.0]    # La intermedia nunca se envía
+    assert confirmados == [[1, 2, 3]]                          # Confirmación única, cuando ya se envió lo último
+    assert conflictos == [] and cola.pendientes("Datos") == []
+
+
+def test_conflicto_no_descarta_la_edicion_que_llego_mientras_se_verificaba():
+    # Otra persona dejó m_ventas en 90: mi primera edición (150) choca; la que llega después lo iguala
+    hoja, confirmados, conflictos = HojaLenta(fila(m_ventas=90.0, Versión=2), pausar="leer"), [], []
+    cola = cola_para(hoja, confirmados, conflictos)
+    encolar(cola, fila(m_ventas=150.0, Versión=2), fila(), 1)
+    assert hoja.en_vuelo.wait(10)
+    encolar(cola, fila(m_ventas=90.0, Versión=2), fila(), 2)
+    hoja.soltar.set()
+
+    assert esperar(lambda: cola.estado("Datos", LLAVE)[0] == CONFIRMADO)
+    assert conflictos == [[1]]         # Solo el diario de la edición que chocó
+    assert confirmados == [[2]]
+    assert hoja.escritas == [[2026, "Enero", 90.0, 3]]
+
+
+def test_conflicto_sin_ediciones_nuevas_queda_marcado_sin_escribir():
+    hoja, confirmados, conflictos = HojaLenta(fila(m_ventas=90.0, Versión=2), pausar=None), [], []
+    cola = cola_para(hoja, confirmados, conflictos)
+    encolar(cola, fila(m_ventas=150.0, Versión=2), fila(), 1)
+    assert esperar(lambda: cola.estado("Datos", LLAVE)[0] == CONFLICTO)
+    assert conflictos == [[1]] and confirmados == [] and hoja.escritas == []
+
+
+def test_fallos_repetidos_terminan_en_fallido():
+    intentos = []
+
+    def escribir_fila(*args):
+        intentos.append(1)
+        raise ConnectionError("sin red")
+
+    cola = ColaEscrituras(escribir_fila, max_reintentos=3, espera_base=0.01)
+    cola.encolar("Datos", LLAVE, 0, True, fila(), valores_fila(fila(), COLUMNAS))
+    assert esperar(lambda: cola.estado("Datos", LLAVE)[0] == FALLIDO)
+    assert len(intentos) == 3 and cola.estado("Datos", LLAVE)[1] == "sin red"
+
+
+def test_confirmacion_avisa_si_en_la_hoja_quedo_una_fusion_con_cambios_ajenos():
+    avisos = []
+    for remota in (fila(), fila(Versión=2)):   # Nadie la tocó / otra persona la guardó entretanto
+        hoja = HojaLenta(remota, pausar=None)
+        cola = ColaEscrituras(hoja.escribir_fila, leer_fila=hoja.leer_fila, columnas={"Datos": COLUMNAS},
+                              al_confirmar=lambda h, llave, ids, fusionada: avisos.append(fusionada))
+        encolar(cola, fila(m_ventas=150.0, Versión=2), fila(), 1)
+        n = len(avisos)
+        assert esperar(lambda: len(avisos) == n + 1)
+    assert avisos == [False, True]
@@ -0,0 +1,81 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from config import ESQUEMA_DATOS, ESQUEMA_METAS, MESES
+from esquema import ANIO, DECIMAL, ENTERO, MES, TEXTO, VERSION, EsquemaHoja
+
+ESQUEMA = EsquemaHoja("Prueba", {'Año': ANIO, 'Mes': MES, 'ventas': DECIMAL, 'citas': ENTERO, 'premio': TEXTO, 'Versión': VERSION},
+                      meses=MESES, defectos={'premio': "Sin premio"})
+
+
+def ingerir(**columnas):
+    return ESQUEMA.ingerir(pd.DataFrame(columnas))
+
+
+def rechazos_de(rechazos):
+    return rechazos[['fila', 'columna', 'valor', 'motivo']].values.tolist()
+
+
+def test_texto_de_moneda_y_celdas_vacias():
+    df, rechazos = ingerir(**{'Año': ["2026", "2026", "2026"], 'Mes': ["Enero", " febrero ", ""],
+                              'ventas': ["$1,250.50", " 12 ", ""], 'citas': ["3", "", None],
+                              'premio': ["Viaje", "", None], 'Versión': ["", "2", None]})
+    assert rechazos.empty
+    assert df['ventas'].tolist() == [1250.5, 12.0, 0.0]
+    assert df['citas'].tolist() == [3, 0, 0]
+    assert df['Mes'].astype(object).tolist()[:2] == ["Enero", "Febrero"] and pd.isna(df['Mes'][2])
+    assert df['premio'].tolist() == ["Viaje", "Sin premio", "Sin premio"]
+    assert df['Versión'].tolist() == [0, 2, 0]
+
+
+def test_celdas_invalidas_quedan_en_cero_y_se_reportan():
+    df, rechazos = ingerir(**{'Año': ["2026", "2026.5", "-3", "99999", "abc"], 'Mes': ["Enero", "Febrero", "Marzo", "Abril", "Mayo"],
+                              'ventas': ["mil", "1", "2", "3", "4"], 'citas': ["1", "2.5", "3", "4", "70000"]})
+    assert df['Año'].tolist() == [2026, 0, 0, 0, 0]
+    assert df['ventas'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert df['citas'].tolist() == [1, 0, 3, 4, 0]
+    assert rechazos_de(rechazos) == [
+        [2, 'ventas', "mil", "no es un número"],
+        [3, 'Año', "2026.5", "debe ser entero"],
+        [3, 'citas', "2.5", "debe ser entero"],
+        [4, 'Año', "-3", "año inválido"],
+        [5, 'Año', "99999", "fuera de rango"],
+        [6, 'Año', "abc", "no es un número"],
+        [6, 'citas', "70000", "fuera de rango"],
+    ]
+    assert (rechazos['hoja'] == "Prueba").all()
+    assert len(df) == 5     # Ninguna fila se descarta: su posición es la de la hoja
+
+
+def test_mes_desconocido_queda_vacio_y_se_reporta():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")   # pandas dejará de aceptar categorías desconocidas al construir el Categorical
+        df, rechazos = ingerir(**{'Año': [2026, 2026], 'Mes': ["Enero", "Enro"]})
+    assert pd.isna(df['Mes'][1])
+    assert rechazos_de(rechazos) == [[3, 'Mes', "Enro", "mes desconocido"]]
+
+
+def test_columnas_faltantes_con_valores_por_defecto_y_dtypes_compactos():
+    df, rechazos = ingerir(**{'Año': [2026.0, 2025.0], 'Mes': ["Marzo", "Enero"]})   # Numéricas ya tipadas: camino rápido
+    assert rechazos.empty and list(df.columns) == ESQUEMA.columnas
+    assert df['ventas'].tolist() == [0.0, 0.0] and df['premio'].tolist() == ["Sin premio"] * 2 and df['Versión'].tolist() == [0, 0]
+    tipos = df.dtypes.to_dict()
+    assert pd.api.types.is_string_dtype(tipos.pop('premio'))
+    assert tipos == {'Año': np.dtype("int16"), 'Mes': pd.CategoricalDtype(MESES, ordered=True), 'ventas': np.dtype("float64"),
+                     'citas': np.dtype("int16"), 'Versión': np.dtype("int64")}
+    assert df['Mes'][0] > df['Mes'][1]       # Categórico ordenado por calendario
+
+
+def test_hoja_vacia_o_sin_anio_da_el_esquema_vacio():
+    for crudo in (None, pd.DataFrame(), pd.DataFrame({'Mes': ["Enero"]})):
+        df, rechazos = ESQUEMA.ingerir(crudo)
+        assert df.empty and list(df.columns) == ESQUEMA.columnas and rechazos.empty
+        assert df.dtypes['Año'] == np.dtype("int16")
+
+
+def test_esquemas_de_la_app_coinciden_con_las_hojas():
+    assert ESQUEMA_DATOS.columnas[:2] == ['Año', 'Mes'] and ESQUEMA_DATOS.columnas[-1] == 'Versión'
+    assert ESQUEMA_METAS.columnas[0] == 'Año' and ESQUEMA_METAS.columnas[-1] == 'Versión'
+    assert set(ESQUEMA_DATOS.tipos_sql().values()) <= {"INTEGER", "REAL", "TEXT"}
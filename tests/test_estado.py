@@ -0,0 +1,54 @@
+import pandas as pd
+import estado as modulo_estado
+from config import ESQUEMA_DATOS, ESQUEMA_METAS
+from estado import Estado
+from importacion import planear
+
+
+def indice(hojas, anio, mes):
+    df = hojas["Datos"]
+    return df.index[(df['Año'] == anio) & (df['Mes'] == mes)][0]
+
+
+def archivo():
+    # Enero y Febrero cambian m_ventas; Marzo 2027 es nuevo
+    return pd.DataFrame({'Año': [2026, 2026, 2027], 'Mes': ["Enero", "Febrero", "Marzo"], 'm_ventas': [1.0, 2.0, 3.0]})
+
+
+def test_importacion_fusiona_y_reporta_lo_que_cambio_en_la_hoja_despues_de_la_vista_previa(hojas_falsas):
+    estado = Estado()
+    plan = planear(archivo(), ESQUEMA_DATOS, estado.almacen.datos_df())
+    # Después de la vista previa alguien edita la hoja: en Enero los mismos campos, en Febrero otro
+    datos = hojas_falsas["Datos"]
+    enero, febrero = indice(hojas_falsas, 2026, "Enero"), indice(hojas_falsas, 2026, "Febrero")
+    datos.loc[enero, ['m_ventas', 'Versión']] = [99.0, 2]
+    datos.loc[febrero, ['h_citas', 'Versión']] = [7, 2]
+
+    escritos, conflictos = estado.importar_registros(plan.registros(), plan.bases())
+
+    assert [(r['Mes'], r['Versión']) for r in escritos] == [("Febrero", 3), ("Marzo", 1)]
+    assert [(e.llave, e.conflictos) for _, _, e in conflictos] == [((2026, "Enero"), {'m_ventas': (1.0, 99.0)})]
+    datos = hojas_falsas["Datos"]
+    assert datos.loc[enero, 'm_ventas'] == 99.0 and datos.loc[enero, 'Versión'] == 2         # No se pisó
+    assert datos.loc[febrero, ['m_ventas', 'h_citas', 'Versión']].tolist() == [2.0, 7, 3]    # Fusionado
+    assert datos.loc[indice(hojas_falsas, 2027, "Marzo"), 'Versión'] == 1
+    assert estado.get_month_data(2026, "Febrero")['h_citas'] == 7
+
+    # Forzar el conflicto: en ese campo gana el archivo
+    registros, bases, _ = zip(*conflictos)
+    escritos, conflictos = estado.importar_registros(list(registros), list(bases), forzar=True)
+    assert conflictos == [] and hojas_falsas["Datos"].loc[enero, ['m_ventas', 'Versión']].tolist() == [1.0, 3]
+
+
+def test_importacion_en_motor_sql_compara_versiones(tmp_path, monkeypatch, hojas_falsas):
+    monkeypatch.setattr(modulo_estado, "configuracion_almacenamiento", lambda: ("sqlite", str(tmp_path / "local.sqlite3")))
+    estado = Estado()
+    estado.backend.reemplazar_todo(ESQUEMA_DATOS.ingerir(hojas_falsas["Datos"])[0], ESQUEMA_METAS.ingerir(hojas_falsas["Metas"])[0])
+    plan = planear(archivo(), ESQUEMA_DATOS, estado.almacen.datos_df())
+    vigente = estado.almacen.mes(2026, "Enero")
+    estado.backend.upsert("Datos", {**vigente, 'm_ventas': 99.0, 'Versión': 2})
+
+    escritos, conflictos = estado.importar_registros(plan.registros(), plan.bases())
+    assert [r['Mes'] for r in escritos] == ["Febrero", "Marzo"] and len(conflictos) == 1
+    assert estado.almacen.mes(2026, "Enero")['m_ventas'] == 99.0
+    assert estado.almacen.mes(2026, "Febrero")['Versión'] == 2
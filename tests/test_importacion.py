@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+import gsheets_falso
+from config import ESQUEMA_DATOS
+from importacion import planear
+
+
+@pytest.fixture
+def actual():
+    df, _ = gsheets_falso.datos_sinteticos(12, anio_final=2026)
+    return ESQUEMA_DATOS.ingerir(df)[0]
+
+
+def test_plan_separa_nuevos_actualizados_sin_cambios_y_rechazos(actual):
+    febrero = actual.loc[1, 'm_ventas']
+    crudo = pd.DataFrame({
+        'Año':      ["2026", "2026", "2026", "2027", "", "2026", "2026"],
+        'Mes':      ["Enero", "Febrero", "Marzo", "Enero", "Abril", "Mayo", "Mayo"],
+        'm_ventas': ["1", str(febrero), "abc", "5", "7", "8", "9"],
+        'Versión':  ["99"] * 7,     # Se ignora: manda la guardada
+        'extra':    1,
+    })
+    plan = planear(crudo, ESQUEMA_DATOS, actual)
+
+    assert plan.ignoradas == ['extra']
+    assert plan.sin_cambios == 1 and plan.total == 3
+    assert plan.nuevos[['Año', 'Mes', 'm_ventas', 'h_citas']].values.tolist() == [[2027, "Enero", 5.0, 0]]
+    # Las columnas que no vienen en el archivo conservan lo guardado
+    actualizados = plan.actualizados.set_index('Mes')
+    assert list(actualizados.index) == ["Enero", "Mayo"]
+    assert actualizados.loc["Mayo", 'm_ventas'] == 9.0      # Gana la última fila repetida
+    assert actualizados.loc["Enero", 'h_citas'] == actual.loc[0, 'h_citas']
+    assert actualizados.loc["Enero", 'Versión'] == actual.loc[0, 'Versión']
+
+    assert plan.diferencias[['Mes', 'columna', 'nuevo']].values.tolist() == [["Enero", 'm_ventas', 1.0], ["Mayo", 'm_ventas', 9.0]]
+    # Base del compare-and-set: la fila guardada tal como se vio en la vista previa; los meses nuevos no tienen
+    bases = plan.bases()
+    assert [(b['Mes'], b['m_ventas'], b['Versión']) for b in bases[:2]] == [("Enero", actual.loc[0, 'm_ventas'], 1), ("Mayo", actual.loc[4, 'm_ventas'], 1)]
+    assert bases[2:] == [{}]
+    assert plan.diferencias['actual'].tolist() == [actual.loc[0, 'm_ventas'], actual.loc[4, 'm_ventas']]
+
+    rechazos = plan.rechazos[['fila', 'columna', 'valor', 'motivo']].values.tolist()
+    assert rechazos == [[4, 'm_ventas', "abc", "no es un número"],
+                        [6, 'Año', "", "falta el año"],
+                        [7, 'Mes', "Mayo", "repetida en el archivo (se usa la última)"]]
+
+
+def test_archivo_vacio_o_sin_llave_se_rechaza(actual):
+    with pytest.raises(ValueError, match="no tiene filas"):
+        planear(pd.DataFrame(), ESQUEMA_DATOS, actual)
+    with pytest.raises(ValueError, match="Mes"):
+        planear(pd.DataFrame({'Año': [2026], 'm_ventas': [1]}), ESQUEMA_DATOS, actual)
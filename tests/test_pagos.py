@@ -0,0 +1,60 @@
+import numpy as np
+
+from config import PLAN_PAGOS, REGISTRO_KPIS
+from pagos import Bono, Comision
+
+PLAN = PLAN_PAGOS
+
+
+def datos_aleatorios(n_anios, semilla=0):
+    rng = np.random.default_rng(semilla)
+    totales = rng.uniform(0, 3_000_000, (n_anios, len(PLAN.columnas)))
+    metas = PLAN.metas_por_anio(None, range(n_anios))
+    for r in PLAN.reglas:
+        if isinstance(r, Bono):
+            metas[r.meta] = rng.uniform(0, 3_000_000, n_anios)
+            metas[r.monto] = rng.uniform(0, 50_000, n_anios)
+    return totales, metas
+
+
+def pago_escalar(regla, totales, metas, i, meta=None, valor=None):
+    total = totales[i, PLAN.columnas.index(regla.columna)]
+    if isinstance(regla, Comision):
+        return total * (regla.tasa if valor is None else valor)
+    alcanza = total >= (metas[regla.meta][i] if meta is None else meta)
+    return (metas[regla.monto][i] if valor is None else valor) if alcanza else 0.0
+
+
+def test_calcular_vectorizado_igual_a_regla_por_regla():
+    totales, metas = datos_aleatorios(7)
+    pagos = PLAN.calcular(totales, metas)
+    esperado = [[pago_escalar(r, totales, metas, i) for r in PLAN.reglas] for i in range(len(totales))]
+    np.testing.assert_allclose(pagos, esperado)
+    por_persona = PLAN.por_persona(pagos)
+    for j, persona in enumerate(PLAN.personas):
+        columnas = [k for k, r in enumerate(PLAN.reglas) if r.persona == persona.clave]
+        np.testing.assert_allclose(por_persona[:, j], pagos[:, columnas].sum(axis=1))
+
+
+def test_simular_igual_a_recalcular_cada_celda():
+    totales, metas = datos_aleatorios(5, semilla=3)
+    metas_candidatas = np.linspace(0, 3_000_000, 7)
+    for persona, regla, valores in [('david', PLAN.por_clave['david_bono'], [0, 10_000, 20_000]),
+                                    ('mario', PLAN.por_clave['mario_nuevos'], [0.01, 0.05, 0.1])]:
+        pago, alcanzan = PLAN.simular(totales, metas, persona, regla, metas_candidatas, valores)
+        columna_meta = PLAN.columna_meta[persona]
+        for g, meta in enumerate(metas_candidatas):
+            assert alcanzan[g] == (totales[:, PLAN.columnas.index(columna_meta)] >= meta).sum()
+            for v, valor in enumerate(valores):
+                esperado = sum(pago_escalar(r, totales, metas, i, meta=meta if isinstance(r, Bono) else None,
+                                            valor=valor if r.clave == regla.clave else None)
+                               for r in PLAN.reglas_de(persona) for i in range(len(totales)))
+                assert np.isclose(pago[g, v], esperado)
+
+
+def test_del_anio_usa_las_metas_del_registro():
+    metas = {p.clave: 1_000.0 for p in REGISTRO_KPIS.personas}
+    metas.update({c: 500.0 for c in ['bono_david', 'bono_hellen']})
+    ytd = {c: 2_000.0 for c in PLAN.columnas}
+    pagos = PLAN.del_anio(ytd, metas)
+    assert pagos['mario_nuevos'] == 100.0 and pagos['david_bono'] == 500.0
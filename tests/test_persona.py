@@ -0,0 +1,64 @@
+import pytest
+
+import graficas
+from config import PLAN_PAGOS, REGISTRO_KPIS, MESES, COLUMNAS_DINERO
+from kpis import Condicion, Kpi, Persona, RegistroKpis, Campo, CampoMeta, SeccionTv, DINERO
+from paginas import persona as pagina_persona, tv as pagina_tv
+from proyeccion import proyectar
+from almacen import CuboAgregados
+
+
+def test_kpi_compuesto_con_meta_anual_muestra_el_umbral_resuelto():
+    kpi = Kpi('mixto', "Ventas y clientes", [Condicion('m_ventas', meta_anual='meta_mario', etiqueta="Ventas"), Condicion('m_clientes', 1, etiqueta="Clientes")],
+              "Meta: ${meta:,.0f}", "Premio")
+    contexto = {'meta': 10_000.0, 'recompensa': "", 'metas': {'meta_mario': 120_000.0}}
+    html = pagina_persona.tarjeta_kpi(kpi, {'m_ventas': 9000.0, 'm_clientes': 2}, False, contexto)
+    assert "Ventas: <b>9000.0</b>/10,000" in html
+    assert "Clientes: <b>2</b>/1" in html
+
+
+def test_kpis_persona_pasa_las_metas_por_columna_al_contexto():
+    mario = REGISTRO_KPIS.por_clave['mario']
+    metas = {p.clave: 1_200_000.0 for p in REGISTRO_KPIS.personas}
+    _, contexto = pagina_persona.kpis_persona(mario, {c: 0 for c in REGISTRO_KPIS.columnas_datos}, metas)
+    assert contexto['metas'] == REGISTRO_KPIS.metas_por_columna(metas)
+    assert Condicion('m_ventas', meta_anual='meta_mario').umbral_mensual(contexto['metas']) == pytest.approx(100_000.0)
+
+
+def test_secciones_tv_y_carteras_salen_del_registro():
+    assert list(pagina_tv.TITULOS) == [p.clave for p in REGISTRO_KPIS.secciones_tv]
+    assert pagina_tv.COLUMNAS == {p.clave: p.tv.columna for p in REGISTRO_KPIS.secciones_tv}
+    assert all(p.nombre.upper() in pagina_tv.TITULOS[p.clave] for p in REGISTRO_KPIS.secciones_tv)
+    assert set(pagina_persona.CARTERAS) == {p.clave for p in PLAN_PAGOS.personas}
+
+
+def test_registro_rechaza_una_seccion_tv_sobre_una_columna_inexistente():
+    with pytest.raises(ValueError, match="sección de TV"):
+        RegistroKpis([Persona('ana', "Ana", "🙂", [Campo('a_ventas', "Ventas", DINERO)], CampoMeta('meta_ana', "Ventas $", 1.0),
+                              tv=SeccionTv("Ventas", 'a_otra', "Ventas (YTD)", "Venta", "Ventas vs Meta"))])
+
+
+@pytest.mark.parametrize("clave", [p.clave for p in PLAN_PAGOS.personas])
+def test_cartera_de_cada_persona_con_reglas_de_pago(clave):
+    persona = REGISTRO_KPIS.por_clave[clave]
+    metas = {p.clave: 1_200_000.0 for p in REGISTRO_KPIS.personas}
+    metas.update({c.columna: c.defecto for c in REGISTRO_KPIS.campos_metas if c.columna not in metas})
+    ytd = {c.columna: 2_000_000.0 if c.tipo == DINERO else 3 for c in REGISTRO_KPIS.campos}
+    cubo = CuboAgregados(MESES, COLUMNAS_DINERO).construir({2026: {"Enero": {c: 100.0 for c in COLUMNAS_DINERO}}})
+    html = pagina_persona.CARTERAS[clave](2026, ytd, metas, proyectar(cubo, 2026, COLUMNAS_DINERO, MESES))
+    assert "MI CARTERA 2026" in html
+    for regla in PLAN_PAGOS.reglas_de(clave):
+        assert regla.descripcion in html
+    if PLAN_PAGOS.columna_meta[clave]:
+        assert "Monto Alcanzado: $2,000,000 (100.0%)" in html
+    assert "🔒" not in html  # Con la meta alcanzada, todos sus bonos quedan ganados
+
+
+@pytest.mark.parametrize("clave", [p.clave for p in REGISTRO_KPIS.secciones_tv])
+def test_figura_de_cada_seccion_tv(clave):
+    persona = REGISTRO_KPIS.por_clave[clave]
+    cubo = CuboAgregados(MESES, COLUMNAS_DINERO).construir({2026: {m: {c: 100.0 for c in COLUMNAS_DINERO} for m in MESES[:3]}})
+    proy = proyectar(cubo, 2026, COLUMNAS_DINERO, MESES)
+    fig = graficas.construir(persona.tv, *pagina_tv.argumentos_figura(cubo, 2026, clave, proy, 1_200_000.0))
+    assert fig.data[0].name == persona.tv.serie
+    assert persona.tv.color in fig.to_json()
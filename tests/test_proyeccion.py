@@ -0,0 +1,54 @@
+import numpy as np
+
+from almacen import CuboAgregados
+from config import MESES
+from proyeccion import proyectar
+
+COLUMNAS = ['m_ventas', 'h_ventas']
+
+
+def cubo_con(anios):
+    """anios: {año: (n_meses, valores mensuales de cada columna)}."""
+    registros = {a: {MESES[i]: {c: float(v) for c, v in zip(COLUMNAS, fila)} for i, fila in enumerate(valores[:n])}
+                 for a, (n, valores) in anios.items()}
+    return CuboAgregados(MESES, COLUMNAS).construir(registros)
+
+
+def test_sin_historia_proyecta_el_promedio_de_los_meses_capturados():
+    cubo = cubo_con({2026: (3, np.tile([200.0, 50.0], (12, 1)))})
+    p = proyectar(cubo, 2026, COLUMNAS, MESES)
+    assert p.disponible and p.transcurridos == 3
+    centro, inferior, superior = p.cierre('m_ventas')
+    assert centro == 2400.0 and inferior == superior == centro      # Sin dispersión: banda nula
+    assert p.totales_cierre()['h_ventas'] == 600.0
+    meses, camino, _, _ = p.camino('m_ventas', acumulado=True)
+    assert meses[0] == "Marzo" and camino[0] == 600.0 and camino[-1] == 2400.0
+
+
+def test_la_estacionalidad_de_la_historia_reparte_el_cierre():
+    # Años anteriores: diciembre vale el doble que el resto
+    estacional = np.array([[100.0, 10.0]] * 11 + [[200.0, 20.0]])
+    cubo = cubo_con({2024: (12, estacional), 2025: (12, estacional), 2026: (6, estacional * 1.5)})
+    p = proyectar(cubo, 2026, COLUMNAS, MESES, historia=3)
+    meses, mensual, inferior, superior = p.camino('m_ventas')
+    assert meses == MESES[6:]
+    np.testing.assert_allclose(mensual, [150.0] * 5 + [300.0])
+    assert np.isclose(p.cierre('m_ventas')[0], estacional[:, 0].sum() * 1.5)
+    assert np.all(inferior <= mensual) and np.all(mensual <= superior)
+
+
+def test_banda_se_abre_con_datos_dispersos_y_contiene_al_centro():
+    rng = np.random.default_rng(0)
+    cubo = cubo_con({2025: (12, rng.uniform(50, 150, (12, 2))), 2026: (4, rng.uniform(50, 150, (12, 2)))})
+    p = proyectar(cubo, 2026, COLUMNAS, MESES, confianza=0.8)
+    centro, inferior, superior = p.cierre('m_ventas')
+    assert inferior < centro < superior
+    ancha = proyectar(cubo, 2026, COLUMNAS, MESES, confianza=0.95).cierre('m_ventas')
+    assert ancha[2] - ancha[1] > superior - inferior
+
+
+def test_anio_completo_o_sin_datos_no_se_proyecta():
+    completo = proyectar(cubo_con({2026: (12, np.ones((12, 2)))}), 2026, COLUMNAS, MESES)
+    assert not completo.disponible and completo.cierre('m_ventas') == (12.0,) * 3
+    vacio = proyectar(CuboAgregados(MESES, COLUMNAS), 2026, COLUMNAS, MESES)
+    assert not vacio.disponible and vacio.cierre('m_ventas') == (0.0,) * 3
@@ -0,0 +1,36 @@
+from respaldo_local import CircuitoConexion, RespaldoLocal
+
+
+def test_circuito_abre_al_umbral_y_prueba_una_sola_vez():
+    circuito = CircuitoConexion(umbral_fallos=2, enfriamiento_segundos=0)
+    circuito.fallo()
+    assert circuito.estado == CircuitoConexion.CERRADO and circuito.permitir()
+    circuito.fallo()
+    assert circuito.estado == CircuitoConexion.ABIERTO
+    assert circuito.permitir()                 # Pasó el enfriamiento: un intento de prueba...
+    assert circuito.estado == CircuitoConexion.SEMIABIERTO
+    assert not circuito.permitir()             # ...y solo uno
+    circuito.fallo()                           # La prueba falla: se vuelve a abrir de inmediato
+    assert circuito.estado == CircuitoConexion.ABIERTO
+    assert circuito.permitir()
+    circuito.exito()
+    assert circuito.estado == CircuitoConexion.CERRADO and circuito.fallos == 0
+
+
+def test_circuito_abierto_espera_el_enfriamiento():
+    circuito = CircuitoConexion(enfriamiento_segundos=60)
+    circuito.fallo()
+    assert not circuito.permitir() and circuito.estado == CircuitoConexion.ABIERTO
+
+
+def test_diario_marca_por_id_sin_tocar_ediciones_posteriores_de_la_misma_llave(tmp_path):
+    respaldo = RespaldoLocal(str(tmp_path / "respaldo.sqlite3"))
+    llave = (2026, "Enero")
+    primera = respaldo.registrar("Datos", llave, {'Año': 2026, 'Mes': "Enero", 'm_ventas': 1.0})
+    segunda = respaldo.registrar("Datos", llave, {'Año': 2026, 'Mes': "Enero", 'm_ventas': 2.0})
+    tercera = respaldo.registrar("Datos", (2026, "Febrero"), {'Año': 2026, 'Mes': "Febrero", 'm_ventas': 3.0})
+    respaldo.marcar_enviados([primera])
+    respaldo.marcar_conflicto([tercera])
+    pendientes = respaldo.pendientes()
+    assert [p[0] for p in pendientes] == [segunda]
+    assert pendientes[0][2] == llave and pendientes[0][3]['m_ventas'] == 2.0
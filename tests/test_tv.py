@@ -0,0 +1,68 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import estado
+import graficas
+from conftest import APP
+from config import REGISTRO_KPIS
+from respaldo_local import CircuitoConexion
+
+
+@pytest.mark.parametrize("anio", ["abc", "", "1999"])
+def test_modo_tv_con_anio_invalido_muestra_el_anio_actual(hojas_falsas, anio):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.query_params["modo"] = "tv"
+    at.query_params["anio"] = anio
+    at.run()
+    assert not at.exception, at.exception
+    assert any(f"DASHBOARD ESTRATÉGICO {datetime.now().year}" in m.value for m in at.markdown)
+
+
+def test_editar_el_mes_de_una_persona_reconstruye_solo_su_seccion(hojas_falsas, monkeypatch):
+    construidas = Counter()
+    construir = graficas.construir
+    monkeypatch.setattr(graficas, "construir", lambda tv, metas, datos: construidas.update([tv.columna]) or construir(tv, metas, datos))
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.query_params["modo"] = "tv"
+    at.query_params["anio"] = "2026"
+    at.run()
+    assert not at.exception, at.exception
+    assert construidas == Counter(p.tv.columna for p in REGISTRO_KPIS.secciones_tv)
+
+    # Otra sesión guarda marzo de Mario: nueva versión de datos, pero solo cambia la firma de su sección
+    datos = hojas_falsas['Datos']
+    marzo = (datos['Año'] == 2026) & (datos['Mes'] == "Marzo")
+    datos.loc[marzo, 'm_ventas'] += 1000.0
+    datos.loc[marzo, 'Versión'] += 1
+    estado.obtener_cache_hojas("gsheets", None, None, None).invalidar()
+    construidas.clear()
+    at.run()
+    assert not at.exception, at.exception
+    assert construidas == Counter(['m_ventas'])
+    assert len(at.get("plotly_chart")) == len(REGISTRO_KPIS.secciones_tv)
+
+    construidas.clear()
+    at.run()  # Sin cambios: todas las figuras salen de la caché
+    assert not construidas
+
+
+def test_puede_reintentar_no_gasta_el_intento_de_prueba():
+    circuito = CircuitoConexion(enfriamiento_segundos=0)
+    circuito.fallo()
+    assert circuito.estado == CircuitoConexion.ABIERTO
+    assert circuito.puede_reintentar() and circuito.puede_reintentar()
+    assert circuito.estado == CircuitoConexion.ABIERTO
+    # El intento de prueba sigue disponible para _conectar
+    assert circuito.permitir()
+    assert circuito.estado == CircuitoConexion.SEMIABIERTO
+    assert not circuito.puede_reintentar()
+
+
+def test_puede_reintentar_respeta_el_enfriamiento():
+    circuito = CircuitoConexion(enfriamiento_segundos=60)
+    assert circuito.puede_reintentar()
+    circuito.fallo()
+    assert not circuito.puede_reintentar()